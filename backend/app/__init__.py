@@ -1,28 +1,83 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .main import api_router
+from fastapi.responses import JSONResponse
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+import logging
+from .main import api_router, init_database, close_database
+from services.storage import get_storage
+from services.events import broker
+from services.scheduler import scheduler
+from .middleware import CompressionMiddleware, SecurityHeadersMiddleware, WorkerStatsMiddleware
+from .worker import install_drain_hook, worker_state
 from config import settings
 
+logger = logging.getLogger(__name__)
+
+# Lifespan
+# Heavy clients (Supabase, SQLite connection) are created here rather than at import time so
+# that importing the app stays cheap and every worker process builds its own.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    worker_state.reset()
+    await init_database()
+    # Open event streams would otherwise hold the drain until GRACEFUL_TIMEOUT
+    worker_state.on_drain(broker.close_streams)
+    logger.info("✅ BudgetIQ API started with %s storage (pid %s)", get_storage().name, worker_state.pid)
+    yield
+    await close_database()
+    logger.info("👋 BudgetIQ API shutdown")
+
 def create_app() -> FastAPI:
-    app = FastAPI(
-        title=settings.APP_NAME,
-        version=settings.APP_VERSION
+    app = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION, lifespan=lifespan)
+    install_drain_hook(worker_state)
+
+    # Add security headers middleware
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.GZIP_LEVEL,
+        brotli_quality=settings.BROTLI_QUALITY,
     )
+    app.add_middleware(WorkerStatsMiddleware, state=worker_state)
 
-    # Configure CORS
-    origins = settings.CORS_ORIGINS.split(",")
+    # CORS
+    origins = [o.strip() for o in settings.CORS_ORIGINS.split(",") if o]
+    if "https://ayush-agrawal-lab.github.io" not in origins:
+        origins.append("https://ayush-agrawal-lab.github.io")
+
+    # Add specific methods and headers
     app.add_middleware(
         CORSMiddleware,
         allow_origins=origins,
         allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-        expose_headers=["*"]
+        allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        allow_headers=[
+            "Content-Type",
+            "Authorization",
+            "Accept",
+            "Origin",
+            "X-Requested-With"
+        ],
+        expose_headers=["Content-Length", "X-Next-Cursor"],
+        max_age=600  # Cache preflight requests for 10 minutes
     )
 
-    # Add routes
+    # Include router
     app.include_router(api_router, prefix="/api")
 
-    return app
+    # Health check (reported by whichever worker handled the request)
+    @app.get("/health")
+    async def health_check():
+        body = {
+            "status": "draining" if worker_state.draining else "healthy",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "version": settings.APP_VERSION,
+            "worker": worker_state.snapshot(),
+            "jobs": scheduler.metrics(),
+            "events": broker.metrics(),
+        }
+        return JSONResponse(body, status_code=503 if worker_state.draining else 200)
 
-app = create_app()
+    return app
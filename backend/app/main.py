@@ -1,18 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, EmailStr
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
+import json
+import re
 import uuid
 import jwt
-from passlib.context import CryptContext
-from services import supabase_service as supabase
+from functools import lru_cache
+from services import account_removal, budgets, events, jobs, projections, recurring, statements
+from services.events import broker
+from services.scheduler import scheduler
+from services.storage import Storage, get_storage, init_storage, close_storage, encode_cursor, decode_cursor
 from config import settings
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 from collections import defaultdict
-import numpy as np
 
 # ---------------- SECURITY ----------------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = settings.JWT_SECRET
 ALGORITHM = settings.JWT_ALGORITHM
 
@@ -51,6 +56,20 @@ class Account(AccountCreate):
     id: str
     user_id: str
     created_at: str
+    status: str = "active"
+    archived_at: Optional[str] = None
+
+class AccountOperation(BaseModel):
+    id: str
+    account_id: str
+    mode: str
+    status: str
+    total: int
+    processed: int
+    closing_balance: Optional[float]
+    error: Optional[str]
+    created_at: str
+    updated_at: str
 
 # ---------------- TRANSACTION MODELS ----------------
 class TransactionCreate(BaseModel):
@@ -74,6 +93,9 @@ class Transaction(TransactionCreate):
     user_id: str
     created_at: str
 
+class TransactionSearchResult(Transaction):
+    rank: float
+
 # ---------------- GOAL MODELS ----------------
 class GoalCreate(BaseModel):
     name: str
@@ -87,42 +109,123 @@ class GoalUpdate(BaseModel):
     current_amount: Optional[float]
     deadline: Optional[str]
 
+class GoalProjection(BaseModel):
+    monthly_savings: float
+    months_to_complete: Optional[int]
+    projected_completion_date: Optional[str]
+    required_monthly_contribution: float
+    on_track: bool
+
 class Goal(GoalCreate):
     id: str
     user_id: str
     created_at: str
+    projection: Optional[GoalProjection] = None
+
+# ---------------- BUDGET MODELS ----------------
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+class BudgetCreate(BaseModel):
+    category: str
+    month: str = Field(pattern=MONTH_PATTERN)
+    amount: float = Field(gt=0)
+    alert_threshold: float = Field(0.8, gt=0, le=1)
+
+class BudgetUpdate(BaseModel):
+    amount: Optional[float] = Field(None, gt=0)
+    alert_threshold: Optional[float] = Field(None, gt=0, le=1)
+
+class Budget(BudgetCreate):
+    id: str
+    user_id: str
+    spent: float
+    alert_level: Optional[str] = None
+    created_at: str
+
+class BudgetStatus(Budget):
+    remaining: float
+    percent_used: float
+    status: str
+
+# ---------------- STATEMENT MODELS ----------------
+class StatementCategory(BaseModel):
+    category: str
+    income: float
+    expense: float
+    count: int
+
+class Statement(BaseModel):
+    id: str
+    user_id: str
+    account_id: str
+    month: str
+    opening_balance: float
+    closing_balance: float
+    total_income: float
+    total_expense: float
+    transaction_count: int
+    categories: List[StatementCategory]
+    generated_at: str
 
 # ---------------- PASSWORD HELPERS ----------------
+# passlib/bcrypt are only needed by signup and login, so load them on first use
+@lru_cache()
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return get_pwd_context().verify(plain, hashed)
 
 def create_access_token(user_id: str):
     expire = datetime.now(timezone.utc) + timedelta(days=7)
     payload = {"user_id": user_id, "exp": expire}
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
-# ---------------- AUTH DEPENDENCY ----------------
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+# Only accepted as ?access_token= on the event stream, which puts it in URLs
+# and access logs, so it expires quickly and grants nothing else
+STREAM_TOKEN_SCOPE = "events"
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
+def create_stream_token(user_id: str):
+    expire = datetime.now(timezone.utc) + timedelta(seconds=settings.STREAM_TOKEN_SECONDS)
+    payload = {"user_id": user_id, "exp": expire, "scope": STREAM_TOKEN_SCOPE}
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_token(token: str, scope: str = None) -> TokenData:
     credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials")
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("user_id")
-        if not user_id:
-            raise credentials_exception
-        return TokenData(user_id=user_id)
-    except jwt.JWTError:
+    except jwt.PyJWTError:
+        raise credentials_exception
+    user_id: str = payload.get("user_id")
+    if not user_id or payload.get("scope") != scope:
         raise credentials_exception
+    return TokenData(user_id=user_id)
+
+# ---------------- AUTH DEPENDENCY ----------------
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
+    return decode_token(token)
+
+# EventSource cannot send an Authorization header, so the event stream also
+# accepts a stream token (POST /events/token) as ?access_token=
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+async def get_stream_user(token: Optional[str] = Depends(optional_oauth2_scheme), access_token: Optional[str] = None) -> TokenData:
+    if token:
+        return decode_token(token)
+    if access_token:
+        return decode_token(access_token, STREAM_TOKEN_SCOPE)
+    raise HTTPException(status_code=401, detail="Not authenticated")
 
 # ---------------- AUTH ENDPOINTS ----------------
 @api_router.post("/auth/signup", response_model=Token)
-async def signup(user: UserSignup):
-    existing = supabase.supabase.table("users").select("*").eq("email", user.email).execute()
-    if existing.data and len(existing.data) > 0:
+async def signup(user: UserSignup, db: Storage = Depends(get_storage)):
+    if db.get_user_by_email(user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     user_data = {
         "id": str(uuid.uuid4()),
@@ -131,18 +234,17 @@ async def signup(user: UserSignup):
         "password": hash_password(user.password),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    supabase.supabase.table("users").insert(user_data).execute()
+    db.create_user(user_data)
     token = create_access_token(user_data["id"])
     # Return sanitized user data along with token to avoid extra /me request from clients
     safe_user = {"id": user_data["id"], "name": user_data["name"], "email": user_data["email"], "created_at": user_data["created_at"]}
     return {"access_token": token, "user": safe_user}
 
 @api_router.post("/auth/login", response_model=Token)
-async def login(user: UserLogin):
-    result = supabase.supabase.table("users").select("*").eq("email", user.email).execute()
-    if not result.data or len(result.data) == 0:
+async def login(user: UserLogin, db: Storage = Depends(get_storage)):
+    db_user = db.get_user_by_email(user.email)
+    if not db_user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
-    db_user = result.data[0]
     if not verify_password(user.password, db_user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     token = create_access_token(db_user["id"])
@@ -151,129 +253,345 @@ async def login(user: UserLogin):
     return {"access_token": token, "user": safe_user}
 
 @api_router.get("/auth/me")
-async def get_current_user_profile(current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("users").select("id,name,email,created_at").eq("id", current_user.user_id).execute()
-    if not result.data or len(result.data) == 0:
+async def get_current_user_profile(current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    profile = db.get_user(current_user.user_id)
+    if not profile:
         raise HTTPException(status_code=404, detail="User not found")
-    return result.data[0]
+    return profile
 
 # ---------------- ACCOUNTS ----------------
 @api_router.post("/accounts", response_model=Account)
-async def create_account(account: AccountCreate, current_user: TokenData = Depends(get_current_user)):
+async def create_account(account: AccountCreate, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
     data = account.dict()
     data.update({"id": str(uuid.uuid4()), "user_id": current_user.user_id, "created_at": datetime.now(timezone.utc).isoformat()})
-    supabase.supabase.table("accounts").insert(data).execute()
+    db.create_account(data)
+    broker.publish(db, current_user.user_id, events.ACCOUNT_CREATED, data)
     return data
 
 @api_router.get("/accounts", response_model=List[Account])
-async def get_accounts(current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("accounts").select("*").eq("user_id", current_user.user_id).execute()
-    return result.data
+async def get_accounts(include_archived: bool = False, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    return db.list_accounts(current_user.user_id, include_archived)
 
 @api_router.put("/accounts/{account_id}", response_model=Account)
-async def update_account(account_id: str, account: AccountUpdate, current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("accounts").select("*").eq("id", account_id).eq("user_id", current_user.user_id).execute()
-    if not result.data or len(result.data) == 0:
+async def update_account(account_id: str, account: AccountUpdate, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    existing = db.get_account(current_user.user_id, account_id)
+    if not existing:
         raise HTTPException(status_code=404, detail="Account not found")
     updated_data = {k:v for k,v in account.dict().items() if v is not None}
-    supabase.supabase.table("accounts").update(updated_data).eq("id", account_id).execute()
-    return {**result.data[0], **updated_data}
+    db.update_account(current_user.user_id, account_id, updated_data)
+    updated = {**existing, **updated_data}
+    broker.publish(db, current_user.user_id, events.ACCOUNT_UPDATED, updated)
+    return updated
 
 @api_router.delete("/accounts/{account_id}")
-async def delete_account(account_id: str, current_user: TokenData = Depends(get_current_user)):
+async def delete_account(
+    account_id: str,
+    response: Response,
+    mode: Optional[str] = Query(None, pattern="^(archive|cascade)$"),
+    current_user: TokenData = Depends(get_current_user),
+    db: Storage = Depends(get_storage),
+):
     try:
         # First check if account exists and belongs to user
-        account_result = supabase.supabase.table("accounts").select("*").eq("id", account_id).eq("user_id", current_user.user_id).execute()
-        if not account_result.data:
+        account = db.get_account(current_user.user_id, account_id)
+        if not account:
             raise HTTPException(status_code=404, detail="Account not found or does not belong to user")
 
-        # Check if there are any active transactions for this account
-        transactions = supabase.supabase.table("transactions").select("*").eq("account_id", account_id).execute()
-        if transactions.data:
-            raise HTTPException(status_code=400, detail="Cannot delete account with existing transactions. Please delete transactions first.")
+        # ?mode=archive / ?mode=cascade remove the transactions in a background job
+        if mode is not None:
+            latest = db.get_latest_account_operation(current_user.user_id, account_id)
+            if account_removal.is_stale(latest):
+                # Its worker died mid-run; chunks are atomic, so run it again
+                scheduler.schedule(jobs.ACCOUNT_REMOVAL, latest["id"], delay=0)
+                response.status_code = 202
+                return {"detail": f"Account {latest['mode']} resumed", "operation": latest}
+            if account_removal.is_active(latest):
+                raise HTTPException(status_code=409, detail=f"Account is already being removed (operation {latest['id']})")
+            if account.get("status") == "archived":
+                raise HTTPException(status_code=400, detail="Account is already archived")
+            operation = account_removal.start(db, current_user.user_id, account, mode)
+            scheduler.schedule(jobs.ACCOUNT_REMOVAL, operation["id"], delay=0)
+            response.status_code = 202
+            return {"detail": f"Account {mode} started", "operation": operation}
+
+        # Check if there are any active transactions for this account (a LIMIT 1 probe)
+        if db.account_has_transactions(account_id):
+            raise HTTPException(
+                status_code=400,
+                detail="Cannot delete account with existing transactions. Delete them first, or pass ?mode=archive or ?mode=cascade.",
+            )
 
         # If all checks pass, delete the account
-        supabase.supabase.table("accounts").delete().eq("id", account_id).eq("user_id", current_user.user_id).execute()
+        db.delete_account(current_user.user_id, account_id)
+        broker.publish(db, current_user.user_id, events.ACCOUNT_DELETED, {"id": account_id})
         return {"detail": "Account deleted successfully"}
     except HTTPException as e:
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/accounts/operations/{operation_id}", response_model=AccountOperation)
+async def get_account_operation(operation_id: str, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    operation = db.get_account_operation(operation_id)
+    if not operation or operation["user_id"] != current_user.user_id:
+        raise HTTPException(status_code=404, detail="Operation not found")
+    return operation
+
 # ---------------- TRANSACTIONS ----------------
+def ensure_account_writable(db: Storage, user_id: str, account_id: str):
+    account = db.get_account(user_id, account_id)
+    if account is not None and not account_removal.accepts_writes(account):
+        raise HTTPException(status_code=409, detail="Account is archived or being removed")
+
 @api_router.post("/transactions", response_model=Transaction)
-async def create_transaction(transaction: TransactionCreate, current_user: TokenData = Depends(get_current_user)):
+async def create_transaction(transaction: TransactionCreate, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    ensure_account_writable(db, current_user.user_id, transaction.account_id)
     data = transaction.dict()
     data.update({"id": str(uuid.uuid4()), "user_id": current_user.user_id, "created_at": datetime.now(timezone.utc).isoformat()})
-    supabase.supabase.table("transactions").insert(data).execute()
+    db.create_transaction(data)
+    budgets.apply_transaction_change(db, current_user.user_id, None, data)
+    # Continuing a known series is O(1); anything else queues a debounced re-detection of its series
+    if not recurring.extend_series(db, current_user.user_id, data):
+        scheduler.schedule(jobs.RECURRING_SERIES, jobs.series_job_key(current_user.user_id, data))
+    broker.publish(db, current_user.user_id, events.TRANSACTION_CREATED, data)
     return data
 
 @api_router.get("/transactions", response_model=List[Transaction])
-async def get_transactions(current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("transactions").select("*").eq("user_id", current_user.user_id).execute()
-    return result.data
+async def get_transactions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    current_user: TokenData = Depends(get_current_user),
+    db: Storage = Depends(get_storage),
+):
+    # Without a limit the full history is returned, newest first. With a limit,
+    # pass the X-Next-Cursor response header back as ?cursor= for the next page.
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = db.list_transactions(current_user.user_id, limit=limit, after=after)
+    if limit is not None and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return rows
+
+@api_router.get("/transactions/search", response_model=List[TransactionSearchResult])
+async def search_transactions(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: TokenData = Depends(get_current_user),
+    db: Storage = Depends(get_storage),
+):
+    # Words in q are prefix-matched against description and category; description hits first, then newest
+    terms = re.findall(r"\w+", q.lower())[:8]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query has no searchable words")
+    try:
+        after = None
+        if cursor:
+            rank, date, row_id = decode_cursor(cursor, 3)
+            after = (float(rank), date, row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = await run_in_threadpool(db.search_transactions, current_user.user_id, terms, limit, after)
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1], ("rank", "date", "id"))
+    return rows
 
 @api_router.put("/transactions/{transaction_id}", response_model=Transaction)
-async def update_transaction(transaction_id: str, transaction: TransactionUpdate, current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("transactions").select("*").eq("id", transaction_id).eq("user_id", current_user.user_id).execute()
-    if not result.data or len(result.data) == 0:
+async def update_transaction(transaction_id: str, transaction: TransactionUpdate, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    existing = db.get_transaction(current_user.user_id, transaction_id)
+    if not existing:
         raise HTTPException(status_code=404, detail="Transaction not found")
     updated_data = {k:v for k,v in transaction.dict().items() if v is not None}
-    supabase.supabase.table("transactions").update(updated_data).eq("id", transaction_id).execute()
-    return {**result.data[0], **updated_data}
+    for account_id in {existing["account_id"], updated_data.get("account_id", existing["account_id"])}:
+        ensure_account_writable(db, current_user.user_id, account_id)
+    db.update_transaction(current_user.user_id, transaction_id, updated_data)
+    updated = {**existing, **updated_data}
+    budgets.apply_transaction_change(db, current_user.user_id, existing, updated)
+    # The series it left and the one it joined, if they differ
+    for key in {jobs.series_job_key(current_user.user_id, existing), jobs.series_job_key(current_user.user_id, updated)}:
+        scheduler.schedule(jobs.RECURRING_SERIES, key)
+    broker.publish(db, current_user.user_id, events.TRANSACTION_UPDATED, updated)
+    return updated
 
 @api_router.delete("/transactions/{transaction_id}")
-async def delete_transaction(transaction_id: str, current_user: TokenData = Depends(get_current_user)):
-    supabase.supabase.table("transactions").delete().eq("id", transaction_id).eq("user_id", current_user.user_id).execute()
+async def delete_transaction(transaction_id: str, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    existing = db.get_transaction(current_user.user_id, transaction_id)
+    db.delete_transaction(current_user.user_id, transaction_id)
+    if existing:
+        budgets.apply_transaction_change(db, current_user.user_id, existing, None)
+        scheduler.schedule(jobs.RECURRING_SERIES, jobs.series_job_key(current_user.user_id, existing))
+        broker.publish(db, current_user.user_id, events.TRANSACTION_DELETED, {"id": transaction_id})
     return {"detail": "Transaction deleted"}
 
 # ---------------- GOALS ----------------
 @api_router.post("/goals", response_model=Goal)
-async def create_goal(goal: GoalCreate, current_user: TokenData = Depends(get_current_user)):
+async def create_goal(goal: GoalCreate, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
     data = goal.dict()
     data.update({"id": str(uuid.uuid4()), "user_id": current_user.user_id, "created_at": datetime.now(timezone.utc).isoformat()})
-    supabase.supabase.table("goals").insert(data).execute()
+    db.create_goal(data)
+    broker.publish(db, current_user.user_id, events.GOAL_CREATED, data)
     return data
 
 @api_router.get("/goals", response_model=List[Goal])
-async def get_goals(current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("goals").select("*").eq("user_id", current_user.user_id).execute()
-    return result.data
+async def get_goals(current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    # Each goal carries its projection from the user's savings trend (cached until the next write)
+    return projections.cache.goals_with_projections(db, current_user.user_id, db.list_goals(current_user.user_id))
 
 @api_router.put("/goals/{goal_id}", response_model=Goal)
-async def update_goal(goal_id: str, goal: GoalUpdate, current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("goals").select("*").eq("id", goal_id).eq("user_id", current_user.user_id).execute()
-    if not result.data or len(result.data) == 0:
+async def update_goal(goal_id: str, goal: GoalUpdate, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    existing = db.get_goal(current_user.user_id, goal_id)
+    if not existing:
         raise HTTPException(status_code=404, detail="Goal not found")
     updated_data = {k:v for k,v in goal.dict().items() if v is not None}
-    supabase.supabase.table("goals").update(updated_data).eq("id", goal_id).execute()
-    return {**result.data[0], **updated_data}
+    db.update_goal(current_user.user_id, goal_id, updated_data)
+    updated = {**existing, **updated_data}
+    broker.publish(db, current_user.user_id, events.GOAL_UPDATED, updated)
+    return updated
 
 @api_router.delete("/goals/{goal_id}")
-async def delete_goal(goal_id: str, current_user: TokenData = Depends(get_current_user)):
-    supabase.supabase.table("goals").delete().eq("id", goal_id).eq("user_id", current_user.user_id).execute()
+async def delete_goal(goal_id: str, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    db.delete_goal(current_user.user_id, goal_id)
+    broker.publish(db, current_user.user_id, events.GOAL_DELETED, {"id": goal_id})
     return {"detail": "Goal deleted"}
 
+# ---------------- BUDGETS ----------------
+@api_router.post("/budgets", response_model=Budget)
+async def create_budget(budget: BudgetCreate, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    if any(b["category"] == budget.category for b in db.list_budgets(current_user.user_id, budget.month)):
+        raise HTTPException(status_code=400, detail="Budget already exists for this category and month")
+    data = budget.dict()
+    # Seed spend once from existing transactions; later writes adjust it incrementally
+    data.update({
+        "id": str(uuid.uuid4()),
+        "user_id": current_user.user_id,
+        "spent": round(db.sum_expenses(current_user.user_id, budget.category, budget.month), 2),
+        "alert_level": None,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    })
+    db.create_budget(data)
+    budgets.check_alert(db, data)
+    return db.get_budget(current_user.user_id, data["id"])
+
+@api_router.get("/budgets", response_model=List[Budget])
+async def get_budgets(month: Optional[str] = None, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    return db.list_budgets(current_user.user_id, month)
+
+@api_router.get("/budgets/status", response_model=List[BudgetStatus])
+async def get_budget_status(month: Optional[str] = None, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    # Reads the maintained totals only; no transaction scan
+    return [budgets.budget_status(b) for b in db.list_budgets(current_user.user_id, month or budgets.current_month())]
+
+@api_router.get("/budgets/alerts")
+async def get_budget_alerts(limit: int = Query(50, ge=1, le=500), current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    return db.list_budget_alerts(current_user.user_id, limit)
+
+@api_router.put("/budgets/{budget_id}", response_model=Budget)
+async def update_budget(budget_id: str, budget: BudgetUpdate, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    existing = db.get_budget(current_user.user_id, budget_id)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    updated_data = {k:v for k,v in budget.dict().items() if v is not None}
+    db.update_budget(current_user.user_id, budget_id, updated_data)
+    budgets.check_alert(db, {**existing, **updated_data})
+    return db.get_budget(current_user.user_id, budget_id)
+
+@api_router.delete("/budgets/{budget_id}")
+async def delete_budget(budget_id: str, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    db.delete_budget(current_user.user_id, budget_id)
+    return {"detail": "Budget deleted"}
+
+# ---------------- STATEMENTS ----------------
+# Closed months are served from the stored statement, which never changes, so
+# clients and proxies may keep it forever. The current month is computed live.
+IMMUTABLE_CACHE = "private, max-age=31536000, immutable"
+# Archiving moves the rows a statement is built from, so only stored ones remain
+ARCHIVED_STATEMENT = "No statement was stored for this month before the account was archived"
+
+@api_router.get("/statements", response_model=List[Statement])
+async def get_statements(account_id: Optional[str] = None, current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    return [statements.load_statement(row) for row in db.list_statements(current_user.user_id, account_id)]
+
+@api_router.get("/statements/{account_id}/{month}", response_model=Statement)
+async def get_statement(
+    account_id: str,
+    response: Response,
+    month: str = Path(pattern=MONTH_PATTERN),
+    if_none_match: Optional[str] = Header(None),
+    current_user: TokenData = Depends(get_current_user),
+    db: Storage = Depends(get_storage),
+):
+    account = db.get_account(current_user.user_id, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if month > budgets.current_month():
+        raise HTTPException(status_code=404, detail="Statement not available yet")
+    stored = db.get_statement(current_user.user_id, account_id, month) if statements.is_closed(month) else None
+    if stored is None and not statements.can_build(account):
+        raise HTTPException(status_code=404, detail=ARCHIVED_STATEMENT)
+    if not statements.is_closed(month):
+        return await run_in_threadpool(statements.build_statement, db, current_user.user_id, account, month)
+
+    if stored is None:
+        # Closed before the month-close job reached this account; store it now
+        statements.save_statement(db, await run_in_threadpool(statements.build_statement, db, current_user.user_id, account, month))
+        stored = db.get_statement(current_user.user_id, account_id, month)
+    etag = f'"{stored["id"]}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE}
+    # Compressed responses carry the weak form of the tag
+    if if_none_match in (etag, f"W/{etag}"):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return statements.load_statement(stored)
+
+@api_router.get("/statements/{account_id}/{month}/export")
+async def export_statement(
+    account_id: str,
+    month: str = Path(pattern=MONTH_PATTERN),
+    current_user: TokenData = Depends(get_current_user),
+    db: Storage = Depends(get_storage),
+):
+    # Regenerated from the account's transactions as NDJSON: a header line, one
+    # line per transaction, then the summary. Rows are paged through, never
+    # held in memory all at once.
+    account = db.get_account(current_user.user_id, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if not statements.can_build(account):
+        raise HTTPException(status_code=404, detail=ARCHIVED_STATEMENT)
+    lines = (
+        json.dumps({"record": kind, **item}, default=str) + "\n"
+        for kind, item in statements.statement_lines(db, current_user.user_id, account, month)
+    )
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="statement-{account_id}-{month}.ndjson"'},
+    )
+
 # ---------------- AI / INSIGHTS ----------------
 @api_router.get("/insights/prediction")
-async def prediction(current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("transactions").select("*").eq("user_id", current_user.user_id).execute()
-    data = result.data if result.data else []
+async def prediction(current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    import numpy as np
+    data = db.list_transactions(current_user.user_id)
     prediction = np.sum([t["amount"] for t in data]) * 1.05 if data else 0
     return {"prediction": prediction}
 
 @api_router.get("/insights/score")
-async def score(current_user: TokenData = Depends(get_current_user)):
-    result = supabase.supabase.table("transactions").select("*").eq("user_id", current_user.user_id).execute()
-    total = np.sum([t["amount"] for t in result.data]) if result.data else 0
+async def score(current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    import numpy as np
+    data = db.list_transactions(current_user.user_id)
+    total = np.sum([t["amount"] for t in data]) if data else 0
     score = min(100, total / 1000 * 100)
     return {"score": score}
 
 @api_router.get("/insights/tips")
-async def get_tips(current_user: TokenData = Depends(get_current_user)):
+async def get_tips(current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
     # Fetch user's transactions
-    transactions = supabase.supabase.table("transactions").select("*").eq("user_id", current_user.user_id).execute()
-    data = transactions.data if transactions.data else []
+    data = db.list_transactions(current_user.user_id)
     
     # Generate tips based on transaction patterns
     tips = []
@@ -303,9 +621,17 @@ async def get_tips(current_user: TokenData = Depends(get_current_user)):
             elif savings_rate > 50:
                 tips.append("Great job on your savings! Consider investing some of your savings for better returns.")
         
+        # Recurring payments found by the detector
+        subscriptions = [s for s in db.list_recurring_series(current_user.user_id) if s["type"] == "expense"]
+        if subscriptions:
+            monthly_total = sum(recurring.monthly_amount(s) for s in subscriptions)
+            names = ", ".join(s["description"] for s in subscriptions[:3])
+            tips.append(f"You have {len(subscriptions)} recurring payments costing about ${monthly_total:,.2f} a month ({names}). Review them for subscriptions you can cancel.")
+
         # Basic tips
         if len(data) >= 5:
-            tips.append("Track your recurring expenses and look for potential subscriptions you can cancel.")
+            if not subscriptions:
+                tips.append("Track your recurring expenses and look for potential subscriptions you can cancel.")
             tips.append("Set up automatic savings transfers to meet your financial goals faster.")
     
     # If no data or few transactions
@@ -318,6 +644,59 @@ async def get_tips(current_user: TokenData = Depends(get_current_user)):
     
     return {"tips": tips}
 
+@api_router.get("/insights/recurring")
+async def get_recurring(current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    return db.list_recurring_series(current_user.user_id)
+
+@api_router.post("/insights/recurring/detect")
+async def detect_recurring(current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    return await run_in_threadpool(recurring.detect_for_user, db, current_user.user_id)
+
+# ---------------- LIVE UPDATES ----------------
+@api_router.post("/events/token")
+async def event_stream_token(current_user: TokenData = Depends(get_current_user)):
+    return {"token": create_stream_token(current_user.user_id), "expires_in": settings.STREAM_TOKEN_SECONDS}
+
+@api_router.get("/events/stream")
+async def event_stream(
+    last_event_id: Optional[str] = Header(None),
+    resume_from: Optional[str] = Query(None, alias="last_event_id"),
+    current_user: TokenData = Depends(get_stream_user),
+    db: Storage = Depends(get_storage),
+):
+    # Server-sent events: account, transaction and goal changes as they are
+    # written. EventSource reconnects with Last-Event-ID and gets what it missed;
+    # a new EventSource (e.g. with a fresh stream token) passes ?last_event_id=.
+    last_event_id = last_event_id or resume_from
+    try:
+        after = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return StreamingResponse(
+        broker.stream(db, current_user.user_id, after, settings.EVENT_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ---------------- DASHBOARD ----------------
+@api_router.get("/dashboard/summary")
+async def dashboard_summary(current_user: TokenData = Depends(get_current_user), db: Storage = Depends(get_storage)):
+    counts = db.count_user_rows(current_user.user_id)
+    return {
+        "accounts_count": counts["accounts"],
+        "transactions_count": counts["transactions"],
+        "goals_count": counts["goals"]
+    }
+
 # ---------------- INIT DATABASE ----------------
 async def init_database():
+    db = init_storage()
+    jobs.register_jobs()
+    await scheduler.start(db)
+    await broker.start(db)
     return True
+
+async def close_database():
+    await broker.stop()
+    await scheduler.stop()
+    close_storage()
@@ -0,0 +1,197 @@
+import asyncio
+import zlib
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.base import BaseHTTPMiddleware
+
+# Security Headers Middleware
+class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        # Add security headers (routes that opt into caching keep their Cache-Control)
+        response.headers.setdefault("Cache-Control", "no-store, no-cache, must-revalidate, proxy-revalidate, max-age=0")
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        return response
+
+# Request accounting for the per-worker health report
+class WorkerStatsMiddleware:
+    def __init__(self, app, state):
+        self.app = app
+        self.state = state
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.state.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.state.in_flight -= 1
+            self.state.requests_served += 1
+
+# ---------------- COMPRESSION ----------------
+# gzip (or brotli, when the optional ``brotli`` package is installed and the
+# client accepts it) for text and JSON responses.
+#
+# - Bodies smaller than ``minimum_size`` go out as they are; compressing them
+#   costs CPU and saves almost nothing.
+# - Streaming bodies are held only until ``minimum_size`` bytes have arrived,
+#   then compressed chunk by chunk, so memory stays bounded.
+# - Server-sent events are never compressed: the compressor would hold
+#   events back until its buffer fills.
+# - On transaction lists gzip level 5 output is about 1.5% larger than
+#   level 6. The CPU difference between them is within run-to-run noise;
+#   run benchmarks/bench_compression.py on the target host to tune the
+#   level. Large bodies are compressed in a thread so they do not stall the
+#   event loop.
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+OFFLOAD_SIZE = 256 * 1024
+
+def _load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+def _accepted_encodings(header: str) -> dict:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+class _Gzip:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        return self._zlib.flush()
+
+class _Brotli:
+    encoding = "br"
+
+    def __init__(self, brotli, quality: int):
+        self._brotli = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data)
+
+    def finish(self) -> bytes:
+        return self._brotli.finish()
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 5, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli = _load_brotli()
+
+    def _compressor(self, scope):
+        header = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), "")
+        accepted = _accepted_encodings(header)
+        if self.brotli is not None and accepted.get("br", 0) > 0:
+            return _Brotli(self.brotli, self.brotli_quality)
+        if accepted.get("gzip", 0) > 0:
+            return _Gzip(self.gzip_level)
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+        compressor = self._compressor(scope)
+        if compressor is None:
+            return await self.app(scope, receive, send)
+
+        async def compress(data: bytes) -> bytes:
+            if len(data) >= OFFLOAD_SIZE:
+                return await asyncio.to_thread(compressor.compress, data)
+            return compressor.compress(data)
+
+        start = None
+        pending = []
+        pending_size = 0
+        compressing = False
+
+        async def send_compressed_start(length):
+            headers = MutableHeaders(raw=start["headers"])
+            headers["Content-Encoding"] = compressor.encoding
+            if length is not None:
+                headers["Content-Length"] = str(length)
+            elif "content-length" in headers:
+                del headers["Content-Length"]
+            # A compressed body is a different representation of the resource
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await send(start)
+
+        async def wrapped_send(message):
+            nonlocal start, pending_size, compressing
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or content_type.startswith(UNCOMPRESSED_TYPES)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressing:
+                chunk = await compress(body)
+                if not more_body:
+                    chunk += compressor.finish()
+                if chunk or not more_body:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            pending.append(body)
+            pending_size += len(body)
+            if pending_size < self.minimum_size:
+                if more_body:
+                    return
+                # Small body: send it untouched
+                buffered = b"".join(pending)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Length"] = str(len(buffered))
+                await send(start)
+                await send({"type": "http.response.body", "body": buffered})
+                return
+
+            compressing = True
+            chunk = await compress(b"".join(pending))
+            pending.clear()
+            if not more_body:
+                chunk += compressor.finish()
+            await send_compressed_start(None if more_body else len(chunk))
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, wrapped_send)
@@ -0,0 +1,59 @@
+import os
+import time
+
+# ---------------- WORKER STATE ----------------
+# Everything in this module is per worker process. With preload_app the module
+# is imported once in the gunicorn master and then forked, so reset() must run
+# in each worker (the lifespan does this) to pick up the worker's own pid.
+class WorkerState:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self.requests_served = 0
+        self.in_flight = 0
+        self.draining = False
+        self._drain_callbacks = []
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": self.pid,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "requests_served": self.requests_served,
+            "in_flight": self.in_flight,
+            "draining": self.draining,
+        }
+
+    def on_drain(self, callback):
+        """Call ``callback()`` when the worker starts draining (e.g. to end long-lived streams)."""
+        self._drain_callbacks.append(callback)
+
+    def begin_draining(self):
+        if self.draining:
+            return
+        self.draining = True
+        for callback in self._drain_callbacks:
+            callback()
+
+worker_state = WorkerState()
+
+# ---------------- DRAIN HOOK ----------------
+# The lifespan shutdown only runs once uvicorn has closed every connection,
+# which is too late for /health to report the drain. Wrapping uvicorn's exit
+# handler marks the worker draining the moment SIGTERM/SIGINT arrives, both
+# under gunicorn (UvicornWorker) and under plain uvicorn.
+def install_drain_hook(state: WorkerState = worker_state):
+    from uvicorn.server import Server
+
+    original = Server.handle_exit
+    if getattr(original, "drains", False):
+        return
+
+    def handle_exit(self, sig, frame):
+        state.begin_draining()
+        original(self, sig, frame)
+
+    handle_exit.drains = True
+    Server.handle_exit = handle_exit
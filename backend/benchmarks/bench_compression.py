@@ -0,0 +1,118 @@
+"""Response compression benchmark for the BudgetIQ API.
+
+Runs realistic transaction payloads through ``CompressionMiddleware`` and
+reports, per encoding:
+
+* bytes on the wire and the compression ratio
+* CPU time spent per response (including the middleware's own overhead)
+
+Payloads are ``GET /api/transactions`` style JSON lists and a statement
+export streamed as NDJSON, one transaction per chunk.
+
+Run from the backend directory::
+
+    python benchmarks/bench_compression.py --runs 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.middleware import CompressionMiddleware  # noqa: E402
+
+CATEGORIES = ["food", "transport", "shopping", "bills", "entertainment", "health", "salary", "rent"]
+MERCHANTS = ["Swiggy", "Uber", "Amazon", "Netflix.com", "BigBasket", "Airtel", "Zomato", "Apollo Pharmacy", "Landlord"]
+
+def transactions(count: int) -> list:
+    rng = random.Random(count)
+    user_id, account_id = str(uuid.uuid4()), str(uuid.uuid4())
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": user_id,
+            "account_id": account_id,
+            "type": "income" if rng.random() < 0.1 else "expense",
+            "amount": round(rng.uniform(20, 5000), 2),
+            "category": rng.choice(CATEGORIES),
+            "description": f"{rng.choice(MERCHANTS)} #{rng.randint(1000, 9999)}",
+            "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "created_at": f"2025-01-01T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00+00:00",
+        }
+        for _ in range(count)
+    ]
+
+def json_app(body: bytes):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+def ndjson_app(chunks: list):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/x-ndjson")]})
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    return app
+
+async def serve(app, accept_encoding: str) -> int:
+    sent = 0
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    await app(scope, None, send)
+    return sent
+
+def measure(app, accept_encoding: str, runs: int):
+    wire = asyncio.run(serve(app, accept_encoding))
+    samples = []
+    for _ in range(runs):
+        began = time.process_time()
+        asyncio.run(serve(app, accept_encoding))
+        samples.append(time.process_time() - began)
+    return wire, statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    args = parser.parse_args()
+
+    encodings = [("identity", "identity", {})]
+    encodings += [(f"gzip-{level}", "gzip", {"gzip_level": level}) for level in (1, 5, 6, 9)]
+    if CompressionMiddleware(None).brotli is not None:
+        encodings += [("br-4", "br", {"brotli_quality": 4}), ("br-9", "br", {"brotli_quality": 9})]
+    else:
+        print("(brotli not installed; pip install brotli to include it)\n")
+
+    print(f"{'payload':<22} {'encoding':<9} {'bytes':>11} {'ratio':>7} {'cpu/resp':>10}")
+    for count in args.sizes:
+        rows = transactions(count)
+        payloads = [
+            (f"json list x{count}", lambda: json_app(json.dumps(rows).encode())),
+            (f"ndjson stream x{count}", lambda: ndjson_app([(json.dumps(r) + "\n").encode() for r in rows])),
+        ]
+        for label, make_app in payloads:
+            baseline = None
+            for name, accept, options in encodings:
+                wire, cpu = measure(CompressionMiddleware(make_app(), **options), accept, args.runs)
+                baseline = baseline or wire
+                print(f"{label:<22} {name:<9} {wire:>11,} {baseline / wire:>6.1f}x {cpu * 1000:>8.2f}ms")
+        print()
+
+if __name__ == "__main__":
+    main()
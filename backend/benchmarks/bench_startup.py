@@ -0,0 +1,85 @@
+"""Cold start benchmark for the BudgetIQ API.
+
+Measures, in fresh interpreters so nothing is cached in-process:
+
+* import time of ``server`` (what every worker pays before it can serve)
+* time-to-first-response: from spawning uvicorn until ``/health`` answers
+
+The server runs against a throwaway SQLite database, so no Supabase
+credentials are needed and the storage backend does not skew the numbers.
+
+Run from the backend directory::
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import server; "
+    "print(time.perf_counter() - t)"
+)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def measure_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+def measure_first_response(timeout: float = 30.0) -> float:
+    port = free_port()
+    workdir = tempfile.TemporaryDirectory()
+    env = {**os.environ, "STORAGE_BACKEND": "sqlite", "SQLITE_PATH": str(Path(workdir.name) / "bench.db")}
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/health"
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(url, timeout=0.5).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise TimeoutError(f"server did not answer {url} within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+        workdir.cleanup()
+
+def report(name: str, samples: list) -> None:
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<24} median {statistics.median(ms):8.1f} ms   "
+          f"min {min(ms):8.1f} ms   max {max(ms):8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    report("import server", [measure_import() for _ in range(args.runs)])
+    report("time to first response", [measure_first_response() for _ in range(args.runs)])
+
+if __name__ == "__main__":
+    main()
@@ -5,20 +5,57 @@ import os
 
 load_dotenv()
 
+def default_workers() -> int:
+    # One async worker per usable core; each worker runs its own event loop
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
 class Settings(BaseSettings):
     # App
     APP_NAME: str = "BudgetIQ API"
     APP_VERSION: str = "1.0.0"
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", 8000))
+    ENV: str = os.getenv("ENV", "development")
+
+    # Production serving (see gunicorn.conf.py)
+    WORKERS: int = int(os.getenv("WORKERS", default_workers()))
+    PRELOAD_APP: bool = os.getenv("PRELOAD_APP", "true").lower() == "true"
+    GRACEFUL_TIMEOUT: int = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+    KEEPALIVE: int = int(os.getenv("KEEPALIVE", 5))
 
     # Security
     JWT_SECRET: str = os.getenv("JWT_SECRET", "your-secret-key")
     JWT_ALGORITHM: str = "HS256"
 
+    # Storage backend: "supabase" or "sqlite" (embedded, single node)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "supabase")
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "budgetiq.db")
+
+    # Background jobs (per worker)
+    JOB_CONCURRENCY: int = int(os.getenv("JOB_CONCURRENCY", 4))
+    JOB_DEBOUNCE_SECONDS: float = float(os.getenv("JOB_DEBOUNCE_SECONDS", 5))
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", 600))
+    JOB_RESCAN_SECONDS: float = float(os.getenv("JOB_RESCAN_SECONDS", 60))
+
+    # Response compression (brotli is used when the optional package is installed)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    GZIP_LEVEL: int = int(os.getenv("GZIP_LEVEL", 5))
+    BROTLI_QUALITY: int = int(os.getenv("BROTLI_QUALITY", 4))
+
+    # Change events (SSE)
+    EVENT_POLL_SECONDS: float = float(os.getenv("EVENT_POLL_SECONDS", 1))
+    EVENT_KEEPALIVE_SECONDS: float = float(os.getenv("EVENT_KEEPALIVE_SECONDS", 15))
+    EVENT_RETENTION_SECONDS: int = int(os.getenv("EVENT_RETENTION_SECONDS", 3600))
+    STREAM_TOKEN_SECONDS: int = int(os.getenv("STREAM_TOKEN_SECONDS", 60))
+
     # Supabase
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
+    # Direct Postgres connection string, only used by `python -m migrations`
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "")
 
     # Arcjet
     ARCJET_API_KEY: str = os.getenv("ARCJET_API_KEY", "")
@@ -26,6 +63,7 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "http://localhost:3000")
 
+# Cached per process; every worker reads the same environment
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
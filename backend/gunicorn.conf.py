@@ -0,0 +1,44 @@
+# Production serving config: gunicorn -c gunicorn.conf.py server:app
+#
+# gunicorn prefork master + uvicorn async workers. The master imports the app
+# (preload_app) and the heavy libraries once, then forks WORKERS processes that
+# share those pages copy-on-write. Each worker runs the app lifespan itself, so
+# per-process resources (Supabase client, worker stats) are never shared.
+#
+# SIGTERM: stop accepting, let in-flight requests finish for GRACEFUL_TIMEOUT.
+#          /health answers 503 "draining" from the moment the signal arrives.
+# SIGHUP:  graceful reload, new workers are started before old ones drain.
+#          With PRELOAD_APP=true code changes need a full restart.
+import importlib
+import logging
+from config import settings
+
+bind = f"{settings.HOST}:{settings.PORT}"
+workers = settings.WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = settings.PRELOAD_APP
+graceful_timeout = settings.GRACEFUL_TIMEOUT
+timeout = settings.GRACEFUL_TIMEOUT * 2
+keepalive = settings.KEEPALIVE
+accesslog = "-"
+loglevel = "info"
+
+# Imported lazily by the app; load them in the master so no worker pays for it
+PRELOAD_MODULES = ("numpy", "passlib.context", "supabase")
+
+logger = logging.getLogger("gunicorn.error")
+
+def on_starting(server):
+    if not preload_app:
+        return
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as exc:
+            logger.warning("Could not preload %s: %s", name, exc)
+
+def post_fork(server, worker):
+    logger.info("Worker %s spawned", worker.pid)
+
+def worker_exit(server, worker):
+    logger.info("Worker %s exited", worker.pid)
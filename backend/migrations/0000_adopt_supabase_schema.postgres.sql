@@ -0,0 +1,55 @@
+-- Adopt a Supabase database provisioned by SUPABASE_SETUP_INSTRUCTIONS.md.
+-- That script predates migrations: ids are UUID, dates DATE, timestamps
+-- TIMESTAMPTZ and amounts DECIMAL, while the app, SQLite and every later
+-- migration use the TEXT / DOUBLE PRECISION layout of 0001. 0001 creates
+-- its tables only if they do not exist, so this runs first and converts
+-- the four hand-provisioned tables in place. Dates keep their YYYY-MM-DD
+-- spelling and timestamps become ISO 8601 UTC strings. The foreign keys
+-- between the UUID columns go too; the 0001 layout has none. On a fresh or
+-- already converted database nothing matches and this does nothing.
+
+DO $$
+DECLARE
+    fk record;
+    tbl record;
+BEGIN
+    FOR fk IN
+        SELECT c.conrelid::regclass AS table_name, c.conname
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        WHERE c.contype = 'f'
+          AND c.connamespace = current_schema()::regnamespace
+          AND c.conrelid::regclass::text IN ('users', 'accounts', 'transactions', 'goals')
+          AND a.atttypid = 'uuid'::regtype
+    LOOP
+        EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', fk.table_name, fk.conname);
+    END LOOP;
+
+    -- One ALTER per table, so each table is rewritten once
+    FOR tbl IN
+        SELECT table_name, string_agg(
+            CASE
+                WHEN data_type IN ('uuid', 'timestamp with time zone')
+                    THEN format('ALTER COLUMN %I DROP DEFAULT, ', column_name)
+                ELSE ''
+            END ||
+            format('ALTER COLUMN %I TYPE %s USING %s', column_name,
+                CASE WHEN data_type = 'numeric' THEN 'DOUBLE PRECISION' ELSE 'TEXT' END,
+                CASE data_type
+                    WHEN 'date' THEN format('to_char(%I, ''YYYY-MM-DD'')', column_name)
+                    WHEN 'timestamp with time zone'
+                        THEN format('to_char(%I AT TIME ZONE ''utc'', ''YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'')', column_name)
+                    WHEN 'numeric' THEN format('%I::double precision', column_name)
+                    ELSE format('%I::text', column_name)
+                END),
+            ', ') AS changes
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name IN ('users', 'accounts', 'transactions', 'goals')
+          AND data_type IN ('uuid', 'date', 'timestamp with time zone', 'numeric', 'character varying')
+        GROUP BY table_name
+    LOOP
+        EXECUTE format('ALTER TABLE %I %s', tbl.table_name, tbl.changes);
+    END LOOP;
+END
+$$;
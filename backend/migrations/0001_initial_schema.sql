@@ -0,0 +1,53 @@
+-- BudgetIQ initial schema.
+-- Written in the SQL subset shared by PostgreSQL (Supabase) and SQLite so the
+-- same file provisions both storage backends. Every API query filters on
+-- user_id, so each table is indexed for that access path.
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+-- login / signup: WHERE email = ?
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    balance DOUBLE PRECISION NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL
+);
+-- GET /accounts: WHERE user_id = ?
+CREATE INDEX IF NOT EXISTS idx_accounts_user ON accounts (user_id);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    date TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+-- GET /transactions: WHERE user_id = ? ORDER BY date DESC, id (keyset pages)
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions (user_id, date DESC, id);
+-- DELETE /accounts/{id}: does any transaction reference the account?
+CREATE INDEX IF NOT EXISTS idx_transactions_account ON transactions (account_id);
+
+CREATE TABLE IF NOT EXISTS goals (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    target_amount DOUBLE PRECISION NOT NULL,
+    current_amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+    deadline TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+-- GET /goals: WHERE user_id = ?
+CREATE INDEX IF NOT EXISTS idx_goals_user ON goals (user_id);
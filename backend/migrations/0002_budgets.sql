@@ -0,0 +1,31 @@
+-- Per-category monthly budgets with incrementally maintained spend.
+-- spent is adjusted by every transaction write, so budget status is a
+-- single-row read and never re-aggregates transactions.
+
+CREATE TABLE IF NOT EXISTS budgets (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    month TEXT NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,
+    spent DOUBLE PRECISION NOT NULL DEFAULT 0,
+    alert_threshold DOUBLE PRECISION NOT NULL DEFAULT 0.8,
+    alert_level TEXT,
+    created_at TEXT NOT NULL
+);
+-- GET /budgets?month=, and the spend update on every transaction write
+CREATE UNIQUE INDEX IF NOT EXISTS idx_budgets_user_month_category ON budgets (user_id, month, category);
+
+CREATE TABLE IF NOT EXISTS budget_alerts (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    budget_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    month TEXT NOT NULL,
+    level TEXT NOT NULL,
+    spent DOUBLE PRECISION NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,
+    created_at TEXT NOT NULL
+);
+-- GET /budgets/alerts: newest first
+CREATE INDEX IF NOT EXISTS idx_budget_alerts_user_created ON budget_alerts (user_id, created_at DESC);
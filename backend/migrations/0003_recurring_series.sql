@@ -0,0 +1,23 @@
+-- Recurring transactions (subscriptions, salary, rent) found by the detector.
+-- series_key identifies a group of transactions (type, normalised
+-- description, amount bucket) so new transactions can extend a series
+-- without re-running detection.
+
+CREATE TABLE IF NOT EXISTS recurring_series (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    series_key TEXT NOT NULL,
+    type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,
+    period TEXT NOT NULL,
+    interval_days DOUBLE PRECISION NOT NULL,
+    occurrences INTEGER NOT NULL,
+    first_date TEXT NOT NULL,
+    last_date TEXT NOT NULL,
+    next_expected_date TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+-- GET /insights/recurring, and the lookup made by every new transaction
+CREATE UNIQUE INDEX IF NOT EXISTS idx_recurring_series_user_key ON recurring_series (user_id, series_key);
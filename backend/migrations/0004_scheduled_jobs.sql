@@ -0,0 +1,15 @@
+-- Pending background jobs, so debounced work survives a restart.
+-- A worker runs a job only after claiming its row: it moves run_at from the
+-- value it scheduled to the end of a lease. The row is deleted once the job
+-- succeeds. A later re-schedule (from any worker) changes run_at, so
+-- debouncing works across workers and only one worker wins each claim. A
+-- row whose lease has run out (its worker died, or the job raised) is due
+-- again and is picked up by the next worker to scan the table.
+
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    name TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (name, job_key)
+);
@@ -0,0 +1,41 @@
+-- Full-text search over transaction descriptions and categories.
+-- A generated tsvector column with a (user_id, search_vector) GIN index
+-- (btree_gin) answers "this user's rows matching these terms" from one
+-- index. search_transactions() ranks with ts_rank and pages by
+-- (rank, id) keyset. It is exposed to the API through PostgREST RPC.
+
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(description, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(category, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_search ON transactions USING GIN (user_id, search_vector);
+
+-- rank is negated ts_rank so that, as with SQLite's bm25(), lower is better
+CREATE OR REPLACE FUNCTION search_transactions(
+    p_user_id TEXT,
+    p_query TEXT,
+    p_limit INTEGER,
+    p_after_rank DOUBLE PRECISION DEFAULT NULL,
+    p_after_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    id TEXT, user_id TEXT, account_id TEXT, type TEXT, amount DOUBLE PRECISION,
+    category TEXT, description TEXT, date TEXT, created_at TEXT, rank DOUBLE PRECISION
+)
+LANGUAGE sql STABLE AS $$
+    SELECT * FROM (
+        SELECT t.id, t.user_id, t.account_id, t.type, t.amount, t.category, t.description, t.date, t.created_at,
+               -ts_rank(t.search_vector, to_tsquery('simple', p_query))::DOUBLE PRECISION AS rank
+        FROM transactions t
+        WHERE t.user_id = p_user_id AND t.search_vector @@ to_tsquery('simple', p_query)
+    ) matches
+    WHERE p_after_rank IS NULL
+       OR matches.rank > p_after_rank
+       OR (matches.rank = p_after_rank AND matches.id > p_after_id)
+    ORDER BY matches.rank, matches.id
+    LIMIT p_limit
+$$;
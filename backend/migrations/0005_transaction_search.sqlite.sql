@@ -0,0 +1,33 @@
+-- Full-text index over transaction descriptions and categories (FTS5).
+-- External-content table: the text lives in transactions, the index is kept
+-- in sync by triggers. prefix='2 3' keeps short prefix queries ("ne*",
+-- "net*") on prebuilt index entries. Matches are narrowed to the user by
+-- joining back to transactions. Putting user_id in the index instead makes
+-- every search walk the user's whole posting list, which is slower on long
+-- histories.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+    description, category,
+    content='transactions', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO transactions_fts (rowid, description, category)
+    VALUES (new.rowid, new.description, new.category);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+    INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+    VALUES ('delete', old.rowid, old.description, old.category);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description, category ON transactions BEGIN
+    INSERT INTO transactions_fts (transactions_fts, rowid, description, category)
+    VALUES ('delete', old.rowid, old.description, old.category);
+    INSERT INTO transactions_fts (rowid, description, category)
+    VALUES (new.rowid, new.description, new.category);
+END;
+
+-- Index rows written before this migration
+INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild');
@@ -0,0 +1,17 @@
+-- Change events pushed to clients over /api/events/stream.
+-- seq is the SSE event id: workers relay each other's events by reading
+-- past the last seq they have seen, and a reconnecting client resumes from
+-- its Last-Event-ID. Rows are pruned by a periodic job.
+
+CREATE TABLE IF NOT EXISTS user_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+-- Last-Event-ID replay for one user
+CREATE INDEX IF NOT EXISTS idx_user_events_user_seq ON user_events (user_id, seq);
+-- Retention pruning
+CREATE INDEX IF NOT EXISTS idx_user_events_created ON user_events (created_at);
@@ -0,0 +1,28 @@
+-- Monthly account statements, written once when the month closes.
+-- A stored statement is never rewritten, so it can be cached by clients
+-- forever. categories holds the per-category breakdown as JSON text.
+
+CREATE TABLE IF NOT EXISTS statements (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    opening_balance DOUBLE PRECISION NOT NULL,
+    closing_balance DOUBLE PRECISION NOT NULL,
+    total_income DOUBLE PRECISION NOT NULL,
+    total_expense DOUBLE PRECISION NOT NULL,
+    transaction_count INTEGER NOT NULL,
+    categories TEXT NOT NULL,
+    generated_at TEXT NOT NULL
+);
+-- One statement per account and month; also the month-close job's
+-- "which of these accounts already have one" lookup
+CREATE UNIQUE INDEX IF NOT EXISTS idx_statements_account_month ON statements (account_id, month);
+-- GET /statements: newest first
+CREATE INDEX IF NOT EXISTS idx_statements_user_month ON statements (user_id, month DESC);
+
+-- Statement generation walks one account's month in (date, id) order.
+-- It also answers the "does this account have transactions" check, so it
+-- replaces the single-column index.
+CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions (account_id, date, id);
+DROP INDEX IF EXISTS idx_transactions_account;
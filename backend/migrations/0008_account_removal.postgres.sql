@@ -0,0 +1,79 @@
+-- Account archival and cascade delete.
+-- Both modes run as a background job that removes the account's
+-- transactions in chunks. Archiving moves them to archived_transactions and
+-- folds their net amount into the account balance, so the balance plus
+-- the account's remaining transactions stays the same. account_operations records the progress of each run.
+-- remove_account_transactions() removes one chunk atomically; the API calls
+-- it through PostgREST RPC.
+
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'active';
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS archived_at TEXT;
+
+CREATE TABLE IF NOT EXISTS archived_transactions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    date TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_archived_transactions_account_date ON archived_transactions (account_id, date, id);
+
+CREATE TABLE IF NOT EXISTS account_operations (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    closing_balance DOUBLE PRECISION,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+-- "is this account already being archived or deleted?"
+CREATE INDEX IF NOT EXISTS idx_account_operations_account ON account_operations (account_id, created_at);
+
+CREATE OR REPLACE FUNCTION remove_account_transactions(
+    p_user_id TEXT,
+    p_account_id TEXT,
+    p_limit INTEGER,
+    p_archive BOOLEAN
+)
+RETURNS TABLE (
+    id TEXT, user_id TEXT, account_id TEXT, type TEXT, amount DOUBLE PRECISION,
+    category TEXT, description TEXT, date TEXT, created_at TEXT
+)
+LANGUAGE sql AS $$
+    WITH chunk AS (
+        SELECT t.id FROM transactions t
+        WHERE t.account_id = p_account_id AND t.user_id = p_user_id
+        ORDER BY t.date, t.id
+        LIMIT p_limit
+        FOR UPDATE
+    ),
+    removed AS (
+        DELETE FROM transactions t USING chunk WHERE t.id = chunk.id
+        RETURNING t.id, t.user_id, t.account_id, t.type, t.amount, t.category, t.description, t.date, t.created_at
+    ),
+    archived AS (
+        INSERT INTO archived_transactions (id, user_id, account_id, type, amount, category, description, date, created_at, archived_at)
+        SELECT r.*, to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"')
+        FROM removed r WHERE p_archive
+        ON CONFLICT (id) DO NOTHING
+    ),
+    folded AS (
+        UPDATE accounts a
+        SET balance = round((a.balance + (
+            SELECT COALESCE(SUM(CASE WHEN r.type = 'income' THEN r.amount WHEN r.type = 'expense' THEN -r.amount ELSE 0 END), 0)
+            FROM removed r
+        ))::numeric, 2)
+        WHERE p_archive AND a.id = p_account_id AND a.user_id = p_user_id
+    )
+    SELECT * FROM removed
+$$;
@@ -0,0 +1,38 @@
+-- Account archival and cascade delete.
+-- Both modes run as a background job that removes the account's
+-- transactions in chunks. Archiving moves them to archived_transactions and
+-- folds their net amount into the account balance, so the balance plus
+-- the account's remaining transactions stays the same. account_operations records the progress of each run.
+
+ALTER TABLE accounts ADD COLUMN status TEXT NOT NULL DEFAULT 'active';
+ALTER TABLE accounts ADD COLUMN archived_at TEXT;
+
+CREATE TABLE IF NOT EXISTS archived_transactions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    date TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_archived_transactions_account_date ON archived_transactions (account_id, date, id);
+
+CREATE TABLE IF NOT EXISTS account_operations (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    closing_balance DOUBLE PRECISION,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+-- "is this account already being archived or deleted?"
+CREATE INDEX IF NOT EXISTS idx_account_operations_account ON account_operations (account_id, created_at);
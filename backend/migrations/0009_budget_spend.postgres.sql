@@ -0,0 +1,19 @@
+-- Atomic budget spend updates for Supabase.
+-- PostgREST cannot express "spent = spent + x", so a read followed by a
+-- write lost one of two concurrent updates. add_budget_spend() applies the
+-- delta in a single UPDATE ... RETURNING; the API calls it through
+-- PostgREST RPC.
+
+CREATE OR REPLACE FUNCTION add_budget_spend(
+    p_user_id TEXT,
+    p_category TEXT,
+    p_month TEXT,
+    p_delta DOUBLE PRECISION
+)
+RETURNS SETOF budgets
+LANGUAGE sql AS $$
+    UPDATE budgets
+    SET spent = round((spent + p_delta)::numeric, 2)
+    WHERE user_id = p_user_id AND month = p_month AND category = p_category
+    RETURNING *
+$$;
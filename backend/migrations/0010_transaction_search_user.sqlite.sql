@@ -0,0 +1,39 @@
+-- Scope full-text search to one user inside the index.
+-- 0005 matched every user's rows and filtered by user_id afterwards, and
+-- ranked all of them with bm25(), so a common prefix cost time in
+-- proportion to the whole table. user_id is now an indexed column and the
+-- query matches user_id:"..." AND the terms, so only the user's postings
+-- are read. Results are read in rowid order straight from the index (see
+-- SQLiteStorage.search_transactions), which needs no ranking pass. Prefixes
+-- of up to 6 characters are prebuilt so typing a longer word does not merge
+-- the doclists of every term that starts with it.
+
+DROP TRIGGER IF EXISTS transactions_fts_insert;
+DROP TRIGGER IF EXISTS transactions_fts_delete;
+DROP TRIGGER IF EXISTS transactions_fts_update;
+DROP TABLE IF EXISTS transactions_fts;
+
+CREATE VIRTUAL TABLE transactions_fts USING fts5(
+    user_id, description, category,
+    content='transactions', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6'
+);
+
+CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO transactions_fts (rowid, user_id, description, category)
+    VALUES (new.rowid, new.user_id, new.description, new.category);
+END;
+
+CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+    INSERT INTO transactions_fts (transactions_fts, rowid, user_id, description, category)
+    VALUES ('delete', old.rowid, old.user_id, old.description, old.category);
+END;
+
+CREATE TRIGGER transactions_fts_update AFTER UPDATE OF user_id, description, category ON transactions BEGIN
+    INSERT INTO transactions_fts (transactions_fts, rowid, user_id, description, category)
+    VALUES ('delete', old.rowid, old.user_id, old.description, old.category);
+    INSERT INTO transactions_fts (rowid, user_id, description, category)
+    VALUES (new.rowid, new.user_id, new.description, new.category);
+END;
+
+INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild');
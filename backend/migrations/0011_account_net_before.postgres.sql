@@ -0,0 +1,17 @@
+-- Opening balances for statements on Supabase.
+-- Summing an account's history through PostgREST downloaded every earlier
+-- row and was cut off at the response row limit. account_net_before()
+-- aggregates in the database over idx_transactions_account_date and returns
+-- a single number; the API calls it through PostgREST RPC.
+
+CREATE OR REPLACE FUNCTION account_net_before(
+    p_user_id TEXT,
+    p_account_id TEXT,
+    p_date TEXT
+)
+RETURNS DOUBLE PRECISION
+LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(SUM(CASE WHEN type = 'income' THEN amount WHEN type = 'expense' THEN -amount ELSE 0 END), 0)
+    FROM transactions
+    WHERE account_id = p_account_id AND user_id = p_user_id AND date < p_date
+$$;
@@ -0,0 +1,29 @@
+-- Per-user change version.
+-- version is the seq of the user's latest change event. user_events rows
+-- are pruned after EVENT_RETENTION_SECONDS, so the latest stored seq can
+-- fall back to an older value; this row is kept and only ever moves
+-- forward, which makes it safe as a cache key. A trigger keeps it current.
+
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id TEXT PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION bump_user_version()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO user_versions (user_id, version) VALUES (NEW.user_id, NEW.seq)
+    ON CONFLICT (user_id) DO UPDATE SET version = GREATEST(user_versions.version, EXCLUDED.version);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS user_events_version ON user_events;
+CREATE TRIGGER user_events_version AFTER INSERT ON user_events
+    FOR EACH ROW EXECUTE FUNCTION bump_user_version();
+
+-- Users with events still stored
+INSERT INTO user_versions (user_id, version)
+SELECT user_id, MAX(seq) FROM user_events GROUP BY user_id
+ON CONFLICT (user_id) DO NOTHING;
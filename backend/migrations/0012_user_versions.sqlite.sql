@@ -0,0 +1,18 @@
+-- Per-user change version.
+-- version is the seq of the user's latest change event. user_events rows
+-- are pruned after EVENT_RETENTION_SECONDS, so the latest stored seq can
+-- fall back to an older value; this row is kept and only ever moves
+-- forward, which makes it safe as a cache key. A trigger keeps it current.
+
+CREATE TABLE IF NOT EXISTS user_versions (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS user_events_version AFTER INSERT ON user_events BEGIN
+    INSERT INTO user_versions (user_id, version) VALUES (new.user_id, new.seq)
+    ON CONFLICT (user_id) DO UPDATE SET version = MAX(version, excluded.version);
+END;
+
+-- Users with events still stored
+INSERT INTO user_versions (user_id, version) SELECT user_id, MAX(seq) FROM user_events GROUP BY user_id;
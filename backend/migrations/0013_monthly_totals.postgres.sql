@@ -0,0 +1,20 @@
+-- Monthly income and expense totals for goal projections on Supabase.
+-- Summing through PostgREST downloaded a year of rows per request and was
+-- cut off at the response row limit. monthly_totals() does the GROUP BY in
+-- the database, one row per month; the API calls it through PostgREST RPC.
+
+CREATE OR REPLACE FUNCTION monthly_totals(
+    p_user_id TEXT,
+    p_start TEXT,
+    p_end TEXT
+)
+RETURNS TABLE (month TEXT, income DOUBLE PRECISION, expense DOUBLE PRECISION)
+LANGUAGE sql STABLE AS $$
+    SELECT substr(t.date, 1, 7) AS month,
+           COALESCE(SUM(t.amount) FILTER (WHERE t.type = 'income'), 0) AS income,
+           COALESCE(SUM(t.amount) FILTER (WHERE t.type = 'expense'), 0) AS expense
+    FROM transactions t
+    WHERE t.user_id = p_user_id AND t.date >= p_start AND t.date < p_end
+    GROUP BY 1
+    ORDER BY 1
+$$;
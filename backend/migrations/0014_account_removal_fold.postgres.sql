@@ -0,0 +1,44 @@
+-- Fold removed transactions into the balance in cascade mode too.
+-- 0008 only folded archived chunks, so a cascade that resumed after its
+-- worker died lost the net amount of the chunks removed before. Now the
+-- balance is the running closing balance in both modes, updated in the
+-- same statement that removes the chunk.
+
+CREATE OR REPLACE FUNCTION remove_account_transactions(
+    p_user_id TEXT,
+    p_account_id TEXT,
+    p_limit INTEGER,
+    p_archive BOOLEAN
+)
+RETURNS TABLE (
+    id TEXT, user_id TEXT, account_id TEXT, type TEXT, amount DOUBLE PRECISION,
+    category TEXT, description TEXT, date TEXT, created_at TEXT
+)
+LANGUAGE sql AS $$
+    WITH chunk AS (
+        SELECT t.id FROM transactions t
+        WHERE t.account_id = p_account_id AND t.user_id = p_user_id
+        ORDER BY t.date, t.id
+        LIMIT p_limit
+        FOR UPDATE
+    ),
+    removed AS (
+        DELETE FROM transactions t USING chunk WHERE t.id = chunk.id
+        RETURNING t.id, t.user_id, t.account_id, t.type, t.amount, t.category, t.description, t.date, t.created_at
+    ),
+    archived AS (
+        INSERT INTO archived_transactions (id, user_id, account_id, type, amount, category, description, date, created_at, archived_at)
+        SELECT r.*, to_char(now() AT TIME ZONE 'utc', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"')
+        FROM removed r WHERE p_archive
+        ON CONFLICT (id) DO NOTHING
+    ),
+    folded AS (
+        UPDATE accounts a
+        SET balance = round((a.balance + (
+            SELECT COALESCE(SUM(CASE WHEN r.type = 'income' THEN r.amount WHEN r.type = 'expense' THEN -r.amount ELSE 0 END), 0)
+            FROM removed r
+        ))::numeric, 2)
+        WHERE a.id = p_account_id AND a.user_id = p_user_id
+    )
+    SELECT * FROM removed
+$$;
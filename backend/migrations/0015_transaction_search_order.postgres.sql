@@ -0,0 +1,57 @@
+-- Search results in the same order as SQLite: description hits, then newest.
+-- 0005 computed ts_rank for every match and sorted them all, and its order
+-- did not match SQLite's. Rows with every term in the description now come
+-- first with rank 0, then the rest with rank 1, each ordered by
+-- (date DESC, id) and paged by (rank, date, id) keyset. No per-row score is
+-- computed. Each tier is planned for its actual query, so a rare term sorts
+-- its few GIN matches and a common one walks idx_transactions_user_date
+-- until the page is full. The description index gives the first tier its
+-- own statistics (the planner cannot see search_vector's weights). The
+-- second tier is skipped when the first fills the page.
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_description_search ON transactions
+    USING GIN (user_id, (to_tsvector('simple', coalesce(description, ''))));
+
+DROP FUNCTION IF EXISTS search_transactions(TEXT, TEXT, INTEGER, DOUBLE PRECISION, TEXT);
+
+CREATE OR REPLACE FUNCTION search_transactions(
+    p_user_id TEXT,
+    p_terms TEXT[],
+    p_limit INTEGER,
+    p_after_rank DOUBLE PRECISION DEFAULT NULL,
+    p_after_date TEXT DEFAULT NULL,
+    p_after_id TEXT DEFAULT NULL
+)
+RETURNS TABLE (
+    id TEXT, user_id TEXT, account_id TEXT, type TEXT, amount DOUBLE PRECISION,
+    category TEXT, description TEXT, date TEXT, created_at TEXT, rank DOUBLE PRECISION
+)
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    terms tsquery := to_tsquery('simple', (
+        SELECT string_agg(quote_literal(term) || ':*', ' & ') FROM unnest(p_terms) AS term));
+    in_description CONSTANT TEXT := $q$to_tsvector('simple', coalesce(t.description, '')) @@ $3$q$;
+    -- %s is the tier's match condition; $3 is always the query
+    tier_sql CONSTANT TEXT := $q$
+        SELECT t.id, t.user_id, t.account_id, t.type, t.amount, t.category, t.description, t.date, t.created_at,
+               $1::DOUBLE PRECISION
+        FROM transactions t
+        WHERE t.user_id = $2 AND %s
+          AND ($4::TEXT IS NULL OR (t.date <= $4 AND (t.date < $4 OR t.id > $5)))
+        ORDER BY t.date DESC, t.id
+        LIMIT $6$q$;
+    remaining INTEGER := p_limit;
+    found_rows INTEGER;
+BEGIN
+    IF p_after_rank IS NULL OR p_after_rank <= 0 THEN
+        RETURN QUERY EXECUTE format(tier_sql, in_description) USING
+            0, p_user_id, terms, CASE WHEN p_after_rank = 0 THEN p_after_date END, p_after_id, remaining;
+        GET DIAGNOSTICS found_rows = ROW_COUNT;
+        remaining := remaining - found_rows;
+    END IF;
+    IF remaining > 0 THEN
+        RETURN QUERY EXECUTE format(tier_sql, 't.search_vector @@ $3 AND NOT ' || in_description) USING
+            1, p_user_id, terms, CASE WHEN p_after_rank = 1 THEN p_after_date END, p_after_id, remaining;
+    END IF;
+END;
+$$;
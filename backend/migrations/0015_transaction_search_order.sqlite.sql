@@ -0,0 +1,46 @@
+-- Search results newest first by (date DESC, id), scoped by a one-token user key.
+-- 0010 read matches in rowid order, which is insertion order, so backdated
+-- and imported transactions landed in the wrong place. It also indexed
+-- user_id as text, so a uuid became a five-token phrase that every search
+-- had to match. Now:
+--
+-- - The index rowid is the row's day number shifted left 40 bits, OR'd
+--   with the transaction's rowid. Reading matches in index order therefore
+--   visits them newest day first, and a page stops reading at its size.
+-- - user_key is hex(user_id): one token, which cannot match part of a
+--   longer id.
+--
+-- Neither value is a column of transactions, so the index is contentless.
+-- The triggers pass the old values when they remove a row from it.
+
+DROP TRIGGER IF EXISTS transactions_fts_insert;
+DROP TRIGGER IF EXISTS transactions_fts_delete;
+DROP TRIGGER IF EXISTS transactions_fts_update;
+DROP TABLE IF EXISTS transactions_fts;
+
+CREATE VIRTUAL TABLE transactions_fts USING fts5(
+    user_key, description, category,
+    content='',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5 6'
+);
+
+CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO transactions_fts (rowid, user_key, description, category)
+    VALUES ((CAST(COALESCE(julianday(new.date), 0) AS INTEGER) << 40) | new.rowid, hex(new.user_id), new.description, new.category);
+END;
+
+CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+    INSERT INTO transactions_fts (transactions_fts, rowid, user_key, description, category)
+    VALUES ('delete', (CAST(COALESCE(julianday(old.date), 0) AS INTEGER) << 40) | old.rowid, hex(old.user_id), old.description, old.category);
+END;
+
+CREATE TRIGGER transactions_fts_update AFTER UPDATE OF user_id, description, category, date ON transactions BEGIN
+    INSERT INTO transactions_fts (transactions_fts, rowid, user_key, description, category)
+    VALUES ('delete', (CAST(COALESCE(julianday(old.date), 0) AS INTEGER) << 40) | old.rowid, hex(old.user_id), old.description, old.category);
+    INSERT INTO transactions_fts (rowid, user_key, description, category)
+    VALUES ((CAST(COALESCE(julianday(new.date), 0) AS INTEGER) << 40) | new.rowid, hex(new.user_id), new.description, new.category);
+END;
+
+INSERT INTO transactions_fts (rowid, user_key, description, category)
+SELECT (CAST(COALESCE(julianday(date), 0) AS INTEGER) << 40) | rowid, hex(user_id), description, category
+FROM transactions;
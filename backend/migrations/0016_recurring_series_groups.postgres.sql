@@ -0,0 +1,21 @@
+-- Re-detecting one recurring series loads the rows that can share its key:
+-- one type, absolute amounts within one bucket. This index answers that
+-- without reading the user's other transactions.
+--
+-- replace_recurring_series() swaps a user's series for a full detection run
+-- in one transaction. Deleting and then inserting through PostgREST took two
+-- requests, and a failed insert left the user with no series at all.
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_type_amount ON transactions (user_id, type, amount);
+
+CREATE OR REPLACE FUNCTION replace_recurring_series(
+    p_user_id TEXT,
+    p_series JSONB
+)
+RETURNS VOID
+LANGUAGE sql AS $$
+    DELETE FROM recurring_series WHERE user_id = p_user_id;
+    INSERT INTO recurring_series
+    SELECT * FROM jsonb_populate_recordset(NULL::recurring_series, p_series) s
+    WHERE s.user_id = p_user_id;
+$$;
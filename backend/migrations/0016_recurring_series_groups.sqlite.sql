@@ -0,0 +1,5 @@
+-- Re-detecting one recurring series loads the rows that can share its key:
+-- one type, absolute amounts within one bucket. This index answers that
+-- without reading the user's other transactions.
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_type_amount ON transactions (user_id, type, amount);
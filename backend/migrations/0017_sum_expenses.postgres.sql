@@ -0,0 +1,20 @@
+-- Seed value for a new budget's spent on Supabase.
+-- Summing a category's month through PostgREST downloaded every matching
+-- row and was cut off at the response row limit, so large months started
+-- with spent too low. sum_expenses() aggregates in the database over
+-- idx_transactions_user_date and returns a single number; the API calls it
+-- through PostgREST RPC.
+
+CREATE OR REPLACE FUNCTION sum_expenses(
+    p_user_id TEXT,
+    p_category TEXT,
+    p_start TEXT,
+    p_end TEXT
+)
+RETURNS DOUBLE PRECISION
+LANGUAGE sql STABLE AS $$
+    SELECT COALESCE(SUM(amount), 0)
+    FROM transactions
+    WHERE user_id = p_user_id AND date >= p_start AND date < p_end
+      AND category = p_category AND type = 'expense'
+$$;
@@ -0,0 +1,123 @@
+"""Versioned SQL migrations.
+
+Files are named ``NNNN_description.sql`` and applied in version order. A file
+named ``NNNN_description.sqlite.sql`` or ``NNNN_description.postgres.sql`` only
+applies to that database, for features without a portable spelling. Each
+applied version is recorded in ``schema_migrations`` so running the migrations
+again is a no-op. The whole run happens in one transaction holding the write
+lock, so several workers starting at once apply each migration exactly once.
+"""
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+
+MIGRATIONS_DIR = Path(__file__).parent
+FILENAME_RE = re.compile(r"^(\d{4})_([a-z0-9_]+)(?:\.(sqlite|postgres))?\.sql$")
+
+TRACKING_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TEXT NOT NULL
+)
+"""
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text()
+
+def load_migrations(dialect: str = "sqlite", directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = FILENAME_RE.match(path.name)
+        if not match:
+            raise ValueError(f"Badly named migration file: {path.name}")
+        if match.group(3) not in (None, dialect):
+            continue
+        migrations.append(Migration(version=match.group(1), name=match.group(2), path=path))
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version")
+    return migrations
+
+def split_statements(sql: str) -> List[str]:
+    """Split a script into complete statements (sqlite3 cannot prepare several at once)."""
+    statements, buffer = [], ""
+    for line in sql.splitlines(keepends=True):
+        if not buffer and (not line.strip() or line.lstrip().startswith("--")):
+            continue
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+# ---------------- SQLITE ----------------
+def migrate_sqlite(conn: sqlite3.Connection, migrations: List[Migration] = None) -> List[str]:
+    """Apply pending migrations to an autocommit sqlite3 connection.
+
+    Returns the versions that were applied by this call.
+    """
+    migrations = load_migrations("sqlite") if migrations is None else migrations
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(TRACKING_TABLE)
+        cur = conn.cursor()
+        cur.row_factory = None
+        applied = {row[0] for row in cur.execute("SELECT version FROM schema_migrations")}
+        newly_applied = []
+        for migration in migrations:
+            if migration.version in applied:
+                continue
+            for statement in split_statements(migration.sql):
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                (migration.version, migration.name, datetime.now(timezone.utc).isoformat()),
+            )
+            newly_applied.append(migration.version)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return newly_applied
+
+# ---------------- POSTGRES ----------------
+# Arbitrary constant shared by every process running migrations
+ADVISORY_LOCK_ID = 72_410_001
+
+def migrate_postgres(conn, migrations: List[Migration] = None) -> List[str]:
+    """Apply pending migrations through a DB-API (psycopg) connection."""
+    migrations = load_migrations("postgres") if migrations is None else migrations
+    newly_applied = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (ADVISORY_LOCK_ID,))
+            cur.execute(TRACKING_TABLE)
+            cur.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cur.fetchall()}
+            for migration in migrations:
+                if migration.version in applied:
+                    continue
+                cur.execute(migration.sql)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name, applied_at) VALUES (%s, %s, %s)",
+                    (migration.version, migration.name, datetime.now(timezone.utc).isoformat()),
+                )
+                newly_applied.append(migration.version)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return newly_applied
@@ -0,0 +1,39 @@
+"""Apply pending migrations.
+
+    python -m migrations                      # backend from STORAGE_BACKEND
+    python -m migrations --sqlite budgetiq.db
+    python -m migrations --database-url postgresql://...   # Supabase Postgres
+"""
+import argparse
+import sqlite3
+import sys
+
+from config import settings
+from migrations import migrate_postgres, migrate_sqlite
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending BudgetIQ migrations")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--sqlite", metavar="PATH")
+    target.add_argument("--database-url", metavar="URL")
+    args = parser.parse_args()
+
+    if args.database_url or (not args.sqlite and settings.STORAGE_BACKEND == "supabase"):
+        url = args.database_url or settings.DATABASE_URL
+        if not url:
+            sys.exit("DATABASE_URL (the Supabase Postgres connection string) is required")
+        try:
+            import psycopg
+        except ImportError:
+            sys.exit("Migrating Postgres needs psycopg: pip install 'psycopg[binary]'")
+        with psycopg.connect(url) as conn:
+            applied = migrate_postgres(conn)
+    else:
+        conn = sqlite3.connect(args.sqlite or settings.SQLITE_PATH, isolation_level=None)
+        applied = migrate_sqlite(conn)
+        conn.close()
+
+    print(f"Applied migrations: {', '.join(applied)}" if applied else "Schema is up to date")
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,18 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi.responses import Response
-from app.main import api_router, init_database
+from app import create_app
 from config import settings
-from datetime import datetime, timezone
-from contextlib import asynccontextmanager
 import logging
-
-# Security Headers Middleware
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        # Add security headers
-        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, proxy-revalidate, max-age=0"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        return response
+import os
 
 # Logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-logger = logging.getLogger(__name__)
-
-# Lifespan
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    await init_database()
-    logger.info("✅ BudgetIQ API started with Supabase")
-    yield
-    logger.info("👋 BudgetIQ API shutdown")
 
 # FastAPI App
-app = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION, lifespan=lifespan)
-
-# Add security headers middleware
-app.add_middleware(SecurityHeadersMiddleware)
-
-# CORS
-origins = [o.strip() for o in settings.CORS_ORIGINS.split(",") if o]
-if "https://ayush-agrawal-lab.github.io" not in origins:
-    origins.append("https://ayush-agrawal-lab.github.io")
-
-# Add specific methods and headers
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=[
-        "Content-Type",
-        "Authorization",
-        "Accept",
-        "Origin",
-        "X-Requested-With"
-    ],
-    expose_headers=["Content-Length"],
-    max_age=600  # Cache preflight requests for 10 minutes
-)
-
-# Include router
-app.include_router(api_router, prefix="/api")
-
-# Health check
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat(), "version": settings.APP_VERSION}
+app = create_app()
 
-# Uvicorn entry
+# Entry point: prefork workers in production, auto-reloading dev server otherwise
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=True, log_level="info")
+    if settings.ENV == "production":
+        os.execvp("gunicorn", ["gunicorn", "-c", "gunicorn.conf.py", "server:app"])
+    else:
+        import uvicorn
+        uvicorn.run("server:app", host=settings.HOST, port=settings.PORT, reload=True, log_level="info")
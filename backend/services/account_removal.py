@@ -0,0 +1,129 @@
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from config import settings
+from services import budgets, events, recurring
+from services.events import broker
+from services.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# ---------------- ACCOUNT ARCHIVE / CASCADE DELETE ----------------
+# Removing an account with a long history is a background job, so the
+# request returns at once and no single statement touches every row:
+#
+# - "archive" moves the account's transactions to archived_transactions and
+#   adds their net amount to the account balance, then marks the account
+#   archived. Stored statements are kept.
+# - "cascade" deletes the transactions, then the account.
+#
+# Each chunk is removed atomically and its net amount is added to the
+# account balance in the same step, so the balance is always the closing
+# balance so far. The budgets the chunk counted towards are adjusted right
+# after. A failed run can therefore simply be started again. Progress,
+# including the running closing balance for a cascade that has already
+# deleted the account, is stored on the operation row and pushed as
+# "account.operation" events. Recurring series are re-detected at the end.
+# Once removal starts the account takes no new transactions; rows a request
+# wrote just before that are swept up after the account is finalised.
+# A running operation that has made no progress for a whole job lease lost
+# its worker; the next removal request for the account resumes it.
+
+ARCHIVE = "archive"
+CASCADE = "cascade"
+MODES = (ARCHIVE, CASCADE)
+CHUNK_SIZE = 500
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def is_active(operation: dict) -> bool:
+    return operation is not None and operation["status"] in (PENDING, RUNNING)
+
+def is_stale(operation: dict) -> bool:
+    """True for an active operation with no progress for longer than the job lease."""
+    if not is_active(operation):
+        return False
+    updated = datetime.fromisoformat(operation["updated_at"])
+    return datetime.now(timezone.utc) - updated > timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+def accepts_writes(account: dict) -> bool:
+    """False once the account is archived or being archived or deleted."""
+    return account.get("status", "active") == "active"
+
+def start(db: Storage, user_id: str, account: dict, mode: str) -> dict:
+    """Record a pending operation and take the account out of normal use."""
+    now = _now()
+    operation = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "account_id": account["id"],
+        "mode": mode,
+        "status": PENDING,
+        "total": db.count_account_transactions(user_id, account["id"]),
+        "processed": 0,
+        "closing_balance": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    db.create_account_operation(operation)
+    db.update_account(user_id, account["id"], {"status": "archiving" if mode == ARCHIVE else "deleting"})
+    return operation
+
+def _progress(db: Storage, operation: dict, **changes):
+    changes["updated_at"] = _now()
+    operation.update(changes)
+    db.update_account_operation(operation["id"], changes)
+    broker.publish(db, operation["user_id"], events.ACCOUNT_OPERATION, operation)
+
+def run(db: Storage, operation_id: str) -> dict:
+    operation = db.get_account_operation(operation_id)
+    if operation is None or not is_active(operation):
+        return operation
+    user_id, account_id = operation["user_id"], operation["account_id"]
+    archive = operation["mode"] == ARCHIVE
+    try:
+        account = db.get_account(user_id, account_id)
+        # Resuming: earlier chunks are already in the balance, or in the operation
+        closing = account["balance"] if account is not None else operation["closing_balance"]
+        _progress(db, operation, status=RUNNING, closing_balance=round(closing, 2))
+
+        def drain():
+            nonlocal closing
+            while True:
+                rows = db.remove_account_transactions(user_id, account_id, CHUNK_SIZE, archive)
+                if not rows:
+                    return
+                budgets.remove_transactions(db, user_id, rows)
+                closing += sum(budgets.signed_amount(row) for row in rows)
+                # Rows written to the account while it was being removed are picked up too
+                _progress(db, operation, processed=operation["processed"] + len(rows),
+                          total=max(operation["total"], operation["processed"] + len(rows)),
+                          closing_balance=round(closing, 2))
+
+        drain()
+        if archive:
+            db.update_account(user_id, account_id, {"status": "archived", "archived_at": _now()})
+        else:
+            db.delete_account(user_id, account_id)
+        # A write that passed its account check just before removal started
+        drain()
+        if archive:
+            broker.publish(db, user_id, events.ACCOUNT_UPDATED, db.get_account(user_id, account_id))
+        else:
+            broker.publish(db, user_id, events.ACCOUNT_DELETED, {"id": account_id})
+        if operation["processed"]:
+            recurring.detect_for_user(db, user_id)
+        _progress(db, operation, status=COMPLETED, closing_balance=round(closing, 2))
+    except Exception as exc:
+        logger.exception("Account %s %s failed", account_id, operation["mode"])
+        _progress(db, operation, status=FAILED, error=str(exc))
+        raise
+    logger.info("Account %s %s: %d transactions", account_id, operation["mode"], operation["processed"])
+    return operation
@@ -0,0 +1,116 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Optional
+from services.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# ---------------- BUDGET SPEND TRACKING ----------------
+# Budgets carry a running "spent" total. Every transaction write passes the row
+# as it was before and after the write; only the difference is applied, so the
+# totals stay exact without ever re-aggregating a user's transactions.
+
+ALERT_WARNING = "warning"
+ALERT_EXCEEDED = "exceeded"
+_ALERT_RANK = {None: 0, ALERT_WARNING: 1, ALERT_EXCEEDED: 2}
+
+def month_of(date: str) -> str:
+    return date[:7]
+
+def current_month() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+def _spend(transaction: Optional[dict]):
+    if not transaction or transaction.get("type") != "expense":
+        return None
+    return (transaction["category"], month_of(transaction["date"])), transaction["amount"]
+
+def alert_level(budget: dict) -> Optional[str]:
+    if budget["spent"] >= budget["amount"]:
+        return ALERT_EXCEEDED
+    if budget["spent"] >= budget["amount"] * budget["alert_threshold"]:
+        return ALERT_WARNING
+    return None
+
+def budget_status(budget: dict) -> dict:
+    amount, spent = budget["amount"], budget["spent"]
+    return {
+        **budget,
+        "remaining": amount - spent,
+        "percent_used": round(spent / amount * 100, 2),
+        "status": alert_level(budget) or "ok",
+    }
+
+def check_alert(db: Storage, budget: dict) -> Optional[dict]:
+    """Fire an alert when the budget crosses into a higher level.
+
+    The level is stored on the budget, so an alert fires once per crossing; if
+    spend drops back (a deleted or edited expense) the level is lowered and the
+    alert can fire again.
+    """
+    level = alert_level(budget)
+    if level == budget.get("alert_level"):
+        return None
+    db.update_budget(budget["user_id"], budget["id"], {"alert_level": level})
+    if _ALERT_RANK[level] < _ALERT_RANK[budget.get("alert_level")]:
+        return None
+    alert = {
+        "id": str(uuid.uuid4()),
+        "user_id": budget["user_id"],
+        "budget_id": budget["id"],
+        "category": budget["category"],
+        "month": budget["month"],
+        "level": level,
+        "spent": budget["spent"],
+        "amount": budget["amount"],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    db.create_budget_alert(alert)
+    logger.info("Budget %s %s for user %s (%.2f of %.2f)", budget["id"], level, budget["user_id"], budget["spent"], budget["amount"])
+    return alert
+
+def apply_transaction_change(db: Storage, user_id: str, before: Optional[dict], after: Optional[dict]) -> List[dict]:
+    """Move budget spend from the old version of a transaction to the new one.
+
+    ``before`` is None for a create, ``after`` is None for a delete. Returns the
+    alerts fired by this write.
+    """
+    deltas = defaultdict(float)
+    for row, sign in ((before, -1), (after, 1)):
+        spend = _spend(row)
+        if spend:
+            key, amount = spend
+            deltas[key] += sign * amount
+    return _apply_deltas(db, user_id, deltas)
+
+def remove_transactions(db: Storage, user_id: str, rows: List[dict]) -> List[dict]:
+    """Take a batch of removed transactions out of budget spend, one write per budget."""
+    deltas = defaultdict(float)
+    for row in rows:
+        spend = _spend(row)
+        if spend:
+            key, amount = spend
+            deltas[key] -= amount
+    return _apply_deltas(db, user_id, deltas)
+
+def signed_amount(transaction: dict) -> float:
+    """Effect on the account balance: income adds, expenses subtract."""
+    if transaction["type"] == "income":
+        return transaction["amount"]
+    if transaction["type"] == "expense":
+        return -transaction["amount"]
+    return 0.0
+
+def _apply_deltas(db: Storage, user_id: str, deltas: dict) -> List[dict]:
+    alerts = []
+    for (category, month), delta in deltas.items():
+        if not delta:
+            continue
+        budget = db.add_budget_spend(user_id, category, month, delta)
+        if budget is not None:
+            alert = check_alert(db, budget)
+            if alert:
+                alerts.append(alert)
+    return alerts
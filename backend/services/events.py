@@ -0,0 +1,248 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+from config import settings
+from services.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# ---------------- CHANGE EVENTS ----------------
+# Write handlers publish what they changed; clients holding an
+# /api/events/stream connection receive it instead of polling.
+#
+# - publish() stores the event (its seq is the SSE event id) and hands it
+#   straight to this worker's subscribers.
+# - Other workers pick stored events up with one query per poll interval,
+#   and only while they have subscribers, so fan-out costs one read per
+#   worker rather than one per client.
+# - A subscriber that falls too far behind is sent a single "resync" event
+#   and should refetch, instead of holding an unbounded queue. So is a client
+#   reconnecting with a Last-Event-ID older than the retained events, or one
+#   that missed more than REPLAY_LIMIT events.
+# - On Postgres, seqs are handed out when an insert starts but become visible
+#   when it commits, so a lower seq can show up after a higher one. The relay
+#   remembers seqs it skipped and looks for them again for
+#   LATE_COMMIT_SECONDS; a seq still missing by then was rolled back.
+# - Streams never finish on their own, and the server waits for open
+#   requests before it shuts down, so close_streams() ends them as soon as
+#   the worker starts draining. Clients reconnect to another worker.
+
+ACCOUNT_CREATED = "account.created"
+ACCOUNT_UPDATED = "account.updated"
+ACCOUNT_DELETED = "account.deleted"
+TRANSACTION_CREATED = "transaction.created"
+TRANSACTION_UPDATED = "transaction.updated"
+TRANSACTION_DELETED = "transaction.deleted"
+GOAL_CREATED = "goal.created"
+GOAL_UPDATED = "goal.updated"
+GOAL_DELETED = "goal.deleted"
+ACCOUNT_OPERATION = "account.operation"
+RESYNC = "resync"
+
+QUEUE_SIZE = 256
+REPLAY_LIMIT = 500
+LATE_COMMIT_SECONDS = 10.0
+
+def format_event(event: dict) -> str:
+    """One SSE message; ``payload`` is already JSON text."""
+    lines = [f"event: {event['type']}", f"data: {event['payload']}"]
+    if event.get("seq") is not None:
+        lines.insert(0, f"id: {event['seq']}")
+    return "\n".join(lines) + "\n\n"
+
+class Subscriber:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog and tell the client to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"seq": event["seq"], "type": RESYNC, "payload": "{}"})
+
+    def close(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+class EventBroker:
+    def __init__(self, poll_seconds: float = 1.0):
+        self.poll_seconds = poll_seconds
+        self.origin = uuid.uuid4().hex
+        self.db: Optional[Storage] = None
+        self.published = 0
+        self.relayed = 0
+        self._subscribers: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._relay_task: Optional[asyncio.Task] = None
+        self._relay_seq: Optional[int] = None
+        self._relay_gaps: Dict[int, float] = {}
+        self._closing = False
+
+    # ---------------- LIFECYCLE ----------------
+    async def start(self, db: Storage):
+        self.db = db
+        self._closing = False
+        self._loop = asyncio.get_running_loop()
+        self._relay_task = asyncio.create_task(self._relay())
+
+    def close_streams(self):
+        """End every open stream, and any opened from now on, so the worker can drain."""
+        self._closing = True
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                subscriber.close()
+
+    async def stop(self):
+        if self._relay_task is not None:
+            self._relay_task.cancel()
+            try:
+                await self._relay_task
+            except asyncio.CancelledError:
+                pass
+        # Wake open streams so they end with the worker
+        self.close_streams()
+        self._relay_task = None
+        self._relay_seq = None
+        self._relay_gaps.clear()
+        self._loop = None
+
+    # ---------------- PUBLISHING ----------------
+    def publish(self, db: Storage, user_id: str, event_type: str, data: dict) -> dict:
+        """Store a change event and deliver it to this worker's subscribers.
+
+        Safe to call from request handlers and from job threads.
+        """
+        event = {
+            "user_id": user_id,
+            "type": event_type,
+            "payload": json.dumps(data, default=str),
+            "origin": self.origin,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        event["seq"] = db.append_event(event)
+        self.published += 1
+        if self._loop is not None:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is self._loop:
+                self._deliver(event)
+            else:
+                self._loop.call_soon_threadsafe(self._deliver, event)
+        return event
+
+    def _deliver(self, event: dict):
+        for subscriber in self._subscribers.get(event["user_id"], ()):
+            subscriber.offer(event)
+
+    # ---------------- SUBSCRIBING ----------------
+    async def subscribe(self, user_id: str) -> Subscriber:
+        if self._relay_seq is None and self.db is not None:
+            # Relay resumes from here rather than replaying the whole table
+            self._relay_seq = await asyncio.to_thread(self.db.latest_event_seq)
+        subscriber = Subscriber(user_id)
+        self._subscribers[user_id].add(subscriber)
+        if self._closing:
+            subscriber.close()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._subscribers.get(subscriber.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.user_id]
+
+    async def stream(self, db: Storage, user_id: str, last_event_id: int = None, keepalive: float = 15.0):
+        """SSE text for one client until it disconnects or the worker stops."""
+        subscriber = await self.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            replayed = 0
+            if last_event_id is not None:
+                oldest = await asyncio.to_thread(db.oldest_event_seq)
+                # Some of what the client missed was already pruned, or too much to replay
+                missed = None
+                if oldest is not None and oldest <= last_event_id + 1:
+                    missed = await asyncio.to_thread(db.list_events, last_event_id, user_id, REPLAY_LIMIT + 1)
+                if missed is None or len(missed) > REPLAY_LIMIT:
+                    replayed = await asyncio.to_thread(db.latest_event_seq)
+                    yield format_event({"seq": replayed, "type": RESYNC, "payload": "{}"})
+                else:
+                    # Reconnect: send what the client missed, then go live
+                    for event in missed:
+                        replayed = event["seq"]
+                        yield format_event(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                if event["seq"] <= replayed and event["type"] != RESYNC:
+                    continue
+                yield format_event(event)
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def _relay(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            if not self._subscribers:
+                self._relay_seq = None
+                self._relay_gaps.clear()
+                continue
+            if self._relay_seq is None:
+                continue
+            try:
+                events = await asyncio.to_thread(self.db.list_events, self._relay_seq)
+                if self._relay_gaps:
+                    low, high = min(self._relay_gaps), max(self._relay_gaps)
+                    late = await asyncio.to_thread(self.db.list_events, low - 1, None, high - low + 1)
+                    events = [event for event in late if event["seq"] in self._relay_gaps] + events
+            except Exception:
+                logger.exception("Event relay poll failed")
+                continue
+            now = time.monotonic()
+            for event in events:
+                seq = event["seq"]
+                if seq > self._relay_seq:
+                    # Skipped seqs may still commit
+                    self._relay_gaps.update(dict.fromkeys(range(self._relay_seq + 1, seq), now))
+                    self._relay_seq = seq
+                else:
+                    self._relay_gaps.pop(seq, None)
+                if event["origin"] != self.origin:
+                    self.relayed += 1
+                    self._deliver(event)
+            self._relay_gaps = {
+                seq: noticed for seq, noticed in self._relay_gaps.items() if now - noticed < LATE_COMMIT_SECONDS
+            }
+
+    # ---------------- METRICS ----------------
+    def metrics(self) -> dict:
+        return {
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "relayed": self.relayed,
+        }
+
+# ---------------- RETENTION ----------------
+def prune_events(db: Storage):
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.EVENT_RETENTION_SECONDS)
+    db.delete_events_before(cutoff.isoformat())
+
+broker = EventBroker(settings.EVENT_POLL_SECONDS)
@@ -0,0 +1,24 @@
+from services import account_removal, events, recurring, statements
+from services.scheduler import scheduler
+from services.storage import get_storage
+
+# ---------------- JOB NAMES ----------------
+RECURRING_DETECT = "recurring.detect"
+RECURRING_SERIES = "recurring.series"
+EVENTS_PRUNE = "events.prune"
+STATEMENTS_CLOSE_MONTH = "statements.close_month"
+ACCOUNT_REMOVAL = "accounts.remove"
+
+# ---------------- REGISTRATION ----------------
+def register_jobs():
+    # Full re-detection; new writes queue RECURRING_SERIES instead
+    scheduler.register(RECURRING_DETECT, lambda user_id: recurring.detect_for_user(get_storage(), user_id))
+    # Keyed by series_job_key(), so repeated edits to one series are debounced together
+    scheduler.register(RECURRING_SERIES, lambda key: recurring.detect_for_series(get_storage(), *key.split("|", 1)))
+    scheduler.register(EVENTS_PRUNE, lambda _: events.prune_events(get_storage()), every=600)
+    scheduler.register(ACCOUNT_REMOVAL, lambda operation_id: account_removal.run(get_storage(), operation_id))
+    # Hourly, so statements appear within an hour of a month closing
+    scheduler.register(STATEMENTS_CLOSE_MONTH, lambda _: statements.close_month(get_storage()), every=3600)
+
+def series_job_key(user_id: str, transaction: dict) -> str:
+    return f"{user_id}|{recurring.series_key(transaction)}"
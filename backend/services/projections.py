@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Dict, List
+from services.budgets import current_month
+from services.statements import previous_month
+from services.storage import Storage, month_bounds
+
+# ---------------- GOAL PROJECTIONS ----------------
+# Each goal gets a projected completion date and the monthly contribution
+# needed to meet its deadline. Both come from the user's monthly net savings
+# (income minus expenses) over the last closed months:
+#
+# - A least-squares line through those months is extended forward, floored
+#   at zero, and accumulated month by month.
+# - A goal completes in the first month where the accumulated savings cover
+#   what is left of it. Each goal is measured as if it received all savings.
+#
+# All of a user's goals are solved together with array operations. Results
+# are cached per worker, keyed by the user's version (the seq of their latest
+# change event, which survives event pruning): every transaction and goal
+# write publishes an event, so any write (on any worker) invalidates the
+# entry, and reads in between are a single primary key lookup.
+
+TREND_MONTHS = 12
+HORIZON_MONTHS = 600
+DAYS_PER_MONTH = 30.44
+CACHE_SIZE = 1024
+
+def monthly_savings(db: Storage, user_id: str, month: str = None) -> List[float]:
+    """Net savings per closed month, from the user's first month with activity
+    in the trend window up to the month before ``month``."""
+    month = month or current_month()
+    first = month
+    for _ in range(TREND_MONTHS):
+        first = previous_month(first)
+    start, _ = month_bounds(first)
+    end, _ = month_bounds(month)
+    totals = {row["month"]: row["income"] - row["expense"] for row in db.monthly_totals(user_id, start, end)}
+    if not totals:
+        return []
+    months, cursor = [], previous_month(month)
+    while cursor >= min(totals):
+        months.append(totals.get(cursor, 0.0))
+        cursor = previous_month(cursor)
+    return months[::-1]
+
+def project_goals(goals: List[dict], savings: List[float], today: date = None) -> Dict[str, dict]:
+    """Projection per goal id for one user's goals."""
+    import numpy as np
+
+    if not goals:
+        return {}
+    today = today or datetime.now(timezone.utc).date()
+
+    # Trend line through past months, extended over the horizon
+    history = np.asarray(savings, dtype=float)
+    if len(history) >= 2:
+        slope, intercept = np.polyfit(np.arange(len(history)), history, 1)
+    else:
+        slope, intercept = 0.0, (history[0] if len(history) else 0.0)
+    # Rounded to cents so a flat history does not fall short by float noise
+    future = np.round(intercept + slope * np.arange(len(history), len(history) + HORIZON_MONTHS), 2)
+    cumulative = np.cumsum(np.maximum(future, 0.0))
+
+    remaining = np.maximum(
+        np.array([g["target_amount"] for g in goals], dtype=float) - np.array([g["current_amount"] for g in goals], dtype=float),
+        0.0,
+    )
+    # First month whose running total covers the remainder; HORIZON_MONTHS means never
+    months = np.searchsorted(cumulative, remaining)
+    months = np.where(remaining <= 0, 0, months + 1)
+    reachable = months <= HORIZON_MONTHS
+    completion = np.datetime64(today) + np.round(np.where(reachable, months, 0) * DAYS_PER_MONTH).astype(int).astype("timedelta64[D]")
+
+    deadlines = np.array([_parse_deadline(g["deadline"], today) for g in goals], dtype="datetime64[D]")
+    months_left = np.maximum((deadlines - np.datetime64(today)).astype(float) / DAYS_PER_MONTH, 1.0)
+    required = np.where(deadlines > np.datetime64(today), remaining / months_left, remaining)
+    on_track = reachable & (completion <= deadlines)
+
+    current_savings = round(float(max(future[0], 0.0)), 2)
+    return {
+        goal["id"]: {
+            "monthly_savings": current_savings,
+            "months_to_complete": int(months[i]) if reachable[i] else None,
+            "projected_completion_date": str(completion[i]) if reachable[i] else None,
+            "required_monthly_contribution": round(float(required[i]), 2),
+            "on_track": bool(on_track[i]),
+        }
+        for i, goal in enumerate(goals)
+    }
+
+def _parse_deadline(value: str, today: date) -> date:
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return today
+
+# ---------------- CACHE ----------------
+class ProjectionCache:
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def goals_with_projections(self, db: Storage, user_id: str, goals: List[dict]) -> List[dict]:
+        today = datetime.now(timezone.utc).date()
+        version = (db.user_version(user_id), today)
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+            projections = entry[1]
+        else:
+            self.misses += 1
+            projections = project_goals(goals, monthly_savings(db, user_id), today)
+            self._entries[user_id] = (version, projections)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return [{**goal, "projection": projections.get(goal["id"])} for goal in goals]
+
+    def clear(self):
+        self._entries.clear()
+
+cache = ProjectionCache()
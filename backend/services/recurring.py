@@ -0,0 +1,191 @@
+import logging
+import math
+import re
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from services.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# ---------------- RECURRING TRANSACTION DETECTION ----------------
+# Transactions are grouped by (type, normalised description, amount bucket).
+# Within a group the gaps between consecutive dates are compared with known
+# billing periods; a group whose gaps mostly match one period is a series.
+#
+# Batch detection is one sort of the user's rows plus array operations over
+# the gaps, so it stays O(n log n) for very long histories. New transactions
+# that continue a known series are applied in O(1) through series_key. Any
+# other change re-detects only the groups it touched: a group's rows share a
+# type and an amount bucket, so they are loaded by amount range and the
+# user's other rows are never read.
+
+MIN_OCCURRENCES = 3
+MIN_REGULARITY = 0.75
+# Amounts within ~10% of each other land in the same bucket
+AMOUNT_STEP = math.log(1.10)
+
+# (name, length in days, tolerance in days)
+PERIODS = (
+    ("weekly", 7.0, 1.5),
+    ("biweekly", 14.0, 2.5),
+    ("monthly", 30.44, 4.0),
+    ("quarterly", 91.31, 10.0),
+    ("yearly", 365.25, 20.0),
+)
+_PERIODS_BY_NAME = {name: (length, tolerance) for name, length, tolerance in PERIODS}
+
+_NON_ALPHA = re.compile(r"[^a-z ]+")
+_SERIES_NAMESPACE = uuid.UUID("2f1a8c3e-6d0b-4f5e-9a71-3c2d8e4b5f60")
+
+def normalize_description(text: str) -> str:
+    """'NETFLIX.COM 8412*' and 'Netflix.com #8533' both become 'netflix com'."""
+    return " ".join(_NON_ALPHA.sub(" ", (text or "").lower()).split())
+
+def amount_bucket(amount: float) -> int:
+    return math.floor(math.log(max(abs(amount), 0.01)) / AMOUNT_STEP)
+
+def amount_range(bucket: int) -> Tuple[float, float]:
+    """Absolute amounts that can land in bucket, widened for rounding."""
+    low = 0.0 if bucket <= amount_bucket(0.01) else math.exp(bucket * AMOUNT_STEP) * 0.999
+    return low, math.exp((bucket + 1) * AMOUNT_STEP) * 1.001
+
+def series_key(transaction: dict, normalized: str = None) -> str:
+    if normalized is None:
+        normalized = normalize_description(transaction["description"])
+    return f"{transaction['type']}|{normalized}|{amount_bucket(transaction['amount'])}"
+
+def _parse_day(value: str) -> Optional[date]:
+    try:
+        return date.fromisoformat(value[:10])
+    except (TypeError, ValueError):
+        return None
+
+def monthly_amount(series: dict) -> float:
+    return series["amount"] * 30.44 / series["interval_days"]
+
+# ---------------- BATCH ----------------
+def detect_series(user_id: str, transactions: List[dict]) -> List[dict]:
+    """Find recurring series in one user's transactions."""
+    import numpy as np
+
+    rows, keys, days = [], [], []
+    normalized = {}
+    for t in transactions:
+        day = _parse_day(t.get("date"))
+        if day is None:
+            continue
+        description = t["description"]
+        if description not in normalized:
+            normalized[description] = normalize_description(description)
+        rows.append(t)
+        keys.append(series_key(t, normalized[description]))
+        days.append(day.toordinal())
+    if len(rows) < MIN_OCCURRENCES:
+        return []
+
+    days = np.asarray(days, dtype=np.int64)
+    amounts = np.asarray([t["amount"] for t in rows], dtype=float)
+    group_keys, groups = np.unique(np.asarray(keys), return_inverse=True)
+    n_groups = len(group_keys)
+
+    # Sort by (group, date); gaps between neighbours in the same group
+    order = np.lexsort((days, groups))
+    g, d = groups[order], days[order]
+    same = g[1:] == g[:-1]
+    gap_group, gaps = g[1:][same], np.diff(d)[same]
+    n_gaps = np.bincount(gap_group, minlength=n_groups)
+
+    # Median gap per group: sort gaps by (group, gap) and take the middle one
+    sorted_gaps = gaps[np.lexsort((gaps, gap_group))]
+    gap_starts = np.concatenate(([0], np.cumsum(n_gaps)[:-1]))
+    has_gaps = n_gaps > 0
+    median_gap = np.zeros(n_groups)
+    median_gap[has_gaps] = sorted_gaps[gap_starts[has_gaps] + n_gaps[has_gaps] // 2]
+
+    # Nearest billing period within tolerance of the median gap
+    lengths = np.array([p[1] for p in PERIODS])
+    tolerances = np.array([p[2] for p in PERIODS])
+    distance = np.abs(median_gap[:, None] - lengths[None, :])
+    period = np.argmin(distance, axis=1)
+    matched = distance[np.arange(n_groups), period] <= tolerances[period]
+
+    # Regularity: share of a group's gaps that fit its period
+    gap_period = period[gap_group]
+    on_schedule = np.abs(gaps - lengths[gap_period]) <= tolerances[gap_period]
+    regularity = np.bincount(gap_group, weights=on_schedule, minlength=n_groups) / np.maximum(n_gaps, 1)
+
+    detected = np.flatnonzero(matched & (n_gaps >= MIN_OCCURRENCES - 1) & (regularity >= MIN_REGULARITY))
+    if not len(detected):
+        return []
+
+    # Per-group first/last row and median amount, from the same group ordering
+    sizes = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    sorted_amounts = amounts[np.lexsort((amounts, groups))]
+
+    now = datetime.now(timezone.utc).isoformat()
+    series = []
+    for i in detected:
+        first, last = starts[i], starts[i] + sizes[i] - 1
+        latest = rows[order[last]]
+        interval = float(median_gap[i])
+        last_day = date.fromordinal(int(d[last]))
+        series.append({
+            "id": str(uuid.uuid5(_SERIES_NAMESPACE, f"{user_id}|{group_keys[i]}")),
+            "user_id": user_id,
+            "series_key": str(group_keys[i]),
+            "type": latest["type"],
+            "description": latest["description"],
+            "category": latest["category"],
+            "amount": float(sorted_amounts[starts[i] + sizes[i] // 2]),
+            "period": PERIODS[period[i]][0],
+            "interval_days": interval,
+            "occurrences": int(sizes[i]),
+            "first_date": date.fromordinal(int(d[first])).isoformat(),
+            "last_date": last_day.isoformat(),
+            "next_expected_date": (last_day + timedelta(days=round(interval))).isoformat(),
+            "updated_at": now,
+        })
+    return series
+
+def detect_for_user(db: Storage, user_id: str) -> List[dict]:
+    """Re-run detection over the user's full history and persist the result."""
+    series = detect_series(user_id, db.list_transactions(user_id))
+    db.replace_recurring_series(user_id, series)
+    logger.info("Detected %d recurring series for user %s", len(series), user_id)
+    return series
+
+def detect_for_series(db: Storage, user_id: str, key: str) -> Optional[dict]:
+    """Re-run detection for one series_key group and persist the result."""
+    # The normalised description and bucket never contain "|"; the type might
+    type_, _, bucket = key.rsplit("|", 2)
+    low, high = amount_range(int(bucket))
+    rows = [t for t in db.list_transactions_by_amount(user_id, type_, low, high) if series_key(t) == key]
+    found = detect_series(user_id, rows)
+    series = found[0] if found else None
+    db.save_recurring_series(user_id, key, series)
+    return series
+
+# ---------------- INCREMENTAL ----------------
+def extend_series(db: Storage, user_id: str, transaction: dict) -> bool:
+    """Apply a new transaction to the series it continues, if any.
+
+    Returns False when the transaction does not simply extend a known series,
+    in which case the caller should re-run detect_for_series for its key.
+    """
+    series = db.get_recurring_series(user_id, series_key(transaction))
+    day = _parse_day(transaction.get("date"))
+    if series is None or day is None:
+        return False
+    length, tolerance = _PERIODS_BY_NAME[series["period"]]
+    gap = (day - date.fromisoformat(series["last_date"])).days
+    if abs(gap - length) > tolerance:
+        return False
+    db.update_recurring_series(user_id, series["id"], {
+        "last_date": day.isoformat(),
+        "occurrences": series["occurrences"] + 1,
+        "next_expected_date": (day + timedelta(days=round(series["interval_days"]))).isoformat(),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    })
+    return True
@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+from config import settings
+from services.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# ---------------- BACKGROUND JOB SCHEDULER ----------------
+# Runs derived-data recomputation outside request handlers, on the worker's
+# event loop, started and stopped by the app lifespan.
+#
+# - schedule(name, key) is debounced: scheduling the same (name, key) again
+#   before it runs moves it later, so a burst of writes runs the job once.
+# - register(name, func, every=seconds) adds a periodic job.
+# - At most max_concurrency job functions run at once, each in a thread so
+#   blocking storage calls never stall the event loop.
+# - Pending jobs are stored in the database. A worker runs a job only if it
+#   can claim the stored row with the run_at it scheduled, which moves run_at
+#   forward by the lease. The row is deleted once the job has succeeded. A
+#   job whose worker died, or that raised, is picked up again when its lease
+#   runs out, so restarts resume pending work and multiple workers never run
+#   the same job at the same time.
+# - Every rescan_seconds each worker reloads stored jobs that are due. That
+#   is how a running worker finds the expired lease of one that died, or a
+#   job stored by a worker that exited before running it.
+#
+# The queue, timers and metrics are per worker process.
+
+def _stamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+class JobStats:
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = None
+        self.total_wait_seconds = 0.0
+
+    def record(self, waited: float, elapsed: float, failed: bool):
+        self.runs += 1
+        self.failures += int(failed)
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        self.last_seconds = elapsed
+        self.total_wait_seconds += waited
+
+    def snapshot(self) -> dict:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "avg_seconds": round(self.total_seconds / self.runs, 4) if self.runs else None,
+            "max_seconds": round(self.max_seconds, 4),
+            "last_seconds": round(self.last_seconds, 4) if self.last_seconds is not None else None,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.runs, 4) if self.runs else None,
+        }
+
+class JobScheduler:
+    PERIODIC_KEY = "*"
+
+    def __init__(self, max_concurrency: int = 4, debounce_seconds: float = 5.0, lease_seconds: float = 600.0,
+                 rescan_seconds: float = 60.0):
+        self.max_concurrency = max_concurrency
+        self.debounce_seconds = debounce_seconds
+        self.lease_seconds = lease_seconds
+        self.rescan_seconds = rescan_seconds
+        self.handlers: Dict[str, Callable[[str], object]] = {}
+        self.intervals: Dict[str, float] = {}
+        self.stats: Dict[str, JobStats] = {}
+        self.db: Optional[Storage] = None
+        self._due: Dict[tuple, str] = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._running = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._rescan_task: Optional[asyncio.Task] = None
+
+    # ---------------- REGISTRATION ----------------
+    def register(self, name: str, func: Callable[[str], object], every: float = None):
+        """Register ``func(key)``; with ``every`` it also runs every N seconds (key "*")."""
+        self.handlers[name] = func
+        self.stats.setdefault(name, JobStats())
+        if every:
+            self.intervals[name] = every
+
+    # ---------------- SCHEDULING ----------------
+    def schedule(self, name: str, key: str, delay: float = None):
+        if name not in self.handlers:
+            raise KeyError(f"Unknown job: {name}")
+        run_at = time.time() + (self.debounce_seconds if delay is None else delay)
+        self._push(name, key, run_at, _stamp(run_at), persist=True)
+
+    def _schedule_next_period(self, name: str):
+        # Aligned to the interval, so every worker picks the same slot
+        interval = self.intervals[name]
+        run_at = (math.floor(time.time() / interval) + 1) * interval
+        self._push(name, self.PERIODIC_KEY, run_at, _stamp(run_at), persist=True)
+
+    def _load(self, job: dict):
+        # A stored job this worker does not already hold at the same run_at
+        if job["name"] in self.handlers and self._due.get((job["name"], job["job_key"])) != job["run_at"]:
+            run_at = datetime.fromisoformat(job["run_at"]).timestamp()
+            self._push(job["name"], job["job_key"], run_at, job["run_at"], persist=False)
+
+    def _push(self, name: str, key: str, run_at: float, stamp: str, persist: bool):
+        self._due[(name, key)] = stamp
+        heapq.heappush(self._heap, (run_at, next(self._seq), name, key, stamp))
+        if persist and self.db is not None:
+            self.db.save_pending_job(name, key, stamp)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ---------------- LIFECYCLE ----------------
+    async def start(self, db: Storage):
+        self.db = db
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        for job in await asyncio.to_thread(db.list_pending_jobs):
+            self._load(job)
+        for name in self.intervals:
+            if (name, self.PERIODIC_KEY) not in self._due:
+                self._schedule_next_period(name)
+        self._loop_task = asyncio.create_task(self._dispatch())
+        self._rescan_task = asyncio.create_task(self._rescan())
+        logger.info("Job scheduler started with %d pending jobs", len(self._due))
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop dispatching and let running jobs finish; pending jobs stay stored."""
+        for task in (self._loop_task, self._rescan_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout)
+        self._loop_task = None
+        self._rescan_task = None
+        self._wakeup = None
+        self._due.clear()
+        self._heap.clear()
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                run_at, _, name, key, stamp = heapq.heappop(self._heap)
+                if self._due.get((name, key)) != stamp:
+                    continue  # superseded by a later schedule() call
+                del self._due[(name, key)]
+                task = asyncio.create_task(self._execute(name, key, run_at, stamp))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _rescan(self):
+        # Every worker may load the same row; claim_pending_job lets one run it
+        while True:
+            await asyncio.sleep(self.rescan_seconds)
+            try:
+                due = await asyncio.to_thread(self.db.list_pending_jobs, _stamp(time.time()))
+            except Exception:
+                logger.exception("Rescanning pending jobs failed")
+                continue
+            for job in due:
+                self._load(job)
+
+    async def _execute(self, name: str, key: str, run_at: float, stamp: str):
+        async with self._semaphore:
+            lease = time.time() + self.lease_seconds
+            lease_stamp = _stamp(lease)
+            claimed = self.db is None or await asyncio.to_thread(self.db.claim_pending_job, name, key, stamp, lease_stamp)
+            if claimed:
+                started = time.time()
+                failed = False
+                try:
+                    await asyncio.to_thread(self.handlers[name], key)
+                except Exception:
+                    failed = True
+                    logger.exception("Job %s(%s) failed", name, key)
+                self.stats[name].record(started - run_at, time.time() - started, failed)
+                if not failed and self.db is not None:
+                    await asyncio.to_thread(self.db.complete_pending_job, name, key, lease_stamp)
+                elif failed and name not in self.intervals and (name, key) not in self._due and self._wakeup is not None:
+                    # Retried when the lease runs out, unless it was rescheduled meanwhile
+                    self._push(name, key, lease, lease_stamp, persist=False)
+        if name in self.intervals and self._wakeup is not None:
+            self._schedule_next_period(name)
+
+    # ---------------- METRICS ----------------
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": len(self._due),
+            "running": len(self._running),
+            "max_concurrency": self.max_concurrency,
+            "jobs": {name: stats.snapshot() for name, stats in self.stats.items()},
+        }
+
+scheduler = JobScheduler(
+    settings.JOB_CONCURRENCY, settings.JOB_DEBOUNCE_SECONDS, settings.JOB_LEASE_SECONDS, settings.JOB_RESCAN_SECONDS,
+)
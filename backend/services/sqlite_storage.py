@@ -0,0 +1,464 @@
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from migrations import migrate_sqlite
+from services.storage import Storage, month_bounds
+
+# Columns a caller may write, per table. Update statements are only ever built
+# from these names, so the SQL text stays in a small, cacheable set.
+COLUMNS = {
+    "users": ("id", "name", "email", "password", "created_at"),
+    "accounts": ("id", "user_id", "name", "type", "balance", "status", "archived_at", "created_at"),
+    "account_operations": (
+        "id", "user_id", "account_id", "mode", "status", "total", "processed", "closing_balance", "error",
+        "created_at", "updated_at",
+    ),
+    "transactions": ("id", "user_id", "account_id", "type", "amount", "category", "description", "date", "created_at"),
+    "goals": ("id", "user_id", "name", "target_amount", "current_amount", "deadline", "created_at"),
+    "budgets": ("id", "user_id", "category", "month", "amount", "spent", "alert_threshold", "alert_level", "created_at"),
+    "budget_alerts": ("id", "user_id", "budget_id", "category", "month", "level", "spent", "amount", "created_at"),
+    "statements": (
+        "id", "user_id", "account_id", "month", "opening_balance", "closing_balance", "total_income",
+        "total_expense", "transaction_count", "categories", "generated_at",
+    ),
+    "recurring_series": (
+        "id", "user_id", "series_key", "type", "description", "category", "amount", "period", "interval_days",
+        "occurrences", "first_date", "last_date", "next_expected_date", "updated_at",
+    ),
+}
+
+def _dict_row(cursor, row):
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+# ---------------- STORAGE ----------------
+class SQLiteStorage(Storage):
+    """Embedded storage for self-hosted and single-node deployments.
+
+    One connection per worker process in WAL mode, so readers never block on
+    the writer and other workers can read the same file concurrently. All SQL
+    is parameterised and reused verbatim, which lets sqlite3's statement cache
+    keep the compiled statements around between requests.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self.conn.row_factory = _dict_row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        migrate_sqlite(self.conn)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _one(self, sql: str, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def _all(self, sql: str, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params=()):
+        with self.lock:
+            self.conn.execute(sql, params)
+
+    def _insert(self, table: str, data: dict) -> dict:
+        columns = [c for c in COLUMNS[table] if c in data]
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        self._execute(sql, [data[c] for c in columns])
+        return data
+
+    def _update(self, table: str, user_id: str, row_id: str, changes: dict):
+        columns = [c for c in COLUMNS[table] if c in changes and c not in ("id", "user_id")]
+        if not columns:
+            return
+        sql = f"UPDATE {table} SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ? AND user_id = ?"
+        self._execute(sql, [changes[c] for c in columns] + [row_id, user_id])
+
+    # ---------------- USERS ----------------
+    def get_user(self, user_id):
+        return self._one("SELECT id, name, email, created_at FROM users WHERE id = ?", (user_id,))
+
+    def get_user_by_email(self, email):
+        return self._one("SELECT * FROM users WHERE email = ?", (email,))
+
+    def create_user(self, data):
+        return self._insert("users", data)
+
+    # ---------------- ACCOUNTS ----------------
+    def list_accounts(self, user_id, include_archived=False):
+        if include_archived:
+            return self._all("SELECT * FROM accounts WHERE user_id = ? AND status IN ('active', 'archived')", (user_id,))
+        return self._all("SELECT * FROM accounts WHERE user_id = ? AND status = 'active'", (user_id,))
+
+    def get_account(self, user_id, account_id):
+        return self._one("SELECT * FROM accounts WHERE id = ? AND user_id = ?", (account_id, user_id))
+
+    def create_account(self, data):
+        return self._insert("accounts", data)
+
+    def update_account(self, user_id, account_id, changes):
+        self._update("accounts", user_id, account_id, changes)
+
+    def delete_account(self, user_id, account_id):
+        self._execute("DELETE FROM accounts WHERE id = ? AND user_id = ?", (account_id, user_id))
+
+    def account_has_transactions(self, account_id):
+        return self._one("SELECT 1 AS found FROM transactions WHERE account_id = ? LIMIT 1", (account_id,)) is not None
+
+    def count_account_transactions(self, user_id, account_id):
+        return self._one(
+            "SELECT COUNT(*) AS n FROM transactions WHERE account_id = ? AND user_id = ?", (account_id, user_id)
+        )["n"]
+
+    def remove_account_transactions(self, user_id, account_id, limit, archive):
+        columns = COLUMNS["transactions"]
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT * FROM transactions WHERE account_id = ? AND user_id = ? ORDER BY date, id LIMIT ?",
+                    (account_id, user_id, limit),
+                ).fetchall()
+                ids = [row["id"] for row in rows]
+                if archive and rows:
+                    archived_at = datetime.now(timezone.utc).isoformat()
+                    self.conn.executemany(
+                        f"INSERT OR IGNORE INTO archived_transactions ({', '.join(columns)}, archived_at) "
+                        f"VALUES ({', '.join('?' * (len(columns) + 1))})",
+                        [[row[c] for c in columns] + [archived_at] for row in rows],
+                    )
+                if ids:
+                    net = sum(row["amount"] if row["type"] == "income" else -row["amount"] for row in rows if row["type"] in ("income", "expense"))
+                    self.conn.execute(
+                        "UPDATE accounts SET balance = ROUND(balance + ?, 2) WHERE id = ? AND user_id = ?", (net, account_id, user_id)
+                    )
+                    self.conn.execute(f"DELETE FROM transactions WHERE id IN ({', '.join('?' * len(ids))})", ids)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def create_account_operation(self, data):
+        return self._insert("account_operations", data)
+
+    def get_account_operation(self, operation_id):
+        return self._one("SELECT * FROM account_operations WHERE id = ?", (operation_id,))
+
+    def get_latest_account_operation(self, user_id, account_id):
+        return self._one(
+            "SELECT * FROM account_operations WHERE account_id = ? AND user_id = ? ORDER BY created_at DESC LIMIT 1",
+            (account_id, user_id),
+        )
+
+    def update_account_operation(self, operation_id, changes):
+        columns = [c for c in COLUMNS["account_operations"] if c in changes and c != "id"]
+        self._execute(
+            f"UPDATE account_operations SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+            [changes[c] for c in columns] + [operation_id],
+        )
+
+    def list_accounts_page(self, after_id="", limit=200):
+        return self._all("SELECT * FROM accounts WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit))
+
+    # ---------------- TRANSACTIONS ----------------
+    def list_transactions(self, user_id, limit=None, after=None):
+        # Keyset pagination along idx_transactions_user_date
+        if after is None:
+            return self._all(
+                "SELECT * FROM transactions WHERE user_id = ? ORDER BY date DESC, id LIMIT ?",
+                (user_id, -1 if limit is None else limit),
+            )
+        date, txn_id = after
+        return self._all(
+            "SELECT * FROM transactions WHERE user_id = ? AND (date < ? OR (date = ? AND id > ?)) "
+            "ORDER BY date DESC, id LIMIT ?",
+            (user_id, date, date, txn_id, -1 if limit is None else limit),
+        )
+
+    def get_transaction(self, user_id, transaction_id):
+        return self._one("SELECT * FROM transactions WHERE id = ? AND user_id = ?", (transaction_id, user_id))
+
+    def list_transactions_by_amount(self, user_id, type, low, high):
+        # Two ranges of idx_transactions_user_type_amount, one per sign
+        return self._all(
+            "SELECT * FROM transactions WHERE user_id = ? AND type = ? "
+            "AND (amount BETWEEN ? AND ? OR amount BETWEEN ? AND ?)",
+            (user_id, type, low, high, -high, -low),
+        )
+
+    def search_transactions(self, user_id, terms, limit, after=None):
+        # Every term must prefix-match the description or the category. Rows
+        # with every term in the description come first (rank 0), then the
+        # rest (rank 1), each ordered by (date DESC, id) like list_transactions.
+        words = " AND ".join(f'"{term}"*' for term in terms)
+        user = f'user_key:"{user_id.encode().hex()}"'
+        tiers = [
+            f"{user} AND description:({words})",
+            f"{user} AND {{description category}}:({words}) NOT description:({words})",
+        ]
+        after_rank, after_date, after_id = after if after is not None else (None, "", "")
+        rows = []
+        for rank, match in enumerate(tiers):
+            if after_rank is not None and rank < after_rank:
+                continue
+            cursor = (after_date, after_id) if after_rank == rank else ("", "")
+            rows += self._search_tier(rank, match, user_id, limit - len(rows), cursor)
+            if len(rows) == limit:
+                break
+        return rows
+
+    def _search_tier(self, rank, match, user_id, limit, after):
+        # The index rowid starts with the row's day (migration 0015), so
+        # matches come out newest day first and reading stops at the page
+        # size. Only the last day on the page is then read whole, to put it
+        # in id order.
+        after_date, after_id = after
+        sql = (
+            "SELECT t.*, ? AS rank FROM transactions_fts "
+            "CROSS JOIN transactions t ON t.rowid = transactions_fts.rowid & 1099511627775 "
+            "WHERE transactions_fts MATCH ? "
+            "AND transactions_fts.rowid >= (CAST(COALESCE(julianday(?), 0) AS INTEGER) << 40) "
+            "AND transactions_fts.rowid < ((CAST(COALESCE(julianday(?), 0) AS INTEGER) + 1) << 40) "
+            "AND t.user_id = ? AND NOT (t.date = ? AND t.id <= ?) "
+            "ORDER BY transactions_fts.rowid DESC LIMIT ?"
+        )
+        common = (float(rank), match)
+        rows = self._all(sql, common + ("", after_date or "9999-12-31", user_id, after_date, after_id, limit))
+        if len(rows) == limit:
+            last_day = rows[-1]["date"]
+            rows = [row for row in rows if row["date"] != last_day]
+            rows += self._all(sql, common + (last_day, last_day, user_id, after_date, after_id, -1))
+        rows.sort(key=lambda row: row["id"])
+        rows.sort(key=lambda row: row["date"], reverse=True)
+        return rows[:limit]
+
+    def list_account_transactions(self, user_id, account_id, start, end, limit, after=None):
+        if after is None:
+            return self._all(
+                "SELECT * FROM transactions WHERE account_id = ? AND user_id = ? AND date >= ? AND date < ? "
+                "ORDER BY date, id LIMIT ?",
+                (account_id, user_id, start, end, limit),
+            )
+        date, txn_id = after
+        return self._all(
+            "SELECT * FROM transactions WHERE account_id = ? AND user_id = ? AND date < ? "
+            "AND (date > ? OR (date = ? AND id > ?)) AND date >= ? ORDER BY date, id LIMIT ?",
+            (account_id, user_id, end, date, date, txn_id, start, limit),
+        )
+
+    def monthly_totals(self, user_id, start, end):
+        return self._all(
+            "SELECT substr(date, 1, 7) AS month, "
+            "COALESCE(SUM(CASE WHEN type = 'income' THEN amount END), 0) AS income, "
+            "COALESCE(SUM(CASE WHEN type = 'expense' THEN amount END), 0) AS expense "
+            "FROM transactions WHERE user_id = ? AND date >= ? AND date < ? GROUP BY month ORDER BY month",
+            (user_id, start, end),
+        )
+
+    def account_net_before(self, user_id, account_id, date):
+        return self._one(
+            "SELECT COALESCE(SUM(CASE WHEN type = 'income' THEN amount WHEN type = 'expense' THEN -amount ELSE 0 END), 0) "
+            "AS net FROM transactions WHERE account_id = ? AND user_id = ? AND date < ?",
+            (account_id, user_id, date),
+        )["net"]
+
+    def create_transaction(self, data):
+        return self._insert("transactions", data)
+
+    def update_transaction(self, user_id, transaction_id, changes):
+        self._update("transactions", user_id, transaction_id, changes)
+
+    def delete_transaction(self, user_id, transaction_id):
+        self._execute("DELETE FROM transactions WHERE id = ? AND user_id = ?", (transaction_id, user_id))
+
+    # ---------------- GOALS ----------------
+    def list_goals(self, user_id):
+        return self._all("SELECT * FROM goals WHERE user_id = ?", (user_id,))
+
+    def get_goal(self, user_id, goal_id):
+        return self._one("SELECT * FROM goals WHERE id = ? AND user_id = ?", (goal_id, user_id))
+
+    def create_goal(self, data):
+        return self._insert("goals", data)
+
+    def update_goal(self, user_id, goal_id, changes):
+        self._update("goals", user_id, goal_id, changes)
+
+    def delete_goal(self, user_id, goal_id):
+        self._execute("DELETE FROM goals WHERE id = ? AND user_id = ?", (goal_id, user_id))
+
+    # ---------------- BUDGETS ----------------
+    def list_budgets(self, user_id, month=None):
+        if month is None:
+            return self._all("SELECT * FROM budgets WHERE user_id = ? ORDER BY month DESC, category", (user_id,))
+        return self._all("SELECT * FROM budgets WHERE user_id = ? AND month = ? ORDER BY category", (user_id, month))
+
+    def get_budget(self, user_id, budget_id):
+        return self._one("SELECT * FROM budgets WHERE id = ? AND user_id = ?", (budget_id, user_id))
+
+    def create_budget(self, data):
+        return self._insert("budgets", data)
+
+    def update_budget(self, user_id, budget_id, changes):
+        self._update("budgets", user_id, budget_id, changes)
+
+    def delete_budget(self, user_id, budget_id):
+        self._execute("DELETE FROM budgets WHERE id = ? AND user_id = ?", (budget_id, user_id))
+
+    def add_budget_spend(self, user_id, category, month, delta):
+        # Single atomic statement, safe with several workers on one database.
+        # fetchall() so the statement runs to completion and releases its lock.
+        rows = self._all(
+            "UPDATE budgets SET spent = ROUND(spent + ?, 2) WHERE user_id = ? AND month = ? AND category = ? RETURNING *",
+            (delta, user_id, month, category),
+        )
+        return rows[0] if rows else None
+
+    def sum_expenses(self, user_id, category, month):
+        start, end = month_bounds(month)
+        row = self._one(
+            "SELECT COALESCE(SUM(amount), 0) AS total FROM transactions "
+            "WHERE user_id = ? AND date >= ? AND date < ? AND category = ? AND type = 'expense'",
+            (user_id, start, end, category),
+        )
+        return row["total"]
+
+    def create_budget_alert(self, data):
+        return self._insert("budget_alerts", data)
+
+    def list_budget_alerts(self, user_id, limit=50):
+        return self._all("SELECT * FROM budget_alerts WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit))
+
+    # ---------------- RECURRING SERIES ----------------
+    def list_recurring_series(self, user_id):
+        return self._all("SELECT * FROM recurring_series WHERE user_id = ? ORDER BY next_expected_date", (user_id,))
+
+    def get_recurring_series(self, user_id, series_key):
+        return self._one("SELECT * FROM recurring_series WHERE user_id = ? AND series_key = ?", (user_id, series_key))
+
+    def update_recurring_series(self, user_id, series_id, changes):
+        self._update("recurring_series", user_id, series_id, changes)
+
+    def replace_recurring_series(self, user_id, series):
+        columns = COLUMNS["recurring_series"]
+        sql = f"INSERT INTO recurring_series ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM recurring_series WHERE user_id = ?", (user_id,))
+                self.conn.executemany(sql, [[row[c] for c in columns] for row in series])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def save_recurring_series(self, user_id, series_key, series):
+        if series is None:
+            self._execute("DELETE FROM recurring_series WHERE user_id = ? AND series_key = ?", (user_id, series_key))
+            return
+        columns = COLUMNS["recurring_series"]
+        self._execute(
+            f"INSERT OR REPLACE INTO recurring_series ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [series[c] for c in columns],
+        )
+
+    # ---------------- STATEMENTS ----------------
+    def get_statement(self, user_id, account_id, month):
+        return self._one(
+            "SELECT * FROM statements WHERE account_id = ? AND month = ? AND user_id = ?", (account_id, month, user_id)
+        )
+
+    def list_statements(self, user_id, account_id=None):
+        if account_id is None:
+            return self._all("SELECT * FROM statements WHERE user_id = ? ORDER BY month DESC", (user_id,))
+        return self._all(
+            "SELECT * FROM statements WHERE account_id = ? AND user_id = ? ORDER BY month DESC", (account_id, user_id)
+        )
+
+    def save_statement(self, data):
+        columns = COLUMNS["statements"]
+        self._execute(
+            f"INSERT INTO statements ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            "ON CONFLICT (account_id, month) DO NOTHING",
+            [data[c] for c in columns],
+        )
+
+    def statement_account_ids(self, month, account_ids):
+        if not account_ids:
+            return []
+        rows = self._all(
+            f"SELECT account_id FROM statements WHERE account_id IN ({', '.join('?' * len(account_ids))}) AND month = ?",
+            [*account_ids, month],
+        )
+        return [row["account_id"] for row in rows]
+
+    # ---------------- SCHEDULED JOBS ----------------
+    def save_pending_job(self, name, job_key, run_at):
+        self._execute(
+            "INSERT INTO scheduled_jobs (name, job_key, run_at, created_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (name, job_key) DO UPDATE SET run_at = excluded.run_at",
+            (name, job_key, run_at, datetime.now(timezone.utc).isoformat()),
+        )
+
+    def claim_pending_job(self, name, job_key, run_at, lease_until):
+        rows = self._all(
+            "UPDATE scheduled_jobs SET run_at = ? WHERE name = ? AND job_key = ? AND run_at = ? RETURNING name",
+            (lease_until, name, job_key, run_at),
+        )
+        return bool(rows)
+
+    def complete_pending_job(self, name, job_key, lease_until):
+        self._execute(
+            "DELETE FROM scheduled_jobs WHERE name = ? AND job_key = ? AND run_at = ?",
+            (name, job_key, lease_until),
+        )
+
+    def list_pending_jobs(self, due_before=None):
+        if due_before is None:
+            return self._all("SELECT * FROM scheduled_jobs ORDER BY run_at")
+        return self._all("SELECT * FROM scheduled_jobs WHERE run_at <= ? ORDER BY run_at", (due_before,))
+
+    # ---------------- USER EVENTS ----------------
+    def append_event(self, data):
+        rows = self._all(
+            "INSERT INTO user_events (user_id, type, payload, origin, created_at) VALUES (?, ?, ?, ?, ?) RETURNING seq",
+            (data["user_id"], data["type"], data["payload"], data["origin"], data["created_at"]),
+        )
+        return rows[0]["seq"]
+
+    def list_events(self, after_seq, user_id=None, limit=500):
+        if user_id is None:
+            return self._all("SELECT * FROM user_events WHERE seq > ? ORDER BY seq LIMIT ?", (after_seq, limit))
+        return self._all(
+            "SELECT * FROM user_events WHERE user_id = ? AND seq > ? ORDER BY seq LIMIT ?", (user_id, after_seq, limit)
+        )
+
+    def oldest_event_seq(self):
+        return self._one("SELECT MIN(seq) AS seq FROM user_events")["seq"]
+
+    def latest_event_seq(self):
+        return self._one("SELECT COALESCE(MAX(seq), 0) AS seq FROM user_events")["seq"]
+
+    def user_version(self, user_id):
+        row = self._one("SELECT version FROM user_versions WHERE user_id = ?", (user_id,))
+        return row["version"] if row else 0
+
+    def delete_events_before(self, created_at):
+        self._execute("DELETE FROM user_events WHERE created_at < ?", (created_at,))
+
+    # ---------------- DASHBOARD ----------------
+    def count_user_rows(self, user_id):
+        return self._one(
+            "SELECT (SELECT COUNT(*) FROM accounts WHERE user_id = ? AND status = 'active') AS accounts, "
+            "(SELECT COUNT(*) FROM transactions WHERE user_id = ?) AS transactions, "
+            "(SELECT COUNT(*) FROM goals WHERE user_id = ?) AS goals",
+            (user_id, user_id, user_id),
+        )
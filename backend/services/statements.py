@@ -0,0 +1,133 @@
+import json
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+from services.account_removal import accepts_writes
+from services.budgets import current_month
+from services.storage import Storage, month_bounds
+
+logger = logging.getLogger(__name__)
+
+# ---------------- MONTHLY STATEMENTS ----------------
+# A statement covers one account for one YYYY-MM month: opening and closing
+# balance, income and expense totals and a per-category breakdown.
+#
+# An account's balance is the balance it was opened with, so a month opens at
+# that balance plus every earlier transaction on the account. When the
+# previous month's statement is stored its closing balance is used instead,
+# which keeps generation proportional to one month of rows.
+#
+# Rows are read in fixed-size keyset pages and folded into running totals, so
+# memory stays bounded by the page size and the number of categories, however
+# large the account is. Statements for closed months are stored once by the
+# month-close job and never rewritten.
+#
+# Statements are built from the live transactions, so only for active
+# accounts: archiving moves every row to archived_transactions. Statements
+# stored before that are kept.
+
+PAGE_SIZE = 500
+
+def previous_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year - 1:04d}-12" if mon == 1 else f"{year:04d}-{mon - 1:02d}"
+
+def is_closed(month: str) -> bool:
+    return month < current_month()
+
+def can_build(account: dict) -> bool:
+    return accepts_writes(account)
+
+def opening_balance(db: Storage, user_id: str, account: dict, month: str) -> float:
+    previous = db.get_statement(user_id, account["id"], previous_month(month))
+    if previous is not None:
+        return previous["closing_balance"]
+    start, _ = month_bounds(month)
+    return round(account["balance"] + db.account_net_before(user_id, account["id"], start), 2)
+
+def iter_transactions(db: Storage, user_id: str, account_id: str, month: str) -> Iterator[dict]:
+    start, end = month_bounds(month)
+    after = None
+    while True:
+        page = db.list_account_transactions(user_id, account_id, start, end, PAGE_SIZE, after)
+        yield from page
+        if len(page) < PAGE_SIZE:
+            return
+        after = (page[-1]["date"], page[-1]["id"])
+
+def statement_lines(db: Storage, user_id: str, account: dict, month: str) -> Iterator[Tuple[str, dict]]:
+    """Yield ("header", ...), one ("transaction", row) per row, then ("summary", statement)."""
+    opening = opening_balance(db, user_id, account, month)
+    yield "header", {"account_id": account["id"], "account_name": account["name"], "month": month, "opening_balance": opening}
+
+    income = expense = 0.0
+    count = 0
+    categories = defaultdict(lambda: {"income": 0.0, "expense": 0.0, "count": 0})
+    for txn in iter_transactions(db, user_id, account["id"], month):
+        count += 1
+        bucket = categories[txn["category"]]
+        bucket["count"] += 1
+        if txn["type"] in ("income", "expense"):
+            bucket[txn["type"]] += txn["amount"]
+            if txn["type"] == "income":
+                income += txn["amount"]
+            else:
+                expense += txn["amount"]
+        yield "transaction", txn
+
+    breakdown = sorted(
+        ({"category": name, "income": round(c["income"], 2), "expense": round(c["expense"], 2), "count": c["count"]}
+         for name, c in categories.items()),
+        key=lambda c: (-c["expense"], -c["income"], c["category"]),
+    )
+    yield "summary", {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "account_id": account["id"],
+        "month": month,
+        "opening_balance": opening,
+        "closing_balance": round(opening + income - expense, 2),
+        "total_income": round(income, 2),
+        "total_expense": round(expense, 2),
+        "transaction_count": count,
+        "categories": breakdown,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def build_statement(db: Storage, user_id: str, account: dict, month: str) -> dict:
+    for kind, item in statement_lines(db, user_id, account, month):
+        if kind == "summary":
+            return item
+
+def save_statement(db: Storage, statement: dict):
+    db.save_statement({**statement, "categories": json.dumps(statement["categories"])})
+
+def load_statement(row: Optional[dict]) -> Optional[dict]:
+    if row is None:
+        return None
+    return {**row, "categories": json.loads(row["categories"])}
+
+# ---------------- MONTH CLOSE ----------------
+def close_month(db: Storage, month: str = None) -> int:
+    """Store the statement of every account that lacks one for ``month``
+    (by default the month that most recently closed). Returns how many were written."""
+    month = month or previous_month(current_month())
+    _, end = month_bounds(month)
+    written = 0
+    after_id = ""
+    while True:
+        accounts = db.list_accounts_page(after_id, 200)
+        if not accounts:
+            break
+        after_id = accounts[-1]["id"]
+        done = set(db.statement_account_ids(month, [a["id"] for a in accounts]))
+        for account in accounts:
+            # Accounts opened after the month have nothing to report for it
+            if account["id"] in done or account["created_at"][:10] >= end or not can_build(account):
+                continue
+            save_statement(db, build_statement(db, account["user_id"], account, month))
+            written += 1
+    logger.info("Generated %d statements for %s", written, month)
+    return written
@@ -0,0 +1,292 @@
+import base64
+from typing import List, Optional, Tuple
+from config import settings
+
+# ---------------- STORAGE INTERFACE ----------------
+# Route handlers talk to this interface instead of a concrete database. Every
+# read and write is scoped by user_id so a backend can serve it from an index
+# on that column. Rows are plain dicts shaped like the API models.
+class Storage:
+    name = "base"
+
+    def close(self):
+        pass
+
+    # ---------------- USERS ----------------
+    def get_user(self, user_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def create_user(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    # ---------------- ACCOUNTS ----------------
+    def list_accounts(self, user_id: str, include_archived: bool = False) -> List[dict]:
+        """Active accounts, plus archived ones when asked; never ones being removed."""
+        raise NotImplementedError
+
+    def get_account(self, user_id: str, account_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def create_account(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    def update_account(self, user_id: str, account_id: str, changes: dict) -> None:
+        raise NotImplementedError
+
+    def delete_account(self, user_id: str, account_id: str) -> None:
+        raise NotImplementedError
+
+    def account_has_transactions(self, account_id: str) -> bool:
+        raise NotImplementedError
+
+    def count_account_transactions(self, user_id: str, account_id: str) -> int:
+        raise NotImplementedError
+
+    def remove_account_transactions(self, user_id: str, account_id: str, limit: int, archive: bool) -> List[dict]:
+        """Atomically remove up to ``limit`` of the account's transactions and
+        return them. Their net amount is added to the account balance, and
+        with ``archive`` they are moved to archived_transactions."""
+        raise NotImplementedError
+
+    def create_account_operation(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    def get_account_operation(self, operation_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def get_latest_account_operation(self, user_id: str, account_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def update_account_operation(self, operation_id: str, changes: dict) -> None:
+        raise NotImplementedError
+
+    def list_accounts_page(self, after_id: str = "", limit: int = 200) -> List[dict]:
+        """All users' accounts in id order, for background jobs."""
+        raise NotImplementedError
+
+    # ---------------- TRANSACTIONS ----------------
+    def list_transactions(self, user_id: str, limit: int = None, after: Tuple[str, str] = None) -> List[dict]:
+        """Newest first, ordered by (date DESC, id). ``after`` is the (date, id) of
+        the last row of the previous page."""
+        raise NotImplementedError
+
+    def get_transaction(self, user_id: str, transaction_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def list_transactions_by_amount(self, user_id: str, type: str, low: float, high: float) -> List[dict]:
+        """Transactions of one type whose absolute amount is within [low, high]."""
+        raise NotImplementedError
+
+    def search_transactions(self, user_id: str, terms: List[str], limit: int,
+                            after: Tuple[float, str, str] = None) -> List[dict]:
+        """Rows whose description or category has a word starting with every term.
+        Each row carries a ``rank``: 0 when every term is in the description, 1
+        otherwise. Ordered by (rank, date DESC, id); ``after`` is the
+        (rank, date, id) of the last row of the previous page."""
+        raise NotImplementedError
+
+    def list_account_transactions(self, user_id: str, account_id: str, start: str, end: str, limit: int,
+                                  after: Tuple[str, str] = None) -> List[dict]:
+        """One account's rows dated in [start, end), oldest first, ordered by
+        (date, id). ``after`` is the (date, id) of the last row already read."""
+        raise NotImplementedError
+
+    def monthly_totals(self, user_id: str, start: str, end: str) -> List[dict]:
+        """[{"month", "income", "expense"}] per YYYY-MM month with rows dated in
+        [start, end), oldest first."""
+        raise NotImplementedError
+
+    def account_net_before(self, user_id: str, account_id: str, date: str) -> float:
+        """Income minus expenses on one account, over rows dated before ``date``."""
+        raise NotImplementedError
+
+    def create_transaction(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    def update_transaction(self, user_id: str, transaction_id: str, changes: dict) -> None:
+        raise NotImplementedError
+
+    def delete_transaction(self, user_id: str, transaction_id: str) -> None:
+        raise NotImplementedError
+
+    # ---------------- GOALS ----------------
+    def list_goals(self, user_id: str) -> List[dict]:
+        raise NotImplementedError
+
+    def get_goal(self, user_id: str, goal_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def create_goal(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    def update_goal(self, user_id: str, goal_id: str, changes: dict) -> None:
+        raise NotImplementedError
+
+    def delete_goal(self, user_id: str, goal_id: str) -> None:
+        raise NotImplementedError
+
+    # ---------------- BUDGETS ----------------
+    def list_budgets(self, user_id: str, month: str = None) -> List[dict]:
+        raise NotImplementedError
+
+    def get_budget(self, user_id: str, budget_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def create_budget(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    def update_budget(self, user_id: str, budget_id: str, changes: dict) -> None:
+        raise NotImplementedError
+
+    def delete_budget(self, user_id: str, budget_id: str) -> None:
+        raise NotImplementedError
+
+    def add_budget_spend(self, user_id: str, category: str, month: str, delta: float) -> Optional[dict]:
+        """Add ``delta`` to the matching budget's spent and return the updated row,
+        or None when the user has no budget for that category and month."""
+        raise NotImplementedError
+
+    def sum_expenses(self, user_id: str, category: str, month: str) -> float:
+        """Total expense amount in one category for a YYYY-MM month."""
+        raise NotImplementedError
+
+    def create_budget_alert(self, data: dict) -> dict:
+        raise NotImplementedError
+
+    def list_budget_alerts(self, user_id: str, limit: int = 50) -> List[dict]:
+        raise NotImplementedError
+
+    # ---------------- RECURRING SERIES ----------------
+    def list_recurring_series(self, user_id: str) -> List[dict]:
+        raise NotImplementedError
+
+    def get_recurring_series(self, user_id: str, series_key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def update_recurring_series(self, user_id: str, series_id: str, changes: dict) -> None:
+        raise NotImplementedError
+
+    def replace_recurring_series(self, user_id: str, series: List[dict]) -> None:
+        """Swap the user's stored series for a fresh detection result, atomically."""
+        raise NotImplementedError
+
+    def save_recurring_series(self, user_id: str, series_key: str, series: Optional[dict]) -> None:
+        """Store the series for one key, or remove it when series is None."""
+        raise NotImplementedError
+
+    # ---------------- STATEMENTS ----------------
+    def get_statement(self, user_id: str, account_id: str, month: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def list_statements(self, user_id: str, account_id: str = None) -> List[dict]:
+        """Newest month first."""
+        raise NotImplementedError
+
+    def save_statement(self, data: dict) -> None:
+        """Store a statement unless the account already has one for that month."""
+        raise NotImplementedError
+
+    def statement_account_ids(self, month: str, account_ids: List[str]) -> List[str]:
+        """Which of ``account_ids`` already have a statement for ``month``."""
+        raise NotImplementedError
+
+    # ---------------- SCHEDULED JOBS ----------------
+    def save_pending_job(self, name: str, job_key: str, run_at: str) -> None:
+        """Insert or move the pending (name, job_key) job to ``run_at``."""
+        raise NotImplementedError
+
+    def claim_pending_job(self, name: str, job_key: str, run_at: str, lease_until: str) -> bool:
+        """Move the job to ``lease_until`` if it is still due at ``run_at``; True if this caller won it."""
+        raise NotImplementedError
+
+    def complete_pending_job(self, name: str, job_key: str, lease_until: str) -> None:
+        """Delete the job unless it was rescheduled after being claimed."""
+        raise NotImplementedError
+
+    def list_pending_jobs(self, due_before: str = None) -> List[dict]:
+        """Stored jobs, oldest run_at first; only those due by ``due_before`` if given."""
+        raise NotImplementedError
+
+    # ---------------- USER EVENTS ----------------
+    def append_event(self, data: dict) -> int:
+        """Store a change event and return its ``seq`` (increasing, the SSE event id)."""
+        raise NotImplementedError
+
+    def list_events(self, after_seq: int, user_id: str = None, limit: int = 500) -> List[dict]:
+        """Events with seq > ``after_seq`` in seq order, optionally for one user."""
+        raise NotImplementedError
+
+    def oldest_event_seq(self) -> Optional[int]:
+        """Lowest stored seq over all users, or None when no events are stored."""
+        raise NotImplementedError
+
+    def latest_event_seq(self) -> int:
+        """Highest stored seq (0 when there is none)."""
+        raise NotImplementedError
+
+    def user_version(self, user_id: str) -> int:
+        """Seq of the user's latest change event (0 before the first one).
+
+        Kept when the events themselves are pruned, so it never goes back.
+        """
+        raise NotImplementedError
+
+    def delete_events_before(self, created_at: str) -> None:
+        raise NotImplementedError
+
+    # ---------------- DASHBOARD ----------------
+    def count_user_rows(self, user_id: str) -> dict:
+        """Return {"accounts": n, "transactions": n, "goals": n} for a user (active accounts only)."""
+        raise NotImplementedError
+
+def month_bounds(month: str) -> Tuple[str, str]:
+    """[start, end) date strings for a YYYY-MM month, comparable with ISO dates."""
+    year, mon = int(month[:4]), int(month[5:7])
+    following = f"{year + 1:04d}-01" if mon == 12 else f"{year:04d}-{mon + 1:02d}"
+    return f"{month}-01", f"{following}-01"
+
+# ---------------- KEYSET CURSORS ----------------
+# Opaque page cursor: the sort key of the last row the client has seen
+def encode_cursor(row: dict, fields: Tuple[str, ...] = ("date", "id")) -> str:
+    return base64.urlsafe_b64encode("|".join(str(row[f]) for f in fields).encode()).decode()
+
+def decode_cursor(cursor: str, parts: int = 2) -> Tuple[str, ...]:
+    try:
+        values = tuple(base64.urlsafe_b64decode(cursor.encode()).decode().split("|", parts - 1))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if len(values) != parts:
+        raise ValueError("Invalid cursor")
+    return values
+
+# ---------------- BACKEND SELECTION ----------------
+# One storage instance per worker process, opened by the app lifespan.
+_storage: Optional[Storage] = None
+
+def create_storage(backend: str = None) -> Storage:
+    backend = (backend or settings.STORAGE_BACKEND).lower()
+    if backend == "sqlite":
+        from services.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(settings.SQLITE_PATH)
+    if backend == "supabase":
+        from services.supabase_service import SupabaseStorage
+        return SupabaseStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+def init_storage() -> Storage:
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
+
+def get_storage() -> Storage:
+    return _storage if _storage is not None else init_storage()
+
+def close_storage():
+    global _storage
+    if _storage is not None:
+        _storage.close()
+    _storage = None
@@ -1,7 +1,8 @@
-from supabase import create_client
 import os
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from pathlib import Path
+from services.storage import Storage, month_bounds
 
 # ---------------- ENV ----------------
 ROOT_DIR = Path(__file__).parent.parent
@@ -9,22 +10,352 @@ load_dotenv(ROOT_DIR / ".env")
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-# ---------------- USERS ----------------
-async def get_user_by_email(email: str):
-    result = supabase.table("users").select("*").eq("email", email).execute()
-    return result.data[0] if result.data else None
+# Rows per request; PostgREST's default max-rows, which truncates larger responses
+PAGE_SIZE = 1000
 
-async def create_user(email: str, hashed_password: str):
-    result = supabase.table("users").insert({"email": email, "password": hashed_password}).execute()
-    return result.data[0] if result.data else None
+# ---------------- CLIENT ----------------
+# The supabase package is slow to import, so neither the import nor the client
+# is created until the app lifespan (or the first caller) asks for it.
+_client = None
 
-# ---------------- ACCOUNTS ----------------
-async def get_user_accounts(user_id: str):
-    result = supabase.table("accounts").select("*").eq("user_id", user_id).execute()
-    return result.data if result.data else []
+def init_client():
+    global _client
+    if _client is None:
+        from supabase import create_client
+        _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _client
 
-async def create_account(account_data: dict):
-    result = supabase.table("accounts").insert(account_data).execute()
-    return result.data[0] if result.data else None
+def get_client():
+    return _client if _client is not None else init_client()
+
+def close_client():
+    global _client
+    _client = None
+
+# ---------------- STORAGE ----------------
+class SupabaseStorage(Storage):
+    name = "supabase"
+
+    def __init__(self):
+        self.client = init_client()
+
+    def close(self):
+        close_client()
+
+    def _first(self, result):
+        return result.data[0] if result.data else None
+
+    def _get(self, table: str, user_id: str, row_id: str, columns: str = "*"):
+        return self._first(self.client.table(table).select(columns).eq("id", row_id).eq("user_id", user_id).execute())
+
+    def _list(self, table: str, user_id: str):
+        return self.client.table(table).select("*").eq("user_id", user_id).execute().data or []
+
+    def _insert(self, table: str, data: dict):
+        return self._first(self.client.table(table).insert(data).execute()) or data
+
+    def _update(self, table: str, user_id: str, row_id: str, changes: dict):
+        self.client.table(table).update(changes).eq("id", row_id).eq("user_id", user_id).execute()
+
+    def _delete(self, table: str, user_id: str, row_id: str):
+        self.client.table(table).delete().eq("id", row_id).eq("user_id", user_id).execute()
+
+    def _count(self, table: str, user_id: str) -> int:
+        return self.client.table(table).select("id", count="exact", head=True).eq("user_id", user_id).execute().count or 0
+
+    # ---------------- USERS ----------------
+    def get_user(self, user_id):
+        return self._first(self.client.table("users").select("id,name,email,created_at").eq("id", user_id).execute())
+
+    def get_user_by_email(self, email):
+        return self._first(self.client.table("users").select("*").eq("email", email).execute())
+
+    def create_user(self, data):
+        return self._insert("users", data)
+
+    # ---------------- ACCOUNTS ----------------
+    def list_accounts(self, user_id, include_archived=False):
+        statuses = ["active", "archived"] if include_archived else ["active"]
+        return self.client.table("accounts").select("*").eq("user_id", user_id).in_("status", statuses).execute().data or []
+
+    def get_account(self, user_id, account_id):
+        return self._get("accounts", user_id, account_id)
+
+    def create_account(self, data):
+        return self._insert("accounts", data)
+
+    def update_account(self, user_id, account_id, changes):
+        self._update("accounts", user_id, account_id, changes)
+
+    def delete_account(self, user_id, account_id):
+        self._delete("accounts", user_id, account_id)
+
+    def account_has_transactions(self, account_id):
+        result = self.client.table("transactions").select("id").eq("account_id", account_id).limit(1).execute()
+        return bool(result.data)
+
+    def count_account_transactions(self, user_id, account_id):
+        return (
+            self.client.table("transactions").select("id", count="exact", head=True)
+            .eq("account_id", account_id).eq("user_id", user_id).execute().count or 0
+        )
+
+    def remove_account_transactions(self, user_id, account_id, limit, archive):
+        # remove_account_transactions() SQL function from migration 0008 (one atomic chunk)
+        params = {"p_user_id": user_id, "p_account_id": account_id, "p_limit": limit, "p_archive": archive}
+        return self.client.rpc("remove_account_transactions", params).execute().data or []
+
+    def create_account_operation(self, data):
+        return self._insert("account_operations", data)
+
+    def get_account_operation(self, operation_id):
+        return self._first(self.client.table("account_operations").select("*").eq("id", operation_id).execute())
+
+    def get_latest_account_operation(self, user_id, account_id):
+        return self._first(
+            self.client.table("account_operations").select("*").eq("account_id", account_id).eq("user_id", user_id)
+            .order("created_at", desc=True).limit(1).execute()
+        )
+
+    def update_account_operation(self, operation_id, changes):
+        self.client.table("account_operations").update(changes).eq("id", operation_id).execute()
+
+    def list_accounts_page(self, after_id="", limit=200):
+        return self.client.table("accounts").select("*").gt("id", after_id).order("id").limit(limit).execute().data or []
+
+    # ---------------- TRANSACTIONS ----------------
+    def list_transactions(self, user_id, limit=None, after=None):
+        if limit is None:
+            # PostgREST caps a response at PAGE_SIZE rows, so walk the keyset
+            rows = []
+            while True:
+                page = self.list_transactions(user_id, PAGE_SIZE, after)
+                rows.extend(page)
+                if len(page) < PAGE_SIZE:
+                    return rows
+                after = (page[-1]["date"], page[-1]["id"])
+        query = self.client.table("transactions").select("*").eq("user_id", user_id)
+        if after is not None:
+            date, txn_id = after
+            query = query.or_(f'date.lt."{date}",and(date.eq."{date}",id.gt."{txn_id}")')
+        return query.order("date", desc=True).order("id").limit(limit).execute().data or []
+
+    def get_transaction(self, user_id, transaction_id):
+        return self._get("transactions", user_id, transaction_id)
+
+    def list_transactions_by_amount(self, user_id, type, low, high):
+        rows, last_id = [], ""
+        while True:
+            page = (
+                self.client.table("transactions").select("*").eq("user_id", user_id).eq("type", type)
+                .or_(f"and(amount.gte.{low},amount.lte.{high}),and(amount.gte.{-high},amount.lte.{-low})")
+                .gt("id", last_id).order("id").limit(PAGE_SIZE).execute().data or []
+            )
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+            last_id = page[-1]["id"]
+
+    def search_transactions(self, user_id, terms, limit, after=None):
+        # search_transactions() SQL function from migration 0015 (tiered, keyset paged)
+        after_rank, after_date, after_id = after if after is not None else (None, None, None)
+        params = {
+            "p_user_id": user_id,
+            "p_terms": terms,
+            "p_limit": limit,
+            "p_after_rank": after_rank,
+            "p_after_date": after_date,
+            "p_after_id": after_id,
+        }
+        return self.client.rpc("search_transactions", params).execute().data or []
+
+    def list_account_transactions(self, user_id, account_id, start, end, limit, after=None):
+        query = (
+            self.client.table("transactions").select("*").eq("account_id", account_id).eq("user_id", user_id)
+            .gte("date", start).lt("date", end)
+        )
+        if after is not None:
+            date, txn_id = after
+            query = query.or_(f'date.gt."{date}",and(date.eq."{date}",id.gt."{txn_id}")')
+        return query.order("date").order("id").limit(limit).execute().data or []
+
+    def monthly_totals(self, user_id, start, end):
+        # monthly_totals() SQL function from migration 0013 (GROUP BY month in the database)
+        params = {"p_user_id": user_id, "p_start": start, "p_end": end}
+        return self.client.rpc("monthly_totals", params).execute().data or []
+
+    def account_net_before(self, user_id, account_id, date):
+        # account_net_before() SQL function from migration 0011 (aggregated in the database)
+        params = {"p_user_id": user_id, "p_account_id": account_id, "p_date": date}
+        return self.client.rpc("account_net_before", params).execute().data or 0.0
+
+    def create_transaction(self, data):
+        return self._insert("transactions", data)
+
+    def update_transaction(self, user_id, transaction_id, changes):
+        self._update("transactions", user_id, transaction_id, changes)
+
+    def delete_transaction(self, user_id, transaction_id):
+        self._delete("transactions", user_id, transaction_id)
+
+    # ---------------- GOALS ----------------
+    def list_goals(self, user_id):
+        return self._list("goals", user_id)
+
+    def get_goal(self, user_id, goal_id):
+        return self._get("goals", user_id, goal_id)
+
+    def create_goal(self, data):
+        return self._insert("goals", data)
+
+    def update_goal(self, user_id, goal_id, changes):
+        self._update("goals", user_id, goal_id, changes)
+
+    def delete_goal(self, user_id, goal_id):
+        self._delete("goals", user_id, goal_id)
+
+    # ---------------- BUDGETS ----------------
+    def list_budgets(self, user_id, month=None):
+        query = self.client.table("budgets").select("*").eq("user_id", user_id)
+        if month is not None:
+            query = query.eq("month", month)
+        return query.order("month", desc=True).order("category").execute().data or []
+
+    def get_budget(self, user_id, budget_id):
+        return self._get("budgets", user_id, budget_id)
+
+    def create_budget(self, data):
+        return self._insert("budgets", data)
+
+    def update_budget(self, user_id, budget_id, changes):
+        self._update("budgets", user_id, budget_id, changes)
+
+    def delete_budget(self, user_id, budget_id):
+        self._delete("budgets", user_id, budget_id)
+
+    def add_budget_spend(self, user_id, category, month, delta):
+        # add_budget_spend() SQL function from migration 0009 (one atomic UPDATE ... RETURNING)
+        params = {"p_user_id": user_id, "p_category": category, "p_month": month, "p_delta": delta}
+        rows = self.client.rpc("add_budget_spend", params).execute().data or []
+        return rows[0] if rows else None
+
+    def sum_expenses(self, user_id, category, month):
+        # sum_expenses() SQL function from migration 0017 (SUM in the database)
+        start, end = month_bounds(month)
+        params = {"p_user_id": user_id, "p_category": category, "p_start": start, "p_end": end}
+        return self.client.rpc("sum_expenses", params).execute().data or 0.0
+
+    def create_budget_alert(self, data):
+        return self._insert("budget_alerts", data)
+
+    def list_budget_alerts(self, user_id, limit=50):
+        return (
+            self.client.table("budget_alerts").select("*").eq("user_id", user_id)
+            .order("created_at", desc=True).limit(limit).execute().data or []
+        )
+
+    # ---------------- RECURRING SERIES ----------------
+    def list_recurring_series(self, user_id):
+        return (
+            self.client.table("recurring_series").select("*").eq("user_id", user_id)
+            .order("next_expected_date").execute().data or []
+        )
+
+    def get_recurring_series(self, user_id, series_key):
+        return self._first(
+            self.client.table("recurring_series").select("*").eq("user_id", user_id).eq("series_key", series_key).execute()
+        )
+
+    def update_recurring_series(self, user_id, series_id, changes):
+        self._update("recurring_series", user_id, series_id, changes)
+
+    def replace_recurring_series(self, user_id, series):
+        # replace_recurring_series() SQL function from migration 0016: one transaction
+        self.client.rpc("replace_recurring_series", {"p_user_id": user_id, "p_series": series}).execute()
+
+    def save_recurring_series(self, user_id, series_key, series):
+        table = self.client.table("recurring_series")
+        if series is None:
+            table.delete().eq("user_id", user_id).eq("series_key", series_key).execute()
+        else:
+            table.upsert(series, on_conflict="user_id,series_key").execute()
+
+    # ---------------- STATEMENTS ----------------
+    def get_statement(self, user_id, account_id, month):
+        return self._first(
+            self.client.table("statements").select("*").eq("account_id", account_id).eq("month", month)
+            .eq("user_id", user_id).execute()
+        )
+
+    def list_statements(self, user_id, account_id=None):
+        query = self.client.table("statements").select("*").eq("user_id", user_id)
+        if account_id is not None:
+            query = query.eq("account_id", account_id)
+        return query.order("month", desc=True).execute().data or []
+
+    def save_statement(self, data):
+        self.client.table("statements").upsert(data, on_conflict="account_id,month", ignore_duplicates=True).execute()
+
+    def statement_account_ids(self, month, account_ids):
+        if not account_ids:
+            return []
+        rows = self.client.table("statements").select("account_id").eq("month", month).in_("account_id", account_ids).execute().data or []
+        return [row["account_id"] for row in rows]
+
+    # ---------------- SCHEDULED JOBS ----------------
+    def save_pending_job(self, name, job_key, run_at):
+        self.client.table("scheduled_jobs").upsert(
+            {"name": name, "job_key": job_key, "run_at": run_at, "created_at": datetime.now(timezone.utc).isoformat()},
+            on_conflict="name,job_key",
+        ).execute()
+
+    def claim_pending_job(self, name, job_key, run_at, lease_until):
+        result = (
+            self.client.table("scheduled_jobs").update({"run_at": lease_until})
+            .eq("name", name).eq("job_key", job_key).eq("run_at", run_at).execute()
+        )
+        return bool(result.data)
+
+    def complete_pending_job(self, name, job_key, lease_until):
+        self.client.table("scheduled_jobs").delete().eq("name", name).eq("job_key", job_key).eq("run_at", lease_until).execute()
+
+    def list_pending_jobs(self, due_before=None):
+        query = self.client.table("scheduled_jobs").select("*")
+        if due_before is not None:
+            query = query.lte("run_at", due_before)
+        return query.order("run_at").execute().data or []
+
+    # ---------------- USER EVENTS ----------------
+    def append_event(self, data):
+        return self._first(self.client.table("user_events").insert(data).execute())["seq"]
+
+    def list_events(self, after_seq, user_id=None, limit=500):
+        query = self.client.table("user_events").select("*")
+        if user_id is not None:
+            query = query.eq("user_id", user_id)
+        return query.gt("seq", after_seq).order("seq").limit(limit).execute().data or []
+
+    def oldest_event_seq(self):
+        row = self._first(self.client.table("user_events").select("seq").order("seq").limit(1).execute())
+        return row["seq"] if row else None
+
+    def latest_event_seq(self):
+        latest = self._first(self.client.table("user_events").select("seq").order("seq", desc=True).limit(1).execute())
+        return latest["seq"] if latest else 0
+
+    def user_version(self, user_id):
+        row = self._first(self.client.table("user_versions").select("version").eq("user_id", user_id).execute())
+        return row["version"] if row else 0
+
+    def delete_events_before(self, created_at):
+        self.client.table("user_events").delete().lt("created_at", created_at).execute()
+
+    # ---------------- DASHBOARD ----------------
+    def count_user_rows(self, user_id):
+        counts = {table: self._count(table, user_id) for table in ("transactions", "goals")}
+        counts["accounts"] = (
+            self.client.table("accounts").select("id", count="exact", head=True)
+            .eq("user_id", user_id).eq("status", "active").execute().count or 0
+        )
+        return counts
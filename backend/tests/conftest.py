@@ -0,0 +1,62 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Run the app against the embedded backend; nothing here talks to Supabase
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+@pytest.fixture
+def storage():
+    from services.sqlite_storage import SQLiteStorage
+    db = SQLiteStorage(":memory:")
+    yield db
+    db.close()
+
+@pytest.fixture
+def client(storage, monkeypatch):
+    from fastapi.testclient import TestClient
+    from services import storage as storage_module
+    from server import app
+    # The lifespan and background jobs pick up the already-open test database
+    monkeypatch.setattr(storage_module, "_storage", storage)
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post("/api/auth/signup", json={"name": "Test", "email": "test@example.com", "password": "testpassword123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    """A Postgres server: TEST_DATABASE_URL, or a throwaway container (needs Docker)."""
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        yield url
+        return
+    try:
+        from testcontainers.postgres import PostgresContainer
+        container = PostgresContainer("postgres:16", driver=None).start()
+    except Exception as exc:
+        pytest.skip(f"No Postgres to test against (set TEST_DATABASE_URL or run Docker): {exc}")
+    yield container.get_connection_url()
+    container.stop()
+
+@pytest.fixture
+def postgres(postgres_url):
+    """A connection to a new, empty database on the Postgres server."""
+    psycopg = pytest.importorskip("psycopg")
+    name = f"budgetiq_test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(postgres_url, autocommit=True) as admin:
+        admin.execute(f"CREATE DATABASE {name}")
+    conn = psycopg.connect(psycopg.conninfo.make_conninfo(postgres_url, dbname=name))
+    yield conn
+    conn.close()
+    with psycopg.connect(postgres_url, autocommit=True) as admin:
+        admin.execute(f"DROP DATABASE {name}")
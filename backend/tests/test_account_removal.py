@@ -0,0 +1,173 @@
+import time
+import uuid
+
+import pytest
+
+from services import account_removal, events
+
+def _seed(storage, user_id="user-1", rows=12):
+    account = storage.create_account({
+        "id": str(uuid.uuid4()), "user_id": user_id, "name": "Old card", "type": "credit", "balance": 100.0,
+        "created_at": "2024-01-01T00:00:00+00:00",
+    })
+    storage.create_budget({
+        "id": str(uuid.uuid4()), "user_id": user_id, "category": "food", "month": "2025-01", "amount": 1000.0,
+        "spent": 10.0 * rows, "alert_threshold": 0.8, "created_at": "2025-01-01",
+    })
+    for i in range(rows):
+        storage.create_transaction({
+            "id": f"t{i:03d}", "user_id": user_id, "account_id": account["id"], "type": "expense", "amount": 10.0,
+            "category": "food", "description": "Lunch", "date": f"2025-01-{i % 28 + 1:02d}", "created_at": "2025-01-01",
+        })
+    return account
+
+def test_cascade_deletes_in_chunks_and_fixes_budgets(storage, monkeypatch):
+    monkeypatch.setattr(account_removal, "CHUNK_SIZE", 5)
+    account = _seed(storage)
+    operation = account_removal.start(storage, "user-1", account, account_removal.CASCADE)
+    assert storage.list_accounts("user-1") == []
+
+    result = account_removal.run(storage, operation["id"])
+    assert (result["status"], result["processed"], result["total"]) == ("completed", 12, 12)
+    assert result["closing_balance"] == -20.0
+    assert storage.get_account("user-1", account["id"]) is None
+    assert storage.count_account_transactions("user-1", account["id"]) == 0
+    assert storage.list_budgets("user-1")[0]["spent"] == 0
+    progress = [e for e in storage.list_events(0, user_id="user-1") if e["type"] == events.ACCOUNT_OPERATION]
+    # running, three chunks, completed
+    assert len(progress) == 5
+
+def test_archive_moves_rows_and_keeps_the_balance(storage):
+    account = _seed(storage)
+    operation = account_removal.start(storage, "user-1", account, account_removal.ARCHIVE)
+    account_removal.run(storage, operation["id"])
+
+    archived = storage.get_account("user-1", account["id"])
+    assert archived["status"] == "archived" and archived["archived_at"]
+    assert archived["balance"] == -20.0
+    assert storage.list_accounts("user-1") == []
+    assert [a["id"] for a in storage.list_accounts("user-1", include_archived=True)] == [account["id"]]
+    moved = storage.conn.execute("SELECT COUNT(*) AS n FROM archived_transactions WHERE account_id = ?", (account["id"],)).fetchone()
+    assert moved["n"] == 12
+    # Running again is a no-op
+    assert account_removal.run(storage, operation["id"])["status"] == "completed"
+
+class WorkerDied(BaseException):
+    """Stops a run the way a killed worker does: no failure is recorded."""
+
+def test_resumed_runs_keep_the_closing_balance(storage, monkeypatch):
+    monkeypatch.setattr(account_removal, "CHUNK_SIZE", 5)
+    remove = storage.remove_account_transactions
+    for mode in account_removal.MODES:
+        account = _seed(storage, user_id=f"user-{mode}")
+        operation = account_removal.start(storage, account["user_id"], account, mode)
+        calls = []
+
+        def dies_after_one_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise WorkerDied()
+            return remove(*args)
+
+        monkeypatch.setattr(storage, "remove_account_transactions", dies_after_one_chunk)
+        with pytest.raises(WorkerDied):
+            account_removal.run(storage, operation["id"])
+        assert storage.get_account_operation(operation["id"])["status"] == "running"
+
+        monkeypatch.setattr(storage, "remove_account_transactions", remove)
+        result = account_removal.run(storage, operation["id"])
+        assert (result["status"], result["processed"], result["closing_balance"]) == ("completed", 12, -20.0)
+
+def test_cascade_resumed_after_deleting_the_account(storage, monkeypatch):
+    account = _seed(storage)
+    operation = account_removal.start(storage, "user-1", account, account_removal.CASCADE)
+    delete_account = storage.delete_account
+
+    def dies_after_delete(user_id, account_id):
+        delete_account(user_id, account_id)
+        raise WorkerDied()
+
+    monkeypatch.setattr(storage, "delete_account", dies_after_delete)
+    with pytest.raises(WorkerDied):
+        account_removal.run(storage, operation["id"])
+    monkeypatch.setattr(storage, "delete_account", delete_account)
+    result = account_removal.run(storage, operation["id"])
+    assert (result["status"], result["processed"], result["closing_balance"]) == ("completed", 12, -20.0)
+
+def test_delete_endpoint_modes(client, auth_headers):
+    account = client.post("/api/accounts", json={"name": "Main", "type": "bank", "balance": 100}, headers=auth_headers).json()
+    client.post("/api/transactions", json={
+        "account_id": account["id"], "type": "expense", "amount": 5, "category": "food", "description": "Tea", "date": "2025-01-05",
+    }, headers=auth_headers)
+
+    refused = client.delete(f"/api/accounts/{account['id']}", headers=auth_headers)
+    assert refused.status_code == 400
+
+    started = client.delete(f"/api/accounts/{account['id']}?mode=cascade", headers=auth_headers)
+    assert started.status_code == 202
+    operation_id = started.json()["operation"]["id"]
+    for _ in range(200):
+        operation = client.get(f"/api/accounts/operations/{operation_id}", headers=auth_headers).json()
+        if operation["status"] == "completed":
+            break
+        time.sleep(0.01)
+    assert operation["status"] == "completed"
+    assert client.get("/api/accounts", headers=auth_headers).json() == []
+
+def test_rows_written_as_removal_starts_are_swept_up(storage, monkeypatch):
+    account = _seed(storage)
+    operation = account_removal.start(storage, "user-1", account, account_removal.CASCADE)
+    delete_account = storage.delete_account
+
+    def late_write_then_delete(user_id, account_id):
+        # A request that checked the account just before removal started
+        storage.create_transaction({
+            "id": "late", "user_id": user_id, "account_id": account_id, "type": "expense", "amount": 10.0,
+            "category": "food", "description": "Lunch", "date": "2025-01-30", "created_at": "2025-01-30",
+        })
+        delete_account(user_id, account_id)
+
+    monkeypatch.setattr(storage, "delete_account", late_write_then_delete)
+    result = account_removal.run(storage, operation["id"])
+    assert result["processed"] == 13
+    assert storage.count_account_transactions("user-1", account["id"]) == 0
+
+def test_accounts_being_removed_take_no_writes(client, auth_headers, storage):
+    account = client.post("/api/accounts", json={"name": "Main", "type": "bank", "balance": 100}, headers=auth_headers).json()
+    other = client.post("/api/accounts", json={"name": "Spare", "type": "bank", "balance": 0}, headers=auth_headers).json()
+    txn = client.post("/api/transactions", json={
+        "account_id": other["id"], "type": "expense", "amount": 5, "category": "food", "description": "Tea", "date": "2025-01-05",
+    }, headers=auth_headers).json()
+    account_removal.start(storage, account["user_id"], storage.get_account(account["user_id"], account["id"]), account_removal.CASCADE)
+
+    created = client.post("/api/transactions", json={
+        "account_id": account["id"], "type": "expense", "amount": 5, "category": "food", "description": "Tea", "date": "2025-01-06",
+    }, headers=auth_headers)
+    assert created.status_code == 409
+    moved = client.put(f"/api/transactions/{txn['id']}", json={
+        "account_id": account["id"], "type": None, "amount": None, "category": None, "description": None, "date": None,
+    }, headers=auth_headers)
+    assert moved.status_code == 409
+    assert storage.count_account_transactions(account["user_id"], account["id"]) == 0
+
+def test_stale_running_operation_is_resumed(client, auth_headers, storage):
+    account = client.post("/api/accounts", json={"name": "Main", "type": "bank", "balance": 100}, headers=auth_headers).json()
+    operation = account_removal.start(storage, account["user_id"], storage.get_account(account["user_id"], account["id"]), account_removal.CASCADE)
+    # The worker running it died a lease ago
+    storage.update_account_operation(operation["id"], {"status": "running", "updated_at": "2025-01-01T00:00:00+00:00"})
+
+    resumed = client.delete(f"/api/accounts/{account['id']}?mode=cascade", headers=auth_headers)
+    assert resumed.status_code == 202
+    assert resumed.json()["operation"]["id"] == operation["id"]
+    for _ in range(200):
+        current = client.get(f"/api/accounts/operations/{operation['id']}", headers=auth_headers).json()
+        if current["status"] == "completed":
+            break
+        time.sleep(0.01)
+    assert current["status"] == "completed"
+    assert storage.get_account(account["user_id"], account["id"]) is None
+
+    # A fresh operation is still refused while it runs
+    other = client.post("/api/accounts", json={"name": "Spare", "type": "bank", "balance": 0}, headers=auth_headers).json()
+    account_removal.start(storage, other["user_id"], storage.get_account(other["user_id"], other["id"]), account_removal.ARCHIVE)
+    assert client.delete(f"/api/accounts/{other['id']}?mode=archive", headers=auth_headers).status_code == 409
@@ -0,0 +1,60 @@
+import pytest
+
+@pytest.fixture
+def account_id(client, auth_headers):
+    return client.post("/api/accounts", json={"name": "Main", "type": "checking", "balance": 1000.0}, headers=auth_headers).json()["id"]
+
+def _expense(client, headers, account_id, amount, category="food", date="2025-03-10"):
+    return client.post("/api/transactions", json={
+        "account_id": account_id, "type": "expense", "amount": amount,
+        "category": category, "description": "Groceries", "date": date,
+    }, headers=headers).json()
+
+def _status(client, headers, month="2025-03"):
+    return {b["category"]: b for b in client.get("/api/budgets/status", params={"month": month}, headers=headers).json()}
+
+def test_budget_seeded_from_existing_spend(client, auth_headers, account_id):
+    _expense(client, auth_headers, account_id, 40.0)
+    _expense(client, auth_headers, account_id, 15.0, date="2025-02-28")
+    budget = client.post("/api/budgets", json={"category": "food", "month": "2025-03", "amount": 200.0}, headers=auth_headers).json()
+    assert budget["spent"] == 40.0
+
+def test_spend_follows_transaction_writes(client, auth_headers, account_id):
+    client.post("/api/budgets", json={"category": "food", "month": "2025-03", "amount": 100.0}, headers=auth_headers)
+    txn = _expense(client, auth_headers, account_id, 30.0)
+    _expense(client, auth_headers, account_id, 99.0, category="rent")
+    assert _status(client, auth_headers)["food"]["spent"] == 30.0
+
+    # Moving the expense to another month takes the spend with it
+    client.put(f"/api/transactions/{txn['id']}", json={**txn, "date": "2025-04-01"}, headers=auth_headers)
+    assert _status(client, auth_headers)["food"]["spent"] == 0.0
+
+    client.put(f"/api/transactions/{txn['id']}", json={**txn, "amount": 45.5}, headers=auth_headers)
+    assert _status(client, auth_headers)["food"]["spent"] == 45.5
+
+    client.delete(f"/api/transactions/{txn['id']}", headers=auth_headers)
+    status = _status(client, auth_headers)["food"]
+    assert status["spent"] == 0.0
+    assert status["remaining"] == 100.0
+
+def test_alerts_fire_once_per_crossing(client, auth_headers, account_id):
+    client.post("/api/budgets", json={"category": "food", "month": "2025-03", "amount": 100.0, "alert_threshold": 0.5}, headers=auth_headers)
+    _expense(client, auth_headers, account_id, 60.0)
+    _expense(client, auth_headers, account_id, 10.0)
+    assert [a["level"] for a in client.get("/api/budgets/alerts", headers=auth_headers).json()] == ["warning"]
+
+    last = _expense(client, auth_headers, account_id, 35.0)
+    assert _status(client, auth_headers)["food"]["status"] == "exceeded"
+    levels = [a["level"] for a in client.get("/api/budgets/alerts", headers=auth_headers).json()]
+    assert sorted(levels) == ["exceeded", "warning"]
+
+    # Dropping back under the limit re-arms the exceeded alert
+    client.delete(f"/api/transactions/{last['id']}", headers=auth_headers)
+    _expense(client, auth_headers, account_id, 35.0)
+    assert len(client.get("/api/budgets/alerts", headers=auth_headers).json()) == 3
+
+def test_duplicate_budget_rejected(client, auth_headers):
+    payload = {"category": "food", "month": "2025-03", "amount": 100.0}
+    assert client.post("/api/budgets", json=payload, headers=auth_headers).status_code == 200
+    assert client.post("/api/budgets", json=payload, headers=auth_headers).status_code == 400
+    assert client.post("/api/budgets", json={**payload, "month": "2025-13"}, headers=auth_headers).status_code == 422
@@ -0,0 +1,67 @@
+import gzip
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import CompressionMiddleware
+
+ROWS = [{"id": f"t{i}", "category": "food", "description": "Groceries", "amount": 12.5} for i in range(200)]
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return JSONResponse(ROWS, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream(rows: int = 200):
+        return StreamingResponse((json.dumps(r) + "\n" for r in ROWS[:rows]), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter(["data: x\n\n"] * 500), media_type="text/event-stream")
+
+    return TestClient(app)
+
+def test_large_json_is_gzipped():
+    response = _client().get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert int(response.headers["content-length"]) < len(json.dumps(ROWS)) / 5
+    assert response.json() == ROWS
+
+def test_small_and_unaccepted_responses_are_untouched():
+    client = _client()
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"ok": True}
+    identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    refused = client.get("/large", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+
+def test_streams_are_compressed_incrementally():
+    client = _client()
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+    short = client.get("/stream?rows=2", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in short.headers
+    assert short.headers["content-length"] == str(len(short.content))
+
+def test_event_streams_are_not_compressed():
+    response = _client().get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
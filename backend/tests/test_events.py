@@ -0,0 +1,151 @@
+import asyncio
+import json
+
+import pytest
+
+from services import events
+from services.events import EventBroker, Subscriber
+
+async def _next(stream, timeout=2.0):
+    return await asyncio.wait_for(stream.__anext__(), timeout)
+
+async def test_published_events_reach_the_users_stream(storage):
+    broker = EventBroker(poll_seconds=0.02)
+    await broker.start(storage)
+    stream = broker.stream(storage, "user-1")
+    assert await _next(stream) == "retry: 3000\n\n"
+    pending = asyncio.ensure_future(_next(stream))
+    await asyncio.sleep(0)
+    broker.publish(storage, "user-2", events.ACCOUNT_UPDATED, {"id": "acc-2", "balance": 1.0})
+    event = broker.publish(storage, "user-1", events.ACCOUNT_UPDATED, {"id": "acc-1", "balance": 250.0})
+    message = await pending
+    assert message.startswith(f"id: {event['seq']}\nevent: account.updated\ndata: ")
+    assert json.loads(message.split("data: ", 1)[1]) == {"id": "acc-1", "balance": 250.0}
+    await stream.aclose()
+    assert broker.metrics()["subscribers"] == 0
+    await broker.stop()
+
+async def test_events_are_relayed_between_workers(storage):
+    writer, reader = EventBroker(poll_seconds=0.02), EventBroker(poll_seconds=0.02)
+    await writer.start(storage)
+    await reader.start(storage)
+    subscriber = await reader.subscribe("user-1")
+    writer.publish(storage, "user-1", events.TRANSACTION_CREATED, {"id": "t1"})
+    event = await asyncio.wait_for(subscriber.queue.get(), 2.0)
+    assert event["type"] == events.TRANSACTION_CREATED
+    assert reader.metrics()["relayed"] == 1
+    # The writer's own subscribers were served directly, not through the relay
+    assert writer.metrics()["relayed"] == 0
+    await writer.stop()
+    await reader.stop()
+
+async def test_reconnect_replays_missed_events(storage):
+    broker = EventBroker()
+    first = broker.publish(storage, "user-1", events.GOAL_UPDATED, {"id": "g1", "current_amount": 10})
+    second = broker.publish(storage, "user-1", events.GOAL_UPDATED, {"id": "g1", "current_amount": 20})
+    stream = broker.stream(storage, "user-1", last_event_id=first["seq"])
+    await _next(stream)
+    assert (await _next(stream)).startswith(f"id: {second['seq']}\n")
+    await stream.aclose()
+
+def test_slow_subscriber_gets_resync():
+    subscriber = Subscriber("user-1")
+    for seq in range(events.QUEUE_SIZE + 1):
+        subscriber.offer({"seq": seq, "type": events.TRANSACTION_CREATED, "payload": "{}"})
+    assert subscriber.queue.qsize() == 1
+    assert subscriber.queue.get_nowait()["type"] == events.RESYNC
+
+def test_write_handlers_publish_events(client, auth_headers, storage):
+    account = client.post("/api/accounts", json={"name": "Main", "type": "bank", "balance": 100}, headers=auth_headers).json()
+    client.put(f"/api/accounts/{account['id']}", json={"name": None, "type": None, "balance": 80}, headers=auth_headers)
+    client.post("/api/transactions", json={
+        "account_id": account["id"], "type": "expense", "amount": 20, "category": "food",
+        "description": "Lunch", "date": "2025-01-05",
+    }, headers=auth_headers)
+    stored = storage.list_events(0, user_id=account["user_id"])
+    assert [e["type"] for e in stored] == [events.ACCOUNT_CREATED, events.ACCOUNT_UPDATED, events.TRANSACTION_CREATED]
+    assert json.loads(stored[1]["payload"])["balance"] == 80
+
+def test_stream_requires_a_token(client):
+    assert client.get("/api/events/stream").status_code == 401
+
+async def test_streams_end_when_the_worker_drains(storage):
+    broker = EventBroker(poll_seconds=0.02)
+    await broker.start(storage)
+    stream = broker.stream(storage, "user-1", keepalive=60)
+    await _next(stream)
+    pending = asyncio.ensure_future(_next(stream))
+    await asyncio.sleep(0)
+    broker.close_streams()
+    with pytest.raises(StopAsyncIteration):
+        await pending
+    # Streams opened while draining end straight away
+    late = broker.stream(storage, "user-1", keepalive=60)
+    await _next(late)
+    with pytest.raises(StopAsyncIteration):
+        await _next(late)
+    await broker.stop()
+
+async def test_reconnect_past_retention_gets_resync(storage):
+    broker = EventBroker()
+    first = broker.publish(storage, "user-1", events.GOAL_UPDATED, {"id": "g1", "current_amount": 10})
+    second = broker.publish(storage, "user-1", events.GOAL_UPDATED, {"id": "g1", "current_amount": 20})
+    latest = broker.publish(storage, "user-1", events.GOAL_UPDATED, {"id": "g1", "current_amount": 30})
+    storage.conn.execute("DELETE FROM user_events WHERE seq <= ?", (second["seq"],))
+    stream = broker.stream(storage, "user-1", last_event_id=first["seq"])
+    await _next(stream)
+    assert await _next(stream) == f"id: {latest['seq']}\nevent: resync\ndata: {{}}\n\n"
+    await stream.aclose()
+
+async def test_reconnect_after_too_many_missed_events_gets_resync(storage, monkeypatch):
+    monkeypatch.setattr(events, "REPLAY_LIMIT", 3)
+    broker = EventBroker()
+    first = broker.publish(storage, "user-1", events.GOAL_UPDATED, {"id": "g1", "current_amount": 0})
+    missed = [broker.publish(storage, "user-1", events.GOAL_UPDATED, {"id": "g1", "current_amount": amount}) for amount in range(1, 4)]
+    stream = broker.stream(storage, "user-1", last_event_id=first["seq"])
+    await _next(stream)
+    for event in missed:
+        assert (await _next(stream)).startswith(f"id: {event['seq']}\nevent: goal.updated\n")
+    await stream.aclose()
+
+    latest = broker.publish(storage, "user-1", events.GOAL_UPDATED, {"id": "g1", "current_amount": 4})
+    stream = broker.stream(storage, "user-1", last_event_id=first["seq"])
+    await _next(stream)
+    assert await _next(stream) == f"id: {latest['seq']}\nevent: resync\ndata: {{}}\n\n"
+    await stream.aclose()
+
+async def test_relay_delivers_events_that_commit_late(storage):
+    writer, reader = EventBroker(poll_seconds=0.02), EventBroker(poll_seconds=0.02)
+    await writer.start(storage)
+    await reader.start(storage)
+    subscriber = await reader.subscribe("user-1")
+    published = [writer.publish(storage, "user-1", events.TRANSACTION_CREATED, {"id": f"t{i}"}) for i in range(3)]
+    # The middle insert has its seq but has not committed yet
+    late = published[1]
+    storage.conn.execute("DELETE FROM user_events WHERE seq = ?", (late["seq"],))
+    received = [await asyncio.wait_for(subscriber.queue.get(), 2.0) for _ in range(2)]
+    assert [event["seq"] for event in received] == [published[0]["seq"], published[2]["seq"]]
+
+    storage.conn.execute(
+        "INSERT INTO user_events (seq, user_id, type, payload, origin, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (late["seq"], late["user_id"], late["type"], late["payload"], late["origin"], late["created_at"]),
+    )
+    assert (await asyncio.wait_for(subscriber.queue.get(), 2.0))["seq"] == late["seq"]
+    await writer.stop()
+    await reader.stop()
+
+async def test_query_tokens_must_be_short_lived_stream_tokens(client, auth_headers):
+    from fastapi import HTTPException
+    from app.main import get_stream_user
+
+    login_token = auth_headers["Authorization"].split()[1]
+    response = client.post("/api/events/token", headers=auth_headers)
+    assert response.json()["expires_in"] == 60
+    stream_token = response.json()["token"]
+
+    assert (await get_stream_user(None, stream_token)).user_id
+    with pytest.raises(HTTPException) as rejected:
+        await get_stream_user(None, login_token)
+    assert rejected.value.status_code == 401
+    # A stream token is no use against the rest of the API
+    assert client.get("/api/accounts", headers={"Authorization": f"Bearer {stream_token}"}).status_code == 401
@@ -0,0 +1,139 @@
+import re
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from migrations import load_migrations, migrate_postgres, migrate_sqlite, split_statements
+
+SUPABASE_SETUP = Path(__file__).resolve().parents[2] / "SUPABASE_SETUP_INSTRUCTIONS.md"
+
+# Query plan steps that read a whole table instead of seeking an index
+def _full_scans(conn, sql):
+    cur = conn.cursor()
+    cur.row_factory = None
+    plan = cur.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return [row[3] for row in plan if row[3].startswith("SCAN ") and "CONSTANT ROW" not in row[3]]
+
+def test_migrations_apply_once():
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    applied = migrate_sqlite(conn)
+    assert applied == [m.version for m in load_migrations("sqlite")]
+    assert migrate_sqlite(conn) == []
+
+def test_failed_migration_rolls_back(tmp_path):
+    (tmp_path / "0001_ok.sql").write_text("CREATE TABLE a (id TEXT);")
+    (tmp_path / "0002_broken.sql").write_text("CREATE TABLE b (id TEXT);\nNOT SQL;")
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    with pytest.raises(sqlite3.OperationalError):
+        migrate_sqlite(conn, load_migrations(directory=tmp_path))
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name IN ('a', 'b')").fetchall() == []
+
+def test_split_statements_skips_comments():
+    sql = "-- header\nCREATE TABLE a (id TEXT);\n\n-- index\nCREATE INDEX i ON a (id);\n"
+    assert split_statements(sql) == ["CREATE TABLE a (id TEXT);", "CREATE INDEX i ON a (id);"]
+
+def test_hot_queries_use_indexes(storage):
+    """Run every storage query the API issues and EXPLAIN each statement."""
+    executed = []
+    storage.conn.set_trace_callback(executed.append)
+
+    storage.get_user("user-1")
+    storage.get_user_by_email("a@example.com")
+    storage.list_accounts("user-1")
+    storage.get_account("user-1", "acc-1")
+    storage.account_has_transactions("acc-1")
+    storage.list_accounts("user-1", include_archived=True)
+    storage.list_accounts_page("acc-1")
+    storage.count_account_transactions("user-1", "acc-1")
+    storage.remove_account_transactions("user-1", "acc-1", 500, archive=True)
+    storage.get_account_operation("op-1")
+    storage.get_latest_account_operation("user-1", "acc-1")
+    storage.update_account_operation("op-1", {"processed": 1})
+    storage.list_transactions("user-1")
+    storage.list_transactions("user-1", limit=50, after=("2025-01-01", "t1"))
+    storage.get_transaction("user-1", "t1")
+    storage.list_account_transactions("user-1", "acc-1", "2025-01-01", "2025-02-01", 500)
+    storage.list_account_transactions("user-1", "acc-1", "2025-01-01", "2025-02-01", 500, after=("2025-01-10", "t1"))
+    storage.account_net_before("user-1", "acc-1", "2025-01-01")
+    storage.monthly_totals("user-1", "2024-01-01", "2025-01-01")
+    storage.list_goals("user-1")
+    storage.get_goal("user-1", "g1")
+    storage.count_user_rows("user-1")
+    storage.list_budgets("user-1")
+    storage.list_budgets("user-1", "2025-01")
+    storage.get_budget("user-1", "b1")
+    storage.add_budget_spend("user-1", "food", "2025-01", 5.0)
+    storage.sum_expenses("user-1", "food", "2025-01")
+    storage.list_budget_alerts("user-1")
+    storage.list_recurring_series("user-1")
+    storage.get_recurring_series("user-1", "expense|netflix|28")
+    storage.replace_recurring_series("user-1", [])
+    storage.save_pending_job("recurring.detect", "user-1", "2025-01-01T00:00:00+00:00")
+    storage.claim_pending_job("recurring.detect", "user-1", "2025-01-01T00:00:00+00:00", "2025-01-01T00:10:00+00:00")
+    storage.complete_pending_job("recurring.detect", "user-1", "2025-01-01T00:10:00+00:00")
+    storage.get_statement("user-1", "acc-1", "2025-01")
+    storage.list_statements("user-1")
+    storage.list_statements("user-1", "acc-1")
+    storage.statement_account_ids("2025-01", ["acc-1", "acc-2"])
+    storage.list_events(0)
+    storage.list_events(0, user_id="user-1")
+    storage.latest_event_seq()
+    storage.user_version("user-1")
+    storage.oldest_event_seq()
+    storage.delete_events_before("2025-01-01T00:00:00+00:00")
+
+    storage.conn.set_trace_callback(None)
+    statements = [sql for sql in executed if sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))]
+    assert statements
+    offenders = {sql: _full_scans(storage.conn, sql) for sql in statements}
+    assert {sql: scans for sql, scans in offenders.items() if scans} == {}
+
+# ---------------- POSTGRES ----------------
+def test_postgres_migrations_apply_once(postgres):
+    applied = migrate_postgres(postgres)
+    assert applied == [m.version for m in load_migrations("postgres")]
+    assert migrate_postgres(postgres) == []
+
+def test_postgres_migrations_adopt_the_documented_schema(postgres):
+    """A project set up by hand from SUPABASE_SETUP_INSTRUCTIONS.md migrates and keeps its rows."""
+    postgres.execute(re.search(r"```sql\n(.*?)```", SUPABASE_SETUP.read_text(), re.S).group(1))
+    user_id = str(postgres.execute(
+        "INSERT INTO users (name, email, password) VALUES ('A', 'a@example.com', 'x') RETURNING id").fetchone()[0])
+    account_id = str(postgres.execute(
+        "INSERT INTO accounts (user_id, name, type, balance) VALUES (%s, 'Main', 'bank', 100) RETURNING id", (user_id,)).fetchone()[0])
+    postgres.execute(
+        "INSERT INTO transactions (user_id, account_id, type, amount, category, description, date, created_at) VALUES "
+        "(%s, %s, 'income', 50, 'salary', 'Salary', '2025-01-05', '2025-01-05 09:30:00+00'), "
+        "(%s, %s, 'expense', 20.5, 'entertainment', 'Netflix subscription', '2025-02-03', '2025-02-03 10:00:00+00')",
+        (user_id, account_id, user_id, account_id),
+    )
+    postgres.commit()
+
+    assert migrate_postgres(postgres) == [m.version for m in load_migrations("postgres")]
+    assert migrate_postgres(postgres) == []
+
+    assert postgres.execute(
+        "SELECT date, amount, created_at FROM transactions WHERE type = 'income'"
+    ).fetchone() == ("2025-01-05", 50.0, "2025-01-05T09:30:00.000000+00:00")
+    # Rows written the way the app writes them
+    postgres.execute(
+        "INSERT INTO transactions (id, user_id, account_id, type, amount, category, description, date, created_at) "
+        "VALUES ('t-new', %s, %s, 'expense', 4.5, 'food', 'Tea', '2025-02-10', '2025-02-10T08:00:00+00:00')",
+        (user_id, account_id),
+    )
+    postgres.execute(
+        "INSERT INTO budgets (id, user_id, category, month, amount, created_at) "
+        "VALUES ('b1', %s, 'food', '2025-02', 100, '2025-02-01T00:00:00+00:00')", (user_id,))
+
+    assert postgres.execute("SELECT * FROM monthly_totals(%s, '2025-01-01', '2025-03-01')", (user_id,)).fetchall() == [
+        ("2025-01", 50.0, 0.0), ("2025-02", 0.0, 25.0),
+    ]
+    assert postgres.execute("SELECT account_net_before(%s, %s, '2025-02-01')", (user_id, account_id)).fetchone() == (50.0,)
+    assert postgres.execute("SELECT sum_expenses(%s, 'food', '2025-02-01', '2025-03-01')", (user_id,)).fetchone() == (4.5,)
+    found = postgres.execute("SELECT description FROM search_transactions(%s, ARRAY['netf'], 10)", (user_id,)).fetchall()
+    assert found == [("Netflix subscription",)]
+    assert postgres.execute("SELECT spent FROM add_budget_spend(%s, 'food', '2025-02', 4.5)", (user_id,)).fetchone() == (4.5,)
+    removed = postgres.execute("SELECT id FROM remove_account_transactions(%s, %s, 10, true)", (user_id, account_id)).fetchall()
+    assert len(removed) == 3
+    assert postgres.execute("SELECT balance FROM accounts WHERE id = %s", (account_id,)).fetchone() == (125.0,)
@@ -0,0 +1,65 @@
+import uuid
+from datetime import date
+
+from services import events, projections
+from services.events import EventBroker
+
+def _goal(target, current, deadline):
+    return {"id": str(uuid.uuid4()), "target_amount": target, "current_amount": current, "deadline": deadline}
+
+def test_goals_are_projected_from_the_savings_trend():
+    today = date(2025, 7, 1)
+    goals = [_goal(3000, 1000, "2026-01-01"), _goal(50000, 0, "2025-12-31"), _goal(500, 500, "2025-08-01")]
+    result = projections.project_goals(goals, [1000.0] * 6, today)
+    soon, far, done = (result[g["id"]] for g in goals)
+    assert soon["months_to_complete"] == 2
+    assert soon["projected_completion_date"] == "2025-08-31"
+    assert soon["on_track"]
+    assert far["months_to_complete"] == 50
+    assert not far["on_track"]
+    assert far["required_monthly_contribution"] == round(50000 / ((date(2025, 12, 31) - today).days / 30.44), 2)
+    assert done == {**done, "months_to_complete": 0, "required_monthly_contribution": 0, "on_track": True}
+
+def test_falling_savings_never_complete():
+    goal = _goal(10000, 0, "2030-01-01")
+    result = projections.project_goals([goal], [900.0, 600.0, 300.0], date(2025, 7, 1))[goal["id"]]
+    assert result["monthly_savings"] == 0
+    assert result["projected_completion_date"] is None
+    assert not result["on_track"]
+
+def test_monthly_savings_fill_quiet_months(storage):
+    for day, type_, amount in [("2025-02-10", "income", 500), ("2025-04-03", "income", 300), ("2025-04-09", "expense", 100)]:
+        storage.create_transaction({
+            "id": str(uuid.uuid4()), "user_id": "user-1", "account_id": "acc-1", "type": type_, "amount": amount,
+            "category": "misc", "description": "x", "date": day, "created_at": day,
+        })
+    assert projections.monthly_savings(storage, "user-1", "2025-05") == [500, 0, 200]
+
+def test_cache_is_invalidated_by_change_events(storage):
+    cache = projections.ProjectionCache()
+    goals = [dict(_goal(1000, 0, "2030-01-01"), user_id="user-1")]
+    cache.goals_with_projections(storage, "user-1", goals)
+    cache.goals_with_projections(storage, "user-1", goals)
+    assert (cache.hits, cache.misses) == (1, 1)
+    EventBroker().publish(storage, "user-1", events.TRANSACTION_CREATED, {"id": "t1"})
+    cache.goals_with_projections(storage, "user-1", goals)
+    assert cache.misses == 2
+
+def test_cache_survives_event_pruning(storage):
+    cache = projections.ProjectionCache()
+    goals = [dict(_goal(1000, 0, "2030-01-01"), user_id="user-1")]
+    cache.goals_with_projections(storage, "user-1", goals)
+    # Another worker records income; its event is then pruned before this worker reads again
+    storage.create_transaction({
+        "id": "t1", "user_id": "user-1", "account_id": "acc-1", "type": "income", "amount": 5000,
+        "category": "salary", "description": "Pay", "date": "2025-01-05", "created_at": "2025-01-05",
+    })
+    EventBroker().publish(storage, "user-1", events.TRANSACTION_CREATED, {"id": "t1"})
+    storage.delete_events_before("9999")
+    cache.goals_with_projections(storage, "user-1", goals)
+    assert cache.misses == 2
+
+def test_get_goals_returns_projections(client, auth_headers):
+    client.post("/api/goals", json={"name": "Car", "target_amount": 5000, "current_amount": 0, "deadline": "2030-01-01"}, headers=auth_headers)
+    goals = client.get("/api/goals", headers=auth_headers).json()
+    assert goals[0]["projection"]["required_monthly_contribution"] > 0
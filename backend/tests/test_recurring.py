@@ -0,0 +1,117 @@
+import json
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from migrations import migrate_postgres
+from services import recurring
+
+def _txn(i, day, description, amount, type_="expense", category="subscriptions"):
+    return {
+        "id": f"t{i}", "user_id": "user-1", "account_id": "acc-1", "type": type_, "amount": amount,
+        "category": category, "description": description, "date": day.isoformat(), "created_at": day.isoformat(),
+    }
+
+def _history(seed=7):
+    rng = random.Random(seed)
+    start = date(2024, 1, 3)
+    rows = []
+    for month in range(12):
+        rows.append(_txn(len(rows), start + timedelta(days=round(month * 30.44) + rng.randint(-2, 2)), f"NETFLIX.COM #{rng.randint(1000, 9999)}", 15.99))
+        rows.append(_txn(len(rows), start + timedelta(days=month * 30 + 1), "ACME PAYROLL", 4200.0, type_="income", category="salary"))
+    for week in range(40):
+        rows.append(_txn(len(rows), start + timedelta(weeks=week), "City Gym", 12.0 + rng.random(), category="health"))
+    for i in range(200):
+        rows.append(_txn(len(rows), start + timedelta(days=rng.randint(0, 360)), f"Shop {rng.randint(0, 50)}", rng.uniform(5, 300), category="shopping"))
+    return rows
+
+def test_normalize_description_strips_noise():
+    assert recurring.normalize_description("NETFLIX.COM 8412*") == recurring.normalize_description("Netflix.com #8533")
+
+def test_detects_periodic_series():
+    found = {s["description"].split()[0].lower(): s for s in recurring.detect_series("user-1", _history())}
+    assert set(found) == {"netflix.com", "acme", "city"}
+    assert found["netflix.com"]["period"] == "monthly"
+    assert found["netflix.com"]["occurrences"] == 12
+    assert found["acme"]["period"] == "monthly"
+    assert found["city"]["period"] == "weekly"
+
+def test_too_few_or_irregular_rows_are_ignored():
+    start = date(2024, 1, 1)
+    rows = [_txn(i, start + timedelta(days=d), "Coffee", 4.0) for i, d in enumerate((0, 3, 40, 41, 90))]
+    assert recurring.detect_series("user-1", rows) == []
+    assert recurring.detect_series("user-1", rows[:2]) == []
+
+def test_new_transaction_extends_stored_series(storage):
+    rows = _history()
+    for row in rows:
+        storage.create_transaction(row)
+    series = {s["series_key"]: s for s in recurring.detect_for_user(storage, "user-1")}
+    netflix = next(s for s in series.values() if s["description"].startswith("NETFLIX"))
+
+    next_day = date.fromisoformat(netflix["last_date"]) + timedelta(days=30)
+    assert recurring.extend_series(storage, "user-1", _txn(999, next_day, "Netflix.com 1234", 15.99))
+    stored = storage.get_recurring_series("user-1", netflix["series_key"])
+    assert stored["occurrences"] == netflix["occurrences"] + 1
+    assert stored["last_date"] == next_day.isoformat()
+
+    assert not recurring.extend_series(storage, "user-1", _txn(1000, next_day + timedelta(days=3), "Netflix.com", 15.99))
+    assert not recurring.extend_series(storage, "user-1", _txn(1001, next_day, "Something new", 15.99))
+
+def test_amount_range_covers_the_bucket():
+    for amount in (0.0, 0.01, 0.5, 15.99, 4200.0, 1e7):
+        low, high = recurring.amount_range(recurring.amount_bucket(amount))
+        assert low <= amount <= high
+
+def test_detect_for_series_reads_only_its_group(storage, monkeypatch):
+    for row in _history():
+        storage.create_transaction(row)
+    series = {s["series_key"]: s for s in recurring.detect_for_user(storage, "user-1")}
+    netflix = next(s for s in series.values() if s["description"].startswith("NETFLIX"))
+    monkeypatch.setattr(storage, "list_transactions", None)
+
+    # Deleting most of the series ends it; the other series are untouched
+    netflix_rows = [t for t in storage.list_transactions_by_amount("user-1", "expense", 15, 17)
+                    if recurring.series_key(t) == netflix["series_key"]]
+    for row in netflix_rows[2:]:
+        storage.delete_transaction("user-1", row["id"])
+    assert recurring.detect_for_series(storage, "user-1", netflix["series_key"]) is None
+    assert {s["series_key"] for s in storage.list_recurring_series("user-1")} == set(series) - {netflix["series_key"]}
+
+    # A new group becomes a series of its own
+    start = date(2024, 2, 1)
+    for i in range(4):
+        storage.create_transaction(_txn(2000 + i, start + timedelta(days=91 * i), "Car insurance", -310.0 - i, category="insurance"))
+    key = recurring.series_key(_txn(0, start, "Car insurance", -310.0))
+    found = recurring.detect_for_series(storage, "user-1", key)
+    assert found["period"] == "quarterly" and found["occurrences"] == 4
+    assert storage.get_recurring_series("user-1", key)["id"] == found["id"]
+
+def test_postgres_replace_recurring_series_is_atomic(postgres):
+    migrate_postgres(postgres)
+    series = recurring.detect_series("user-1", _history())
+    postgres.execute("SELECT replace_recurring_series('user-1', %s::jsonb)", (json.dumps(series),))
+    postgres.execute("SELECT replace_recurring_series('user-2', %s::jsonb)", (json.dumps(series[:1]),))
+    assert postgres.execute("SELECT count(*) FROM recurring_series WHERE user_id = 'user-1'").fetchone() == (len(series),)
+    # Rows for another user are not written
+    assert postgres.execute("SELECT count(*) FROM recurring_series").fetchone() == (len(series),)
+    postgres.commit()
+
+    broken = [{**series[0], "period": None}]
+    with pytest.raises(Exception):
+        postgres.execute("SELECT replace_recurring_series('user-1', %s::jsonb)", (json.dumps(broken),))
+    postgres.rollback()
+    assert postgres.execute("SELECT count(*) FROM recurring_series WHERE user_id = 'user-1'").fetchone() == (len(series),)
+
+def test_scales_to_large_histories():
+    rng = random.Random(1)
+    start = date(2015, 1, 1)
+    rows = [
+        _txn(i, start + timedelta(days=rng.randint(0, 3650)), f"Merchant {rng.randint(0, 5000)}", rng.uniform(1, 500))
+        for i in range(100_000)
+    ]
+    began = time.perf_counter()
+    recurring.detect_series("user-1", rows)
+    assert time.perf_counter() - began < 5
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+
+from services.scheduler import JobScheduler
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, key):
+        with self.lock:
+            self.calls.append(key)
+
+async def _wait_for(predicate, timeout=2.0):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+async def test_debounced_jobs_run_once(storage):
+    jobs = JobScheduler(debounce_seconds=0.05)
+    record = Recorder()
+    jobs.register("detect", record)
+    await jobs.start(storage)
+    for _ in range(5):
+        jobs.schedule("detect", "user-1")
+    jobs.schedule("detect", "user-2")
+    await _wait_for(lambda: len(record.calls) >= 2)
+    await asyncio.sleep(0.1)
+    await jobs.stop()
+    assert sorted(record.calls) == ["user-1", "user-2"]
+    assert jobs.metrics()["jobs"]["detect"]["runs"] == 2
+    assert storage.list_pending_jobs() == []
+
+async def test_pending_jobs_survive_restart(storage):
+    first = JobScheduler()
+    first.register("detect", Recorder())
+    await first.start(storage)
+    first.schedule("detect", "user-1", delay=0.05)
+    assert first.metrics()["queue_depth"] == 1
+    await first.stop()
+
+    record = Recorder()
+    second = JobScheduler()
+    second.register("detect", record)
+    await second.start(storage)
+    await _wait_for(lambda: record.calls == ["user-1"])
+    await second.stop()
+
+async def test_only_one_worker_claims_a_job(storage):
+    records = [Recorder(), Recorder()]
+    workers = [JobScheduler(), JobScheduler()]
+    for worker, record in zip(workers, records):
+        worker.register("detect", record)
+    await workers[0].start(storage)
+    workers[0].schedule("detect", "user-1", delay=0.1)
+    # Starting after the job was stored, the second worker queues it as well
+    await workers[1].start(storage)
+    assert workers[1].metrics()["queue_depth"] == 1
+    await asyncio.sleep(0.3)
+    for worker in workers:
+        await worker.stop()
+    assert sum(len(r.calls) for r in records) == 1
+
+async def test_job_of_a_dead_worker_is_rerun_after_its_lease(storage):
+    started, release = threading.Event(), threading.Event()
+    first = JobScheduler(lease_seconds=0.2)
+    first.register("detect", lambda key: (started.set(), release.wait(2)))
+    await first.start(storage)
+    first.schedule("detect", "user-1", delay=0)
+    await _wait_for(started.is_set)
+    # The worker dies mid-job: the claimed row is still stored under its lease
+    assert len(storage.list_pending_jobs()) == 1
+
+    record = Recorder()
+    second = JobScheduler(lease_seconds=0.2)
+    second.register("detect", record)
+    await second.start(storage)
+    await _wait_for(lambda: record.calls == ["user-1"])
+    await asyncio.sleep(0.05)
+    assert storage.list_pending_jobs() == []
+    release.set()
+    await second.stop()
+    await first.stop()
+
+async def test_running_worker_picks_up_an_expired_lease(storage):
+    started, release = threading.Event(), threading.Event()
+    record = Recorder()
+    second = JobScheduler(lease_seconds=0.2, rescan_seconds=0.05)
+    second.register("detect", record)
+    await second.start(storage)
+
+    first = JobScheduler(lease_seconds=0.2)
+    first.register("detect", lambda key: (started.set(), release.wait(2)))
+    await first.start(storage)
+    first.schedule("detect", "user-1", delay=0)
+    await _wait_for(started.is_set)
+    # The first worker dies mid-job; the second was already running and never restarts
+    await _wait_for(lambda: record.calls == ["user-1"])
+    await asyncio.sleep(0.1)
+    assert record.calls == ["user-1"]
+    assert storage.list_pending_jobs() == []
+    release.set()
+    await second.stop()
+    await first.stop()
+
+async def test_failed_jobs_are_retried_after_the_lease(storage):
+    attempts = []
+
+    def flaky(key):
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+
+    jobs = JobScheduler(lease_seconds=0.1)
+    jobs.register("flaky", flaky)
+    await jobs.start(storage)
+    jobs.schedule("flaky", "user-1", delay=0)
+    await _wait_for(lambda: len(attempts) == 2)
+    await asyncio.sleep(0.05)
+    await jobs.stop()
+    assert jobs.metrics()["jobs"]["flaky"]["failures"] == 1
+    assert storage.list_pending_jobs() == []
+
+async def test_concurrency_limit_and_failures(storage):
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def slow(key):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        threading.Event().wait(0.05)
+        with lock:
+            active -= 1
+        if key == "bad":
+            raise RuntimeError("boom")
+
+    jobs = JobScheduler(max_concurrency=2)
+    jobs.register("slow", slow)
+    await jobs.start(storage)
+    for key in ("a", "b", "c", "d", "bad"):
+        jobs.schedule("slow", key, delay=0)
+    await _wait_for(lambda: jobs.metrics()["jobs"]["slow"]["runs"] == 5)
+    await jobs.stop()
+    assert peak == 2
+    assert jobs.metrics()["jobs"]["slow"]["failures"] == 1
+
+async def test_periodic_jobs_reschedule(storage):
+    record = Recorder()
+    jobs = JobScheduler()
+    jobs.register("tick", record, every=0.05)
+    await jobs.start(storage)
+    await _wait_for(lambda: len(record.calls) >= 2)
+    await jobs.stop()
+    assert set(record.calls) == {"*"}
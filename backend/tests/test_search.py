@@ -0,0 +1,157 @@
+import random
+import time
+import uuid
+from types import SimpleNamespace
+
+from migrations import migrate_postgres
+
+def _row(i, user_id, description, category="shopping", date="2025-01-15"):
+    return {
+        "id": f"t{i:06d}", "user_id": user_id, "account_id": "acc-1", "type": "expense", "amount": 10.0,
+        "category": category, "description": description, "date": date, "created_at": date,
+    }
+
+def _search(storage, user_id, *terms, limit=50, after=None):
+    return [r["id"] for r in storage.search_transactions(user_id, list(terms), limit, after)]
+
+def test_prefix_match_scoped_to_user(storage):
+    storage.create_transaction(_row(1, "user-1", "Netflix monthly"))
+    storage.create_transaction(_row(2, "user-1", "Groceries", category="food"))
+    storage.create_transaction(_row(3, "user-2", "Netflix monthly"))
+    assert _search(storage, "user-1", "netf") == ["t000001"]
+    assert _search(storage, "user-1", "foo") == ["t000002"]
+    assert _search(storage, "user-1", "net", "month") == ["t000001"]
+    assert _search(storage, "user-1", "net", "food") == []
+
+def test_user_ids_must_match_exactly(storage):
+    storage.create_transaction(_row(1, "other user-1 x", "Netflix monthly"))
+    storage.create_transaction(_row(2, "user-1", "Netflix yearly"))
+    assert _search(storage, "user-1", "netf") == ["t000002"]
+    assert _search(storage, "other user-1 x", "netf") == ["t000001"]
+
+def test_index_follows_updates_and_deletes(storage):
+    storage.create_transaction(_row(1, "user-1", "Coffee"))
+    storage.update_transaction("user-1", "t000001", {"description": "Tea"})
+    assert _search(storage, "user-1", "coffee") == []
+    assert _search(storage, "user-1", "tea") == ["t000001"]
+    storage.delete_transaction("user-1", "t000001")
+    assert _search(storage, "user-1", "tea") == []
+
+def test_ranking_prefers_description_hits(storage):
+    storage.create_transaction(_row(1, "user-1", "Weekly shop", category="uber"))
+    storage.create_transaction(_row(2, "user-1", "Uber ride home", category="transport"))
+    assert _search(storage, "user-1", "uber") == ["t000002", "t000001"]
+
+def test_newest_first_within_a_tier_and_paging_across_tiers(storage):
+    for i in range(1, 4):
+        storage.create_transaction(_row(i, "user-1", f"Cab ride {i}", category="uber", date=f"2025-01-0{i}"))
+    # Imported later, dated earlier
+    storage.create_transaction(_row(5, "user-1", "Cab ride 0", category="uber", date="2024-12-31"))
+    storage.create_transaction(_row(4, "user-1", "Uber eats", category="food"))
+    first = storage.search_transactions("user-1", ["uber"], 2)
+    assert [r["id"] for r in first] == ["t000004", "t000003"]
+    assert [r["rank"] for r in first] == [0.0, 1.0]
+    rest = _search(storage, "user-1", "uber", after=(first[-1]["rank"], first[-1]["date"], first[-1]["id"]))
+    assert rest == ["t000002", "t000001", "t000005"]
+
+def test_search_endpoint_pages_with_cursor(client, auth_headers):
+    account = client.post("/api/accounts", json={"name": "Main", "type": "checking", "balance": 0.0}, headers=auth_headers).json()
+    for day in range(1, 6):
+        client.post("/api/transactions", json={
+            "account_id": account["id"], "type": "expense", "amount": 5.0,
+            "category": "food", "description": f"Coffee shop visit {day}", "date": f"2025-01-0{day}",
+        }, headers=auth_headers)
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "cof", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/transactions/search", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [r["id"] for r in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 5
+    assert client.get("/api/transactions/search", params={"q": "!!"}, headers=auth_headers).status_code == 400
+
+def test_search_is_fast_on_large_histories(storage):
+    rng = random.Random(3)
+    merchants = [f"Merchant{m} store" for m in range(2000)] + ["Netflix.com"]
+    user_id, other_id = str(uuid.uuid4()), str(uuid.uuid4())
+    rows = [
+        ("t%06d" % i, user_id if i % 2 else other_id, "acc-1", "expense", 1.0, "misc",
+         f"{rng.choice(merchants)} {i}", f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", "2025-01-01")
+        for i in range(200_000)
+    ]
+    storage.conn.execute("BEGIN")
+    storage.conn.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    storage.conn.execute("COMMIT")
+
+    # A rare word, and prefixes that match nearly all of the user's 100k rows
+    for terms, expected in ((["netf"], "Netflix"), (["mer"], "Merchant"), (["store"], "Merchant"), (["merch", "st"], "Merchant")):
+        began = time.perf_counter()
+        page = storage.search_transactions(user_id, terms, 50)
+        elapsed = time.perf_counter() - began
+        assert page and all(r["description"].startswith(expected) and r["user_id"] == user_id for r in page)
+        assert elapsed < 0.05, (terms, elapsed)
+
+    # Deep pages stay cheap too
+    after = (page[-1]["rank"], page[-1]["date"], page[-1]["id"])
+    began = time.perf_counter()
+    assert len(storage.search_transactions(user_id, ["mer"], 50, after)) == 50
+    assert time.perf_counter() - began < 0.05
+
+class _PostgresRpc:
+    """Runs SupabaseStorage's RPC calls as SQL on a Postgres connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def rpc(self, name, params):
+        args = ", ".join(f"{key} => %({key})s" for key in params)
+        rows = self.conn.execute(f"SELECT * FROM {name}({args})", params).fetchall()
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=rows))
+
+def test_postgres_search_matches_sqlite(storage, postgres):
+    from psycopg.rows import dict_row
+    from services.supabase_service import SupabaseStorage
+    migrate_postgres(postgres)
+    postgres.row_factory = dict_row
+    supabase = SupabaseStorage.__new__(SupabaseStorage)
+    supabase.client = _PostgresRpc(postgres)
+
+    rows = [
+        _row(1, "user-1", "Uber ride", category="transport", date="2025-01-03"),
+        _row(2, "user-1", "Cab home", category="uber", date="2025-01-05"),
+        _row(3, "user-1", "Uber eats", category="food", date="2025-01-05"),
+        _row(4, "user-1", "Uber ride", category="transport", date="2024-12-20"),
+        _row(5, "user-1", "Cab to airport", category="uber", date="2025-01-05"),
+        _row(6, "other user-1 x", "Uber ride", category="transport", date="2025-01-06"),
+        _row(7, "user-1", "Uber ride", category="transport", date="2025-01-05"),
+    ]
+    for row in rows:
+        storage.create_transaction(row)
+        postgres.execute(
+            "INSERT INTO transactions (id, user_id, account_id, type, amount, category, description, date, created_at) "
+            "VALUES (%(id)s, %(user_id)s, %(account_id)s, %(type)s, %(amount)s, %(category)s, %(description)s, %(date)s, %(created_at)s)",
+            row,
+        )
+
+    def pages(db, *terms):
+        seen, after = [], None
+        while True:
+            page = db.search_transactions("user-1", list(terms), 2, after)
+            seen += [(row["id"], row["rank"]) for row in page]
+            if len(page) < 2:
+                return seen
+            after = (page[-1]["rank"], page[-1]["date"], page[-1]["id"])
+
+    expected = [
+        ("t000003", 0.0), ("t000007", 0.0), ("t000001", 0.0), ("t000004", 0.0),
+        ("t000002", 1.0), ("t000005", 1.0),
+    ]
+    assert pages(storage, "uber") == expected
+    assert pages(supabase, "uber") == expected
+    assert pages(supabase, "ub", "ri") == pages(storage, "ub", "ri") == [
+        ("t000007", 0.0), ("t000001", 0.0), ("t000004", 0.0),
+    ]
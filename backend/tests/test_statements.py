@@ -0,0 +1,83 @@
+import json
+import uuid
+
+from services import statements
+
+def _account(storage, user_id="user-1", balance=100.0, created_at="2024-01-01T00:00:00+00:00"):
+    return storage.create_account({
+        "id": str(uuid.uuid4()), "user_id": user_id, "name": "Main", "type": "bank", "balance": balance, "created_at": created_at,
+    })
+
+def _txn(storage, account, type_, amount, category, date):
+    storage.create_transaction({
+        "id": str(uuid.uuid4()), "user_id": account["user_id"], "account_id": account["id"], "type": type_, "amount": amount,
+        "category": category, "description": category, "date": date, "created_at": date,
+    })
+
+def test_statement_balances_and_breakdown(storage):
+    account = _account(storage)
+    _txn(storage, account, "income", 50, "salary", "2025-01-20")
+    _txn(storage, account, "expense", 30, "food", "2025-02-02")
+    _txn(storage, account, "expense", 20, "food", "2025-02-15")
+    _txn(storage, account, "income", 500, "salary", "2025-02-28")
+    _txn(storage, account, "expense", 10, "food", "2025-03-01")
+    statement = statements.build_statement(storage, "user-1", account, "2025-02")
+    assert statement["opening_balance"] == 150
+    assert statement["closing_balance"] == 600
+    assert statement["transaction_count"] == 3
+    assert statement["categories"] == [
+        {"category": "food", "income": 0, "expense": 50, "count": 2},
+        {"category": "salary", "income": 500, "expense": 0, "count": 1},
+    ]
+
+def test_generation_pages_through_large_months(storage, monkeypatch):
+    monkeypatch.setattr(statements, "PAGE_SIZE", 7)
+    account = _account(storage, balance=0)
+    for i in range(50):
+        _txn(storage, account, "expense", 1, "food", f"2025-02-{i % 28 + 1:02d}")
+    lines = list(statements.statement_lines(storage, "user-1", account, "2025-02"))
+    assert [kind for kind, _ in lines].count("transaction") == 50
+    assert lines[-1][1]["total_expense"] == 50
+
+def test_month_close_stores_each_statement_once(storage):
+    account = _account(storage)
+    _account(storage, user_id="user-2", created_at="2025-03-05T00:00:00+00:00")
+    _txn(storage, account, "expense", 40, "rent", "2025-01-03")
+    assert statements.close_month(storage, "2025-01") == 1
+    assert statements.close_month(storage, "2025-01") == 0
+    # The next month opens where the stored one closed
+    assert statements.close_month(storage, "2025-02") == 1
+    assert storage.get_statement("user-1", account["id"], "2025-02")["opening_balance"] == 60
+
+def test_archived_accounts_keep_only_stored_statements(storage):
+    from services import account_removal
+    account = _account(storage)
+    _txn(storage, account, "expense", 40, "rent", "2025-01-03")
+    _txn(storage, account, "expense", 10, "food", "2025-02-03")
+    statements.close_month(storage, "2025-01")
+    operation = account_removal.start(storage, "user-1", account, account_removal.ARCHIVE)
+    account_removal.run(storage, operation["id"])
+    # February's rows now live in archived_transactions; a statement built now would be wrong
+    assert statements.close_month(storage, "2025-02") == 0
+    assert storage.get_statement("user-1", account["id"], "2025-02") is None
+    assert storage.get_statement("user-1", account["id"], "2025-01")["closing_balance"] == 60
+
+def test_closed_months_are_cacheable(client, auth_headers):
+    account = client.post("/api/accounts", json={"name": "Main", "type": "bank", "balance": 100}, headers=auth_headers).json()
+    client.post("/api/transactions", json={
+        "account_id": account["id"], "type": "expense", "amount": 25, "category": "food", "description": "Lunch", "date": "2025-01-05",
+    }, headers=auth_headers)
+
+    response = client.get(f"/api/statements/{account['id']}/2025-01", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["closing_balance"] == 75
+    assert "immutable" in response.headers["Cache-Control"]
+    cached = client.get(f"/api/statements/{account['id']}/2025-01", headers={**auth_headers, "If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+    current = client.get(f"/api/statements/{account['id']}/{statements.current_month()}", headers=auth_headers)
+    assert current.headers["Cache-Control"].startswith("no-store")
+
+    export = client.get(f"/api/statements/{account['id']}/2025-01/export", headers=auth_headers)
+    lines = [json.loads(line) for line in export.text.splitlines()]
+    assert [line["record"] for line in lines] == ["header", "transaction", "summary"]
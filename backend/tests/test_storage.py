@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+def _transaction(txn_id, account_id="acc-1", user_id="user-1", date="2025-01-15", amount=10.0):
+    return {
+        "id": txn_id, "user_id": user_id, "account_id": account_id, "type": "expense",
+        "amount": amount, "category": "food", "description": "Lunch", "date": date, "created_at": _now(),
+    }
+
+def test_user_lookup_by_email(storage):
+    storage.create_user({"id": "user-1", "name": "A", "email": "a@example.com", "password": "x", "created_at": _now()})
+    assert storage.get_user_by_email("a@example.com")["id"] == "user-1"
+    assert "password" not in storage.get_user("user-1")
+    assert storage.get_user_by_email("missing@example.com") is None
+
+def test_rows_are_scoped_to_their_user(storage):
+    storage.create_account({"id": "acc-1", "user_id": "user-1", "name": "Main", "type": "checking", "balance": 5.0, "created_at": _now()})
+    assert storage.get_account("user-1", "acc-1")["balance"] == 5.0
+    assert storage.get_account("user-2", "acc-1") is None
+
+    storage.update_account("user-2", "acc-1", {"balance": 99.0})
+    storage.delete_account("user-2", "acc-1")
+    assert storage.get_account("user-1", "acc-1")["balance"] == 5.0
+
+def test_transactions_list_newest_first(storage):
+    storage.create_transaction(_transaction("t1", date="2025-01-01"))
+    storage.create_transaction(_transaction("t2", date="2025-03-01"))
+    storage.create_transaction(_transaction("t3", date="2025-02-01"))
+    assert [t["id"] for t in storage.list_transactions("user-1")] == ["t2", "t3", "t1"]
+
+def test_account_has_transactions(storage):
+    assert not storage.account_has_transactions("acc-1")
+    storage.create_transaction(_transaction("t1"))
+    assert storage.account_has_transactions("acc-1")
+    storage.update_transaction("user-1", "t1", {"account_id": "acc-2"})
+    assert not storage.account_has_transactions("acc-1")
+
+def test_count_user_rows(storage):
+    storage.create_transaction(_transaction("t1"))
+    storage.create_transaction(_transaction("t2"))
+    storage.create_transaction(_transaction("t3", user_id="user-2"))
+    assert storage.count_user_rows("user-1") == {"accounts": 0, "transactions": 2, "goals": 0}
+
+def test_api_round_trip(client, auth_headers):
+    account = client.post("/api/accounts", json={"name": "Main", "type": "checking", "balance": 100.0}, headers=auth_headers).json()
+    created = client.post("/api/transactions", json={
+        "account_id": account["id"], "type": "expense", "amount": 12.5,
+        "category": "food", "description": "Lunch", "date": "2025-01-15",
+    }, headers=auth_headers)
+    assert created.status_code == 200
+
+    assert len(client.get("/api/transactions", headers=auth_headers).json()) == 1
+    assert client.delete(f"/api/accounts/{account['id']}", headers=auth_headers).status_code == 400
+    assert client.get("/api/dashboard/summary", headers=auth_headers).json()["transactions_count"] == 1
+
+def test_keyset_pagination(client, auth_headers):
+    account = client.post("/api/accounts", json={"name": "Main", "type": "checking", "balance": 0.0}, headers=auth_headers).json()
+    for day in range(1, 6):
+        client.post("/api/transactions", json={
+            "account_id": account["id"], "type": "expense", "amount": 1.0,
+            "category": "food", "description": "Lunch", "date": f"2025-01-0{day}",
+        }, headers=auth_headers)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/transactions", params=params, headers=auth_headers)
+        seen += [t["date"] for t in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [f"2025-01-0{day}" for day in range(5, 0, -1)]
+    assert client.get("/api/transactions", params={"cursor": "???"}, headers=auth_headers).status_code == 400
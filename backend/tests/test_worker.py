@@ -0,0 +1,31 @@
+import os
+import signal
+
+from uvicorn import Config, Server
+
+def test_health_reports_this_worker(client):
+    client.get("/health")
+    body = client.get("/health").json()
+    assert body["status"] == "healthy"
+    assert body["worker"]["pid"] == os.getpid()
+    assert body["worker"]["requests_served"] == 1
+    assert body["worker"]["in_flight"] == 1
+    assert body["worker"]["draining"] is False
+
+def test_health_reports_draining_once_exit_is_requested(client):
+    from server import app
+    server = Server(Config(app))
+    server.handle_exit(signal.SIGTERM, None)
+    assert server.should_exit
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == "draining"
+    assert response.json()["worker"]["draining"] is True
+
+def test_drain_callbacks_run_once():
+    from app.worker import WorkerState
+    state, calls = WorkerState(), []
+    state.on_drain(lambda: calls.append("closed"))
+    state.begin_draining()
+    state.begin_draining()
+    assert calls == ["closed"]